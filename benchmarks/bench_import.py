@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark the startup import time of the CLI and the link receiver.
+
+Imports each module in a fresh interpreter with ``-X importtime``,
+reporting the total time and the slowest modules it imported, and fails if
+any hardware driver or NumPy was imported, which should only happen once
+a command actually needs them.
+"""
+
+# Standard library imports
+import argparse
+import subprocess
+import sys
+
+
+MODULES_DEFAULT = ("ivaldi.cli", "ivaldi.link")
+MODULES_FORBIDDEN = ("adafruit_", "board", "busio", "gpiozero", "numpy")
+REPEATS_DEFAULT = 5
+TOP_DEFAULT = 10
+
+CHECK_CODE = """
+import sys
+import {module}
+print(" ".join(sorted(sys.modules)))
+"""
+
+
+def measure_import(module):
+    """Import a module in a new interpreter, returning times and modules."""
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c",
+         CHECK_CODE.format(module=module)],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True, check=True)
+    cumulative_us = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        __, cumulative, name = line[len("import time:"):].split("|")
+        cumulative_us[name.strip()] = int(cumulative)
+    return cumulative_us, process.stdout.split()
+
+
+def main(modules=MODULES_DEFAULT, repeats=REPEATS_DEFAULT, top=TOP_DEFAULT):
+    """Run the benchmark and print the results."""
+    forbidden_found = False
+    for module in modules:
+        runs = [measure_import(module) for __ in range(repeats)]
+        best_us, modules_loaded = min(
+            runs, key=lambda run: run[0].get(module, 0))
+        print(f"{module}: {best_us.get(module, 0) / 1000:.1f} ms "
+              f"(best of {repeats}), slowest imports:")
+        for name, cumulative in sorted(
+                ((name, cumulative) for name, cumulative in best_us.items()
+                 if name != module), key=lambda item: -item[1])[:top]:
+            print(f"  {cumulative / 1000:8.1f} ms  {name}")
+        forbidden = [
+            name for name in modules_loaded
+            if name.split(".")[0].startswith(MODULES_FORBIDDEN)]
+        if forbidden:
+            forbidden_found = True
+            print(f"  Imported eagerly: {', '.join(forbidden)}")
+    return 1 if forbidden_found else 0
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip())
+    arg_parser.add_argument(
+        "modules", nargs="*", default=MODULES_DEFAULT,
+        help="Modules to import")
+    arg_parser.add_argument(
+        "--repeats", type=int, default=REPEATS_DEFAULT,
+        help="Number of times to import each, taking the fastest")
+    arg_parser.add_argument(
+        "--top", type=int, default=TOP_DEFAULT,
+        help="Number of slowest imports to list")
+    sys.exit(main(**vars(arg_parser.parse_args())))
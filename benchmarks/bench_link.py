@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark end-to-end serial link throughput over a pseudo-terminal pair.
+
+Sends records read from simulated sensors through the send path, framed
+and optionally batched and compressed, into one end of a pty pair, and
+recieves and decodes them from the other end with pyserial, reporting the
+records and bytes per second and any frames lost.
+"""
+
+# Standard library imports
+import argparse
+import contextlib
+import os
+import threading
+import time
+import tty
+
+# Third party imports
+import serial
+
+# Local imports
+import ivaldi.framing
+import ivaldi.link
+import ivaldi.monitor
+
+
+RECORDS_DEFAULT = 5000
+RECIEVE_TIMEOUT_S = 2
+
+
+class _FileDescriptorPort:
+    """A minimal write-only serial port on a raw file descriptor."""
+
+    def __init__(self, file_descriptor):
+        self.file_descriptor = file_descriptor
+
+    def write(self, data):
+        view = memoryview(data)
+        while view:
+            view = view[os.write(self.file_descriptor, view):]
+
+
+def recieve_records(serial_port, frame_parser, record_codec, records,
+                    results):
+    """Recieve and decode until the number of records arrives or times out."""
+    records_recieved = 0
+    last_recieve_time = time.monotonic()
+    with open(os.devnull, mode="w") as null_file, \
+            contextlib.redirect_stdout(null_file):
+        while (records_recieved < records and time.monotonic()
+               - last_recieve_time < RECIEVE_TIMEOUT_S):
+            recieved_data = ivaldi.link.recieve_data_packet(
+                serial_port, frame_parser=frame_parser,
+                record_codec=record_codec)
+            if recieved_data:
+                records_recieved += len(recieved_data)
+                last_recieve_time = time.monotonic()
+    results["records_recieved"] = records_recieved
+    results["end_time"] = last_recieve_time
+
+
+def main(records=RECORDS_DEFAULT, batch_size=ivaldi.link.BATCH_SIZE_DEFAULT,
+         compress=False):
+    """Run the benchmark and print the results."""
+    frame_batcher = ivaldi.framing.FrameBatcher(
+        ivaldi.link.create_record_codec(compress=compress),
+        batch_size=batch_size)
+    frame_parser = ivaldi.framing.FrameParser()
+    record_codec = ivaldi.link.create_record_codec()
+
+    master_fd, slave_fd = os.openpty()
+    tty.setraw(master_fd)
+    send_port = _FileDescriptorPort(master_fd)
+    results = {}
+    with contextlib.ExitStack() as stack:
+        sensor_args = ivaldi.monitor.setup_sensors(
+            pin_rain=0, pin_wind=1, channel_wind=0, channel_soil=1,
+            simulate=True, exit_stack=stack)
+        for key in ["period_s", "overrun_policy"]:
+            sensor_args.pop(key)
+        recieve_port = stack.enter_context(serial.Serial(
+            os.ttyname(slave_fd),
+            **{**ivaldi.link.SERIAL_PARAMS, "timeout": 0.1}))
+        reciever = threading.Thread(
+            target=recieve_records,
+            args=(recieve_port, frame_parser, record_codec, records, results))
+        reciever.start()
+        start_time = time.monotonic()
+        bytes_sent = 0
+        for __ in range(records):
+            bytes_sent += len(ivaldi.link.send_data_packet(
+                send_port, frame_batcher=frame_batcher, **sensor_args))
+        final_frame = frame_batcher.flush()
+        send_port.write(final_frame)
+        bytes_sent += len(final_frame)
+        reciever.join()
+    os.close(master_fd)
+    os.close(slave_fd)
+
+    elapsed_s = results["end_time"] - start_time
+    print(f"Records: {records}, batch size: {batch_size}, "
+          f"compressed: {compress}")
+    print(f"Recieved {results['records_recieved']} records in "
+          f"{elapsed_s:.3f} s: {results['records_recieved'] / elapsed_s:.0f} "
+          f"records/s, {bytes_sent / elapsed_s / 1024:.1f} KiB/s, "
+          f"{bytes_sent / records:.1f} B/record")
+    print("Link stats: " + ", ".join(
+        f"{key}={value}" for key, value in frame_parser.stats.items()))
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip())
+    arg_parser.add_argument(
+        "--records", type=int, default=RECORDS_DEFAULT,
+        help="Number of records to send")
+    arg_parser.add_argument(
+        "--batch-size", type=int, default=ivaldi.link.BATCH_SIZE_DEFAULT,
+        help="Number of records to send per frame")
+    arg_parser.add_argument(
+        "--compress", action="store_true",
+        help="Send the records delta-compressed")
+    main(**vars(arg_parser.parse_args()))
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark the cost of one sampling tick, and memory growth over many.
+
+Runs the monitoring loop body against simulated sensors as fast as
+possible, without waiting for deadlines, and reports the percentiles of
+the time per tick and how much memory was allocated and kept.
+"""
+
+# Standard library imports
+import argparse
+import contextlib
+import os
+import tempfile
+import time
+import tracemalloc
+
+# Local imports
+import ivaldi.monitor
+import ivaldi.output
+import ivaldi.schema
+import ivaldi.stats
+
+
+TICKS_DEFAULT = 10000
+WARMUP_TICKS = 100
+
+
+def run_ticks(sensor_args, ticks):
+    """Run a number of ticks, returning a histogram of their durations."""
+    histogram = ivaldi.stats.LatencyHistogram()
+    for __ in range(ticks):
+        start_time = time.perf_counter()
+        ivaldi.monitor.get_monitoring_data(**sensor_args)
+        histogram.record(time.perf_counter() - start_time)
+    return histogram
+
+
+def main(ticks=TICKS_DEFAULT, output_format=None, parallel=False):
+    """Set up simulated sensors, run the benchmark and print the results."""
+    with contextlib.ExitStack() as stack:
+        sensor_args = ivaldi.monitor.setup_sensors(
+            pin_rain=0, pin_wind=1, channel_wind=0, channel_soil=1,
+            simulate=True, parallel=parallel, exit_stack=stack)
+        for key in ["period_s", "overrun_policy"]:
+            sensor_args.pop(key)
+        sensor_args["log"] = True
+        if output_format is not None:
+            temp_dir = stack.enter_context(tempfile.TemporaryDirectory())
+            sensor_args["output_sink"] = stack.enter_context(
+                ivaldi.output.SINK_TYPES[output_format](
+                    f"{temp_dir}/bench.{output_format}",
+                    fieldnames=ivaldi.schema.RECORD_SCHEMA.fieldnames))
+        null_file = stack.enter_context(open(os.devnull, mode="w"))
+        stack.enter_context(contextlib.redirect_stdout(null_file))
+
+        run_ticks(sensor_args, WARMUP_TICKS)
+        tracemalloc.start()
+        memory_start, __ = tracemalloc.get_traced_memory()
+        histogram = run_ticks(sensor_args, ticks)
+        memory_end, memory_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    print(f"Ticks: {histogram.count}, output: {output_format}, "
+          f"parallel: {parallel}")
+    print("Time per tick: " + " ".join(
+        f"p{percent}={histogram.percentile(percent) * 1e6:.1f}"
+        for percent in ivaldi.stats.PERCENTILES)
+        + f" max={histogram.maximum_s * 1e6:.1f} "
+        f"mean={histogram.total_s / histogram.count * 1e6:.1f} us")
+    print(f"Memory growth: {(memory_end - memory_start) / 1024:.1f} KiB "
+          f"({(memory_end - memory_start) / ticks:.1f} B/tick), "
+          f"peak {(memory_peak - memory_start) / 1024:.1f} KiB")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip())
+    arg_parser.add_argument(
+        "--ticks", type=int, default=TICKS_DEFAULT,
+        help="Number of ticks to run")
+    arg_parser.add_argument(
+        "--output-format", choices=list(ivaldi.output.SINK_TYPES),
+        help="Also write each record to a sink of this format")
+    arg_parser.add_argument(
+        "--parallel", action="store_true",
+        help="Read the sensors in parallel")
+    main(**vars(arg_parser.parse_args()))
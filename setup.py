@@ -45,6 +45,10 @@ setuptools.setup(
         "pyserial",
         "RPi.GPIO",
         ],
+    extras_require={
+        "analysis": ["numpy"],
+        "test": ["pytest"],
+        },
     entry_points={
         "console_scripts": [
             f"{PROJECT_NAME}={PROJECT_NAME}.__main__:main"]
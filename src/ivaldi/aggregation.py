@@ -0,0 +1,147 @@
+"""
+Aggregation of sensor samples over time into a single value.
+"""
+
+# Standard library imports
+import math
+
+
+def _finite(values):
+    """Get the values that are finite numbers, skipping failed readings."""
+    return [value for value in values if math.isfinite(value)]
+
+
+def aggregate_last(values):
+    """Aggregate a sequence of values to the last one."""
+    return values[-1] if values else float("nan")
+
+
+def aggregate_mean(values):
+    """Aggregate a sequence of values to their mean, ignoring NaNs."""
+    values = _finite(values)
+    if not values:
+        return float("nan")
+    return math.fsum(values) / len(values)
+
+
+def aggregate_circular_mean_deg(values):
+    """Aggregate a sequence of angles in degrees to their vector mean."""
+    values = _finite(values)
+    if not values:
+        return float("nan")
+    sin_sum = math.fsum(math.sin(math.radians(value)) for value in values)
+    cos_sum = math.fsum(math.cos(math.radians(value)) for value in values)
+    return math.degrees(math.atan2(sin_sum, cos_sum)) % 360
+
+
+def aggregate_sum(values):
+    """Aggregate a sequence of values to their sum, ignoring NaNs."""
+    return math.fsum(_finite(values))
+
+
+def aggregate_max(values):
+    """Aggregate a sequence of values to their maximum, ignoring NaNs."""
+    return max(_finite(values), default=float("nan"))
+
+
+AGGREGATIONS = {
+    "last": aggregate_last,
+    "mean": aggregate_mean,
+    "circular_mean_deg": aggregate_circular_mean_deg,
+    "sum": aggregate_sum,
+    "max": aggregate_max,
+    }
+
+
+class StreamingAggregator:
+    """
+    Aggregate values added a chunk at a time, keeping only running totals.
+
+    Gives the same result as the function of the same name in
+    ``AGGREGATIONS`` over all the values added since the last reset, but
+    in constant memory however many are added. Each chunk is reduced with
+    builtins over the whole sequence at once, rather than value by value.
+
+    Parameters
+    ----------
+    method : str
+        The aggregation to apply, one of the keys of ``AGGREGATIONS``.
+
+    """
+
+    def __init__(self, method):
+        """See class docstring for full details."""
+        if method not in AGGREGATIONS:
+            raise ValueError(
+                f"Aggregation must be one of {set(AGGREGATIONS)}, "
+                f"not {method!r}")
+        self.method = method
+        self.reset()
+
+    def reset(self):
+        """
+        Clear the values added.
+
+        Returns
+        -------
+        None.
+
+        """
+        self._count = 0
+        self._total = 0
+        self._cos_total = 0
+        self._value = float("nan")
+
+    def add(self, values):
+        """
+        Add a chunk of values to the aggregate.
+
+        Parameters
+        ----------
+        values : sequence of float
+            The values to add.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.method == "last":
+            if values:
+                self._value = values[-1]
+            return
+        values = _finite(values)
+        if not values:
+            return
+        self._count += len(values)
+        if self.method == "max":
+            chunk_max = max(values)
+            if not self._value >= chunk_max:
+                self._value = chunk_max
+        elif self.method == "circular_mean_deg":
+            radians = [math.radians(value) for value in values]
+            self._total += math.fsum(map(math.sin, radians))
+            self._cos_total += math.fsum(map(math.cos, radians))
+        else:
+            self._total += math.fsum(values)
+
+    def result(self):
+        """
+        Get the aggregate of the values added.
+
+        Returns
+        -------
+        value : float
+            The aggregated value; NaN if no finite values were added,
+            except for a sum, which is 0.
+
+        """
+        if self.method == "sum":
+            return self._total
+        if self.method in {"last", "max"}:
+            return self._value
+        if not self._count:
+            return float("nan")
+        if self.method == "circular_mean_deg":
+            return math.degrees(math.atan2(self._total, self._cos_total)) % 360
+        return self._total / self._count
@@ -5,12 +5,39 @@ Command line interface for the Ivaldi IoT scientific sensor client.
 
 # Standard library imports
 import argparse
+import importlib
 import sys
 
 # Local imports
 import ivaldi
-import ivaldi.monitor
-import ivaldi.link
+
+
+INTERVAL_UNITS_S = {"min": 60, "s": 1, "h": 60 * 60, "d": 60 * 60 * 24}
+
+
+def _parse_sensor_period(sensor_period):
+    """Parse a ``SENSOR=PERIOD_S`` argument into a (sensor, period) pair."""
+    sensor_name, __, period_s = sensor_period.partition("=")
+    try:
+        return sensor_name.strip(), float(period_s)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"Expected SENSOR=PERIOD_S, got {sensor_period!r}") from None
+
+
+def _parse_interval(interval):
+    """Parse an interval, in s or with a unit (e.g. ``10min``), into s."""
+    interval = interval.strip()
+    for unit, unit_s in INTERVAL_UNITS_S.items():
+        if interval.endswith(unit):
+            interval_s = float(interval[:-len(unit)]) * unit_s
+            break
+    else:
+        interval_s = float(interval)
+    if interval_s <= 0:
+        raise argparse.ArgumentTypeError(
+            f"Interval must be positive, not {interval!r}")
+    return interval_s
 
 
 def generate_arg_parser():
@@ -35,17 +62,69 @@ def generate_arg_parser():
     parser_monitor = subparsers.add_parser(
         "monitor", help="Monitor the sensor status and print to the terminal",
         argument_default=argparse.SUPPRESS)
-    parser_monitor.set_defaults(func=ivaldi.monitor.start_monitoring)
+    parser_monitor.set_defaults(func="ivaldi.monitor.start_monitoring")
 
     parser_send = subparsers.add_parser(
         "send", help="Monitor the connected sensor and send the data via UART",
         argument_default=argparse.SUPPRESS)
-    parser_send.set_defaults(func=ivaldi.link.send_monitoring_data)
+    parser_send.set_defaults(func="ivaldi.link.send_monitoring_data")
 
     parser_recieve = subparsers.add_parser(
         "recieve", help="Recieve and print the IoT sensor data via UART",
         argument_default=argparse.SUPPRESS)
-    parser_recieve.set_defaults(func=ivaldi.link.recieve_monitoring_data)
+    parser_recieve.set_defaults(func="ivaldi.link.recieve_monitoring_data")
+
+    parser_recieve_multi = subparsers.add_parser(
+        "recieve-multi",
+        help="Recieve and print data from several stations via UART",
+        argument_default=argparse.SUPPRESS)
+    parser_recieve_multi.set_defaults(
+        func="ivaldi.link.recieve_multiple_stations")
+    parser_recieve_multi.add_argument(
+        "serial_devices", nargs="+", metavar="[ID=]SERIAL_DEVICE",
+        help=("UART devices to read, optionally prefixed by the station ID "
+              "(e.g. 'north=/dev/ttyUSB0'); default ID is the device name"))
+
+    parser_replay = subparsers.add_parser(
+        "replay",
+        help="Replay a recorded log through the output and link pipeline",
+        argument_default=argparse.SUPPRESS)
+    parser_replay.set_defaults(func="ivaldi.replay.replay_log")
+    parser_replay.add_argument(
+        "input_path",
+        help="CSV or binary log to replay, optionally gzip or lzma compressed")
+    parser_replay.add_argument(
+        "--speed", type=float,
+        help=("How many times faster than real time to replay "
+              "(default 1; 0 for as fast as possible)"))
+    parser_replay.add_argument(
+        "--serial-device",
+        help="The UART device to send the replayed data to, if any")
+
+    parser_aggregate = subparsers.add_parser(
+        "aggregate",
+        help="Resample recorded logs to fixed intervals of elapsed time",
+        argument_default=argparse.SUPPRESS)
+    parser_aggregate.set_defaults(func="ivaldi.resample.aggregate_logs")
+    parser_aggregate.add_argument(
+        "input_paths", nargs="+", metavar="INPUT_PATH",
+        help=("CSV or binary logs to resample, in order, optionally gzip or "
+              "lzma compressed"))
+    parser_aggregate.add_argument(
+        "--interval", type=_parse_interval, dest="interval_s",
+        metavar="INTERVAL",
+        help=("Interval of elapsed time (time_elapsed_s, not calendar "
+              "time) to resample to, in s or with a unit of s, min, h or d "
+              "(e.g. '10min'; default 1h)"))
+    parser_aggregate.add_argument(
+        "--output-path",
+        help="File to append the resampled data to, instead of printing")
+    parser_aggregate.add_argument(
+        "--output-format", choices=["csv", "binary"],
+        help="Format to write the output file in (default CSV)")
+    parser_aggregate.add_argument(
+        "--chunk-rows", type=int,
+        help="Number of rows to read and resample at a time")
 
     for parser in [parser_monitor, parser_send]:
         parser.add_argument(
@@ -62,19 +141,119 @@ def generate_arg_parser():
             help="ADC channel (0-3) to use for the soil moisture sensor")
         parser.add_argument(
             "--period-s", type=float, help="Update period, in s")
+        parser.add_argument(
+            "--sensor-period-s", action="append", type=_parse_sensor_period,
+            dest="sensor_periods_s", metavar="SENSOR=PERIOD_S",
+            help=("Read a sensor at its own period, in s (e.g. "
+                  "'winddir=0.25'); can be repeated. Sensors: raingauge, "
+                  "windspeed, winddir, soiltemperature, soilmoisture, "
+                  "pressure, humidity"))
+        parser.add_argument(
+            "--no-aggregate-samples", action="store_false",
+            dest="aggregate_samples",
+            help=("With --sensor-period-s, output the latest sample of each "
+                  "variable instead of the mean"))
+        parser.add_argument(
+            "--overrun-policy", choices=["skip", "catch_up", "coalesce"],
+            help=("When an update overruns the next, skip to the next on "
+                  "schedule (default), catch up on all missed, or run one "
+                  "for all"))
+        parser.add_argument(
+            "--simulate", action="store_true",
+            help="Use simulated sensors instead of the real hardware")
+        parser.add_argument(
+            "--metrics-port", type=int,
+            help="Serve live metrics for Prometheus over HTTP on this port")
+        parser.add_argument(
+            "--metrics-host",
+            help="Address to serve the metrics on (default 127.0.0.1)")
+        parser.add_argument(
+            "--parallel", action="store_true",
+            help="Read the sensors in parallel rather than one at a time")
+        parser.add_argument(
+            "--onewire-poll-period-s", type=float,
+            help=("Read the 1-wire sensor in the background at this period, "
+                  "in s (0 for as fast as it can convert)"))
+        parser.add_argument(
+            "--adc-data-rate", type=int,
+            help="ADC conversion rate, in samples/s (8-860)")
+        parser.add_argument(
+            "--adc-continuous", action="store_true",
+            help="Run the ADC in continuous-conversion mode")
+        parser.add_argument(
+            "--adc-oversample", type=int,
+            help="Number of ADC samples to take per channel per update")
+        parser.add_argument(
+            "--adc-reduction", choices=["mean", "median", "trimmed_mean"],
+            help="How to reduce the oversampled ADC readings to one value")
+
+    for parser in [parser_monitor, parser_send, parser_replay]:
+        parser.add_argument(
+            "--stats", action="store_true",
+            help=("Periodically report percentiles of sensor read times, "
+                  "loop jitter and output time"))
+        parser.add_argument(
+            "--stats-interval-s", type=float,
+            help="How often to report the stats, in s (default 60)")
+        parser.add_argument(
+            "--stats-path",
+            help="File to append the stats reports to, instead of printing")
 
-    for parser in [parser_monitor, parser_recieve]:
+    for parser in [parser_monitor, parser_recieve, parser_recieve_multi,
+                   parser_replay]:
         parser.add_argument(
-            "--output-path", help="CSV file to output to, none if not passed")
+            "--output-path",
+            help=("File to output to, none if not passed; for recieve-multi, "
+                  "'{station}' in it is replaced by each station ID"))
         parser.add_argument(
             "--log", action="store_true",
             help="Print every update to a new line")
+        parser.add_argument(
+            "--output-format", choices=["csv", "binary"],
+            help="Format to write the output file in (default CSV)")
+        parser.add_argument(
+            "--flush-rows", type=int,
+            help="Write the output file to disk every this many rows")
+        parser.add_argument(
+            "--flush-interval-s", type=float,
+            help="Write the output file to disk at least this often, in s")
+        parser.add_argument(
+            "--rotate-bytes", type=int,
+            help="Start a new output file once it reaches this size, in bytes")
+        parser.add_argument(
+            "--rotate-period", choices=["hour", "day", "month"],
+            help="Start a new output file every calendar hour, day or month")
+        parser.add_argument(
+            "--compression", choices=["gzip", "lzma"],
+            help="Compress rotated output files in the background")
 
     for parser in [parser_send, parser_recieve]:
         parser.add_argument(
             "--serial-device",
             help="The UART device to use (e.g. '/dev/ttyAMA0')")
 
+    parser_recieve.add_argument(
+        "--threaded", action="store_true",
+        help="Read the serial port in its own thread, queuing the data")
+    parser_recieve.add_argument(
+        "--queue-size", type=int,
+        help="Maximum number of chunks of data to queue when threaded")
+
+    for parser in [parser_send, parser_replay]:
+        parser.add_argument(
+            "--batch-size", type=int,
+            help="Number of samples to send together in each frame")
+        parser.add_argument(
+            "--batch-interval-s", type=float,
+            help=("Send a partial batch once its first sample is this old, "
+                  "in s"))
+        parser.add_argument(
+            "--compress", action="store_true",
+            help="Send samples delta-compressed at their display precision")
+        parser.add_argument(
+            "--keyframe-interval", type=int,
+            help="When compressing, send a full sample every this many frames")
+
     return parser_main
 
 
@@ -94,8 +273,10 @@ def main():
         print(f"Ivaldi version {ivaldi.__version__}")
         sys.exit()
 
-    func_to_dispatch = parsed_args.func
+    # Commands are imported only once chosen, so each loads only its needs
+    module_name, func_name = parsed_args.func.rsplit(".", 1)
     del parsed_args.func
+    func_to_dispatch = getattr(importlib.import_module(module_name), func_name)
     func_to_dispatch(**vars(parsed_args))
 
 
@@ -0,0 +1,292 @@
+"""
+Encoding of sensor data records into frame payloads, with compression.
+"""
+
+# Standard library imports
+import re
+import struct
+
+# Local imports
+import ivaldi.framing
+
+
+KEYFRAME_INTERVAL_DEFAULT = 10
+# Quantized stand-in for non-finite values, which can't be rounded
+NAN_QUANTIZED = -(2 ** 53)
+# Largest quantized magnitude sent, so deltas fit in a 64-bit zigzag varint
+QUANTIZED_MAXIMUM = 2 ** 61
+PRECISION_PATTERN = re.compile(r"\{:\.(\d+)f\}")
+VARINT_SIZE_MAXIMUM = 10
+
+
+def get_precisions(variables):
+    """
+    Get the number of decimal places each variable is displayed with.
+
+    Parameters
+    ----------
+    variables : dict of str: str
+        The format string of each variable, e.g. ``ivaldi.schema.VARIABLES``.
+
+    Returns
+    -------
+    precisions : list of int
+        The number of decimal places of each variable, 0 if not fixed-point.
+
+    """
+    precisions = []
+    for format_str in variables.values():
+        precision_match = PRECISION_PATTERN.search(format_str)
+        precisions.append(
+            int(precision_match.group(1)) if precision_match else 0)
+    return precisions
+
+
+def encode_varint(value, output):
+    """Append a signed integer to a bytearray as a zigzag varint."""
+    value = (value << 1) ^ (value >> 63)
+    while value >= 0x80:
+        output.append((value & 0x7F) | 0x80)
+        value >>= 7
+    output.append(value)
+
+
+def decode_varint(data, position):
+    """Read a zigzag varint from bytes, returning it and the next position."""
+    value = 0
+    shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            break
+        shift += 7
+        if shift >= VARINT_SIZE_MAXIMUM * 7:
+            raise ValueError("Varint too long")
+    return (value >> 1) ^ -(value & 1), position
+
+
+class RecordCodec:
+    """
+    Encode batches of records into frame payloads, and decode them back.
+
+    Plain records are packed as structs. Compressed records are quantized to
+    each variable's display precision, delta-encoded against the previous
+    record and packed as zigzag varints, so slowly changing values take
+    one byte or less. Every ``keyframe_interval`` frames, the first record
+    is sent in full, so a reciever can resume after a lost frame.
+    Non-finite values, and those too large to quantize at their precision,
+    are sent as NaN. Both kinds of frame can be decoded
+    regardless of how the codec encodes.
+
+    Parameters
+    ----------
+    data_format : str
+        The struct format of a plain record.
+    precisions : list of int
+        The number of decimal places to keep of each value when compressed.
+    compress : bool, optional
+        Whether to encode records compressed. The default is False.
+    keyframe_interval : int, optional
+        Send a full record at the start of every this many compressed
+        frames. The default is 10.
+
+    Attributes
+    ----------
+    frames_undecodable : int
+        The number of frames that could not be decoded, because they were
+        malformed or, if compressed, the frame before them was lost.
+
+    """
+
+    def __init__(self, data_format, precisions, compress=False,
+                 keyframe_interval=KEYFRAME_INTERVAL_DEFAULT):
+        """See class docstring for full details."""
+        self.record_struct = struct.Struct(data_format)
+        self._payload_buffer = bytearray(
+            ivaldi.framing.PAYLOAD_SIZE_MAXIMUM)
+        self._payload_view = memoryview(self._payload_buffer)
+        self.scales = [10 ** precision for precision in precisions]
+        self.compress = compress
+        self.keyframe_interval = keyframe_interval
+        self.frames_undecodable = 0
+        self._frames_since_keyframe = None
+        self._encoder_values = None
+        self._decoder_values = None
+        self._decoder_sequence = None
+
+    @property
+    def record_size_maximum(self):
+        """The maximum encoded size of one record, in bytes."""
+        if self.compress:
+            return len(self.scales) * VARINT_SIZE_MAXIMUM
+        return self.record_struct.size
+
+    def _quantize(self, record):
+        """Round each value of a record to an integer at its precision."""
+        quantized = []
+        for value, scale in zip(record, self.scales):
+            try:
+                quantized_value = round(value * scale)
+            except (OverflowError, ValueError):  # Infinite or NaN
+                quantized_value = NAN_QUANTIZED
+            if abs(quantized_value) > QUANTIZED_MAXIMUM:
+                quantized_value = NAN_QUANTIZED
+            quantized.append(quantized_value)
+        return quantized
+
+    def _dequantize(self, quantized):
+        """Convert quantized integers back to floats at their precision."""
+        return tuple(
+            float("nan") if value == NAN_QUANTIZED else value / scale
+            for value, scale in zip(quantized, self.scales))
+
+    def encode(self, records):
+        """
+        Encode a batch of records into the payload of one frame.
+
+        Parameters
+        ----------
+        records : list of tuple
+            The values of each record, in order.
+
+        Returns
+        -------
+        frame_type : int
+            The type of frame to send the payload in.
+        payload : bytes or memoryview
+            The encoded records. Uncompressed, this is a view of a buffer
+            reused by the codec, only valid until the next call.
+
+        """
+        if not self.compress:
+            frame_type = (ivaldi.framing.FRAME_TYPE_RECORD if len(records) == 1
+                          else ivaldi.framing.FRAME_TYPE_BATCH)
+            record_size = self.record_struct.size
+            payload_size = record_size * len(records)
+            if payload_size > len(self._payload_buffer):
+                raise ValueError(
+                    f"Batch of {len(records)} records exceeds maximum payload "
+                    f"of {len(self._payload_buffer)} bytes")
+            for index, record in enumerate(records):
+                self.record_struct.pack_into(
+                    self._payload_buffer, index * record_size, *record)
+            return frame_type, self._payload_view[:payload_size]
+
+        if (self._frames_since_keyframe is None
+                or self._frames_since_keyframe >= self.keyframe_interval):
+            frame_type = ivaldi.framing.FRAME_TYPE_KEYFRAME
+            previous = [0] * len(self.scales)
+            self._frames_since_keyframe = 0
+        else:
+            frame_type = ivaldi.framing.FRAME_TYPE_DELTA
+            previous = self._encoder_values
+        self._frames_since_keyframe += 1
+
+        payload = bytearray()
+        for record in records:
+            quantized = self._quantize(record)
+            for value, previous_value in zip(quantized, previous):
+                encode_varint(value - previous_value, payload)
+            previous = quantized
+        self._encoder_values = previous
+        return frame_type, bytes(payload)
+
+    def decode(self, frame_type, sequence, payload):
+        """
+        Decode the payload of a frame into its records.
+
+        Parameters
+        ----------
+        frame_type : int
+            The type of the frame.
+        sequence : int
+            The sequence number of the frame.
+        payload : bytes
+            The payload of the frame.
+
+        Returns
+        -------
+        records : list of tuple
+            The values of each record in the frame; empty if it can't be
+            decoded.
+
+        """
+        if frame_type in {ivaldi.framing.FRAME_TYPE_RECORD,
+                          ivaldi.framing.FRAME_TYPE_BATCH}:
+            if not payload or len(payload) % self.record_struct.size:
+                self.frames_undecodable += 1
+                return []
+            return list(self.record_struct.iter_unpack(payload))
+
+        previous_sequence = self._decoder_sequence
+        self._decoder_sequence = sequence
+        if frame_type == ivaldi.framing.FRAME_TYPE_KEYFRAME:
+            previous = [0] * len(self.scales)
+        elif (self._decoder_values is None or sequence != (
+                (previous_sequence + 1) % ivaldi.framing.SEQUENCE_MODULUS)):
+            self._decoder_values = None
+            self.frames_undecodable += 1
+            return []
+        else:
+            previous = self._decoder_values
+
+        records = []
+        position = 0
+        try:
+            while position < len(payload):
+                quantized = []
+                for previous_value in previous:
+                    delta, position = decode_varint(payload, position)
+                    quantized.append(previous_value + delta)
+                records.append(self._dequantize(quantized))
+                previous = quantized
+        except (IndexError, ValueError):
+            self._decoder_values = None
+            self.frames_undecodable += 1
+            return []
+        self._decoder_values = previous
+        return records
+
+    def decode_frames(self, frames):
+        """
+        Decode a run of frames into their records, in bulk where possible.
+
+        Consecutive plain frames are joined and unpacked in one pass, rather
+        than one by one, so a backlog of frames is decoded at memory speed.
+        Any plain frame not a whole number of records is dropped, and
+        counted as undecodable.
+
+        Parameters
+        ----------
+        frames : list of tuple of (int, int, bytes)
+            The frame type, sequence number and payload of each frame,
+            as returned by ``ivaldi.framing.FrameParser.feed``.
+
+        Returns
+        -------
+        records : list of tuple
+            The values of each record in the frames that could be decoded.
+
+        """
+        records = []
+        plain_payloads = []
+        record_size = self.record_struct.size
+        for frame_type, sequence, payload in frames:
+            if frame_type in {ivaldi.framing.FRAME_TYPE_RECORD,
+                              ivaldi.framing.FRAME_TYPE_BATCH}:
+                if payload and not len(payload) % record_size:
+                    plain_payloads.append(payload)
+                else:
+                    self.frames_undecodable += 1
+                continue
+            if plain_payloads:
+                records.extend(self.record_struct.iter_unpack(
+                    b"".join(plain_payloads)))
+                plain_payloads = []
+            records.extend(self.decode(frame_type, sequence, payload))
+        if plain_payloads:
+            records.extend(self.record_struct.iter_unpack(
+                b"".join(plain_payloads)))
+        return records
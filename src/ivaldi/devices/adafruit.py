@@ -2,21 +2,106 @@
 Adafruit I2C weather sensor devices.
 """
 
+# Standard library imports
+import threading
+
 # Third party imports
 import adafruit_ads1x15.ads1115
+import adafruit_ads1x15.ads1x15
 import adafruit_ads1x15.analog_in
 import adafruit_bmp280
 import adafruit_sht31d
 import board
 import busio
 
+# Local imports
+import ivaldi.devices.adc
+
+
+# ADS1115 constants
+ADS1115_DATA_RATE_MAX = 860
+
+_I2C_BUSES = {}
+_I2C_BUSES_LOCK = threading.Lock()
+
+
+class SharedI2C:
+    """
+    A thread-safe I2C bus, shared between all the devices connected to it.
+
+    Wraps a ``busio.I2C`` instance, passing through its methods, but
+    ``try_lock`` blocks until no other thread is using the bus, so each
+    transaction by the Adafruit drivers is serialized. The bus can also be
+    held across several transactions by using it as a context manager.
+
+    Parameters
+    ----------
+    scl : microcontroller.Pin
+        The clock pin of the bus.
+    sda : microcontroller.Pin
+        The data pin of the bus.
+
+    """
+
+    def __init__(self, scl, sda):
+        """See class docstring for full details."""
+        self._i2c = busio.I2C(scl, sda)
+        self._lock = threading.RLock()
+
+    def __getattr__(self, name):
+        return getattr(self._i2c, name)
+
+    def __enter__(self):
+        self._lock.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._lock.release()
+
+    def try_lock(self):
+        """Wait for other threads to finish with the bus, then lock it."""
+        self._lock.acquire()
+        if self._i2c.try_lock():
+            return True
+        self._lock.release()
+        return False
+
+    def unlock(self):
+        """Unlock the bus, letting other threads use it."""
+        self._i2c.unlock()
+        self._lock.release()
+
+
+def get_i2c_bus(scl=None, sda=None):
+    """
+    Get the shared I2C bus for the given pins, creating it if needed.
+
+    Parameters
+    ----------
+    scl : microcontroller.Pin or None, optional
+        The clock pin of the bus. The default is None, ``board.SCL``.
+    sda : microcontroller.Pin or None, optional
+        The data pin of the bus. The default is None, ``board.SDA``.
+
+    Returns
+    -------
+    i2c_bus : SharedI2C
+        The one bus object for those pins in this process.
+
+    """
+    scl = board.SCL if scl is None else scl
+    sda = board.SDA if sda is None else sda
+    with _I2C_BUSES_LOCK:
+        if (scl, sda) not in _I2C_BUSES:
+            _I2C_BUSES[(scl, sda)] = SharedI2C(scl, sda)
+        return _I2C_BUSES[(scl, sda)]
+
 
 class AdafruitADS1115(adafruit_ads1x15.ads1115.ADS1115):
     """A thin shim on top of the Adafruit ADS11115 ADC class."""
 
-    def __init__(self, channel=0):
-        i2c = busio.I2C(board.SCL, board.SDA)
-        super().__init__(i2c)
+    def __init__(self, channel=0, i2c=None):
+        super().__init__(get_i2c_bus() if i2c is None else i2c)
         self._adc = adafruit_ads1x15.analog_in.AnalogIn(self, channel)
 
     @property
@@ -24,6 +109,11 @@ class AdafruitADS1115(adafruit_ads1x15.ads1115.ADS1115):
         """The voltage reported by the ADC, in volts."""
         return self._adc.voltage
 
+    @property
+    def raw_samples(self):
+        """The raw value reported by the ADC, as a one-element tuple."""
+        return (self.raw_value,)
+
     @property
     def raw_value(self):
         """The raw value reported by the ADC, as a 16-bit integer."""
@@ -33,14 +123,74 @@ class AdafruitADS1115(adafruit_ads1x15.ads1115.ADS1115):
 class AdafruitBMP280(adafruit_bmp280.Adafruit_BMP280_I2C):
     """A thin shim on top of the Adafruit BMP280 pressure sensor class."""
 
-    def __init__(self):
-        i2c = busio.I2C(board.SCL, board.SDA)
-        super().__init__(i2c)
+    def __init__(self, i2c=None):
+        super().__init__(get_i2c_bus() if i2c is None else i2c)
 
 
 class AdafruitSHT31D(adafruit_sht31d.SHT31D):
     """A thin shim on top of the Adafruit SHT31 humidity sensor class."""
 
-    def __init__(self):
-        i2c = busio.I2C(board.SCL, board.SDA)
-        super().__init__(i2c)
+    def __init__(self, i2c=None):
+        super().__init__(get_i2c_bus() if i2c is None else i2c)
+
+
+class AdafruitADS1115Scanner(ivaldi.devices.adc.ADS1115Scanner,
+                             adafruit_ads1x15.ads1115.ADS1115):
+    """
+    An ADS1115 ADC that reads a list of channels together in one sweep.
+
+    Each sweep holds the I2C bus for all the channels, and consumes the
+    samples once each, as described in ``ivaldi.devices.adc.ADS1115Scanner``.
+
+    Parameters
+    ----------
+    channels : iterable of int, optional
+        The ADC channels (0-3) to read in each sweep. The default is all.
+    data_rate : int or None, optional
+        The conversion rate, in samples per second; one of ``rates``.
+        The default is None, the chip default of 128, or the maximum of 860
+        if oversampling.
+    continuous : bool, optional
+        Whether to run the ADC in continuous-conversion mode rather than
+        single-shot, which avoids waiting for a conversion to start when
+        reading the same channel repeatedly. The default is False.
+    oversample : int, optional
+        The number of samples to take of each channel per sweep.
+        The default is 1.
+    max_sweep_s : float or None, optional
+        If not None, takes fewer samples per channel as needed to keep the
+        estimated duration of a sweep under this, in s. The default is None.
+    i2c : busio.I2C or SharedI2C or None, optional
+        The I2C bus to use. The default is None, the shared default bus.
+
+    """
+
+    def __init__(self, channels=ivaldi.devices.adc.ADS1115_CHANNELS,
+                 data_rate=None, continuous=False, oversample=1,
+                 max_sweep_s=None, i2c=None):
+        """See class docstring for full details."""
+        self._i2c = get_i2c_bus() if i2c is None else i2c
+        if data_rate is None and oversample > 1:
+            data_rate = ADS1115_DATA_RATE_MAX
+        mode = (adafruit_ads1x15.ads1x15.Mode.CONTINUOUS if continuous
+                else adafruit_ads1x15.ads1x15.Mode.SINGLE)
+        adafruit_ads1x15.ads1115.ADS1115.__init__(
+            self, self._i2c, data_rate=data_rate, mode=mode)
+        ivaldi.devices.adc.ADS1115Scanner.__init__(
+            self, channels=channels, continuous=continuous,
+            oversample=oversample, max_sweep_s=max_sweep_s)
+
+    def _read_raw(self, channel):
+        """Read one raw conversion of a channel."""
+        return self.read(channel)
+
+    def _read_channels(self, sample_count):
+        """Read the samples of every channel, holding the bus for all."""
+        if not isinstance(self._i2c, SharedI2C):
+            return super()._read_channels(sample_count)
+        with self._i2c:
+            return super()._read_channels(sample_count)
+
+
+# Re-exported for compatibility; defined without the hardware libraries
+AdafruitADS1115Channel = ivaldi.devices.adc.AdafruitADS1115Channel
@@ -0,0 +1,194 @@
+"""
+Channels of an ADC, read through a scanner shared between them.
+
+Kept apart from the hardware drivers, so devices can be defined, and
+simulated, without the Adafruit libraries installed.
+"""
+
+# Standard library imports
+import threading
+import time
+
+
+# ADS1115 constants
+ADS1115_CHANNELS = (0, 1, 2, 3)
+ADS1115_FULL_SCALE_RAW = 32767
+ADS1115_PGA_RANGE_V = {
+    2 / 3: 6.144, 1: 4.096, 2: 2.048, 4: 1.024, 8: 0.512, 16: 0.256}
+
+
+class ADS1115Scanner:
+    """
+    Base class for an ADS1115 ADC that reads its channels in one sweep.
+
+    Each channel's samples are kept from the last sweep until they are read
+    once, and reading a channel that was already read triggers a new sweep,
+    so reading every channel once per tick costs only one sweep per tick.
+    Subclasses provide the conversions, by implementing ``_read_raw``, and
+    set ``data_rate`` and ``gain`` before calling ``__init__``.
+
+    Parameters
+    ----------
+    channels : iterable of int, optional
+        The ADC channels (0-3) to read in each sweep. The default is all.
+    continuous : bool, optional
+        Whether the ADC runs in continuous-conversion mode, so consecutive
+        samples of a channel are spaced one conversion apart.
+        The default is False.
+    oversample : int, optional
+        The number of samples to take of each channel per sweep.
+        The default is 1.
+    max_sweep_s : float or None, optional
+        If not None, takes fewer samples per channel as needed to keep the
+        estimated duration of a sweep under this, in s. The default is None.
+
+    """
+
+    def __init__(self, channels=ADS1115_CHANNELS, continuous=False,
+                 oversample=1, max_sweep_s=None):
+        """See class docstring for full details."""
+        self.channels = tuple(channels)
+        self.continuous = continuous
+        self.oversample = oversample
+        self.max_sweep_s = max_sweep_s
+        self.sample_cost_s = 1 / self.data_rate
+        self.sweep_time = None
+        self._channel_samples = {}
+        self._unread_channels = set()
+        self._sweep_lock = threading.Lock()
+
+    @property
+    def samples_per_channel(self):
+        """The number of samples per channel the next sweep will take."""
+        if (self.max_sweep_s is None or self.oversample <= 1
+                or self.sample_cost_s <= 0):
+            return self.oversample
+        samples_max = int(self.max_sweep_s / (
+            self.sample_cost_s * len(self.channels)))
+        return max(1, min(self.oversample, samples_max))
+
+    def _read_raw(self, channel):
+        """Read one raw conversion of a channel; implemented by subclasses."""
+        raise NotImplementedError
+
+    def _read_samples(self, channel, sample_count):
+        """Read a number of consecutive samples of a channel."""
+        read_raw = self._read_raw
+        if not self.continuous:
+            return tuple([read_raw(channel) for __ in range(sample_count)])
+
+        # In continuous mode, reads return the last conversion at once, so
+        # pace them a conversion apart, less the time each read took
+        conversion_s = 1 / self.data_rate
+        next_time = time.monotonic()
+        samples = []
+        for __ in range(sample_count):
+            wait_time_s = next_time - time.monotonic()
+            if wait_time_s > 0:
+                time.sleep(wait_time_s)
+            samples.append(read_raw(channel))
+            next_time += conversion_s
+        return tuple(samples)
+
+    def _read_channels(self, sample_count):
+        """Read the samples of every channel."""
+        return {channel: self._read_samples(channel, sample_count)
+                for channel in self.channels}
+
+    def _sweep(self):
+        """Read every channel, without locking the sweep."""
+        sample_count = self.samples_per_channel
+        start_time = time.monotonic()
+        channel_samples = self._read_channels(sample_count)
+        self.sweep_time = time.monotonic()
+        self.sample_cost_s = (self.sweep_time - start_time) / (
+            sample_count * len(self.channels))
+        self._channel_samples = channel_samples
+        self._unread_channels = set(self.channels)
+
+    def sweep(self):
+        """
+        Read every channel in one pass.
+
+        Returns
+        -------
+        channel_samples : dict of int: tuple of int
+            The raw samples of each channel, as 16-bit integers.
+
+        """
+        with self._sweep_lock:
+            self._sweep()
+            return dict(self._channel_samples)
+
+    def read_samples(self, channel):
+        """
+        Get the samples of a channel, sweeping all of them if already read.
+
+        Parameters
+        ----------
+        channel : int
+            The ADC channel (0-3) to read; must be one of ``channels``.
+
+        Returns
+        -------
+        raw_samples : tuple of int
+            The raw samples of the channel, as 16-bit integers.
+
+        """
+        with self._sweep_lock:
+            if channel not in self._unread_channels:
+                self._sweep()
+            self._unread_channels.discard(channel)
+            return self._channel_samples[channel]
+
+    def raw_to_voltage(self, raw_value):
+        """Convert a raw value to volts, given the current gain."""
+        return (raw_value * ADS1115_PGA_RANGE_V[self.gain]
+                / ADS1115_FULL_SCALE_RAW)
+
+
+class AdafruitADS1115Channel:
+    """
+    A single channel of an ADS1115 ADC, read through a shared scanner.
+
+    Parameters
+    ----------
+    channel : int, optional
+        The ADC channel (0-3) to read. The default is 0.
+    scanner : ADS1115Scanner or None, optional
+        The scanner to read the channel through. The default is None,
+        which creates an ``AdafruitADS1115Scanner`` reading only this
+        channel.
+
+    """
+
+    def __init__(self, channel=0, scanner=None):
+        """See class docstring for full details."""
+        if scanner is None:
+            # Only imported when needed, as it requires the hardware libraries
+            from ivaldi.devices import adafruit  # pylint: disable=C0415
+            scanner = adafruit.AdafruitADS1115Scanner(channels=(channel,))
+        elif channel not in scanner.channels:
+            raise ValueError(
+                f"Channel {channel} not in scanner channels "
+                f"{scanner.channels}")
+        self.channel = channel
+        self.scanner = scanner
+
+    @property
+    def voltage(self):
+        """The voltage reported by the ADC, in volts."""
+        return self.scanner.raw_to_voltage(self.raw_value)
+
+    @property
+    def raw_samples(self):
+        """The raw samples from the last sweep, as 16-bit integers."""
+        return self.scanner.read_samples(self.channel)
+
+    @property
+    def raw_value(self):
+        """The raw value reported by the ADC, averaged over the samples."""
+        raw_samples = self.raw_samples
+        if len(raw_samples) == 1:
+            return raw_samples[0]
+        return sum(raw_samples) / len(raw_samples)
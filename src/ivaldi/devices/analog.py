@@ -2,8 +2,16 @@
 Analog devices that need to be ADC converted.
 """
 
+# Standard library imports
+import math
+import statistics
+
 # Local imports
-import ivaldi.devices.adafruit
+import ivaldi.devices.adc
+
+# Oversampling constants
+REDUCTION_DEFAULT = "mean"
+TRIM_PROPORTION_DEFAULT = 0.25
 
 # Wind direction constants
 WIND_DEFAULT_OFFSET = 4.66
@@ -14,6 +22,36 @@ SOIL_DEFAULT_OFFSET = 0
 SOIL_DEFAULT_SCALE = 1
 
 
+def reduce_mean(samples):
+    """Reduce a sequence of samples to their mean."""
+    if len(samples) == 1:
+        return samples[0]
+    # Raw samples are integers, so the builtin sum is exact, and faster
+    if isinstance(samples[0], int):
+        return sum(samples) / len(samples)
+    return math.fsum(samples) / len(samples)
+
+
+def reduce_median(samples):
+    """Reduce a sequence of samples to their median."""
+    return statistics.median(samples)
+
+
+def reduce_trimmed_mean(samples, proportion=TRIM_PROPORTION_DEFAULT):
+    """Reduce samples to their mean, excluding a proportion at each end."""
+    trim_count = int(len(samples) * proportion)
+    if not trim_count:
+        return reduce_mean(samples)
+    return reduce_mean(sorted(samples)[trim_count:-trim_count])
+
+
+REDUCTIONS = {
+    "mean": reduce_mean,
+    "median": reduce_median,
+    "trimmed_mean": reduce_trimmed_mean,
+    }
+
+
 class AnalogMeasurementMixin:
     """
     Class for an analog measurement sensor device.
@@ -24,23 +62,43 @@ class AnalogMeasurementMixin:
         The value to scale the output by. The default is 1.
     offset : numeric, optional
         The value to offset the output by. The default is 0.
+    reduction : str or callable, optional
+        How to reduce multiple samples per reading to one value; either
+        a function taking a sequence of samples or the name of one of
+        ``REDUCTIONS``: "mean", "median" or "trimmed_mean".
+        The default is "mean".
 
     """
 
-    def __init__(self, scale=1, offset=0, **adc_args):
+    def __init__(self, scale=1, offset=0, reduction=REDUCTION_DEFAULT,
+                 **adc_args):
         """See class docstring for full details."""
         super().__init__(**adc_args)
         self.scale = scale
         self.offset = offset
+        self.reduction = reduction
+
+    @property
+    def reduction(self):
+        """The function used to reduce multiple samples to one value."""
+        return self._reduction
+
+    @reduction.setter
+    def reduction(self, reduction):
+        self._reduction = REDUCTIONS.get(reduction, reduction)
+        if not callable(self._reduction):
+            raise ValueError(
+                f"Reduction must be callable or one of {set(REDUCTIONS)}, "
+                f"not {reduction!r}")
 
     @property
     def value(self):
         """The value of the quantity measured, in physical units."""
-        return self.raw_value * self.scale + self.offset
+        return self.reduction(self.raw_samples) * self.scale + self.offset
 
 
 class AnemometerDirection(AnalogMeasurementMixin,
-                          ivaldi.devices.adafruit.AdafruitADS1115):
+                          ivaldi.devices.adc.AdafruitADS1115Channel):
     """
     Class for an analog wind direction sensor.
 
@@ -64,7 +122,7 @@ class AnemometerDirection(AnalogMeasurementMixin,
 
 
 class SoilMoisture(AnalogMeasurementMixin,
-                   ivaldi.devices.adafruit.AdafruitADS1115):
+                   ivaldi.devices.adc.AdafruitADS1115Channel):
     """
     Class for an analog soil moisture sensor.
 
@@ -3,24 +3,228 @@ Measure a standard tipping bucket rain gauge in real time.
 """
 
 # Standard library imports
+import array
+import bisect
+import threading
 import time
 
-# Third party imports
-import gpiozero
-
 
 # General constants
 CONVERSION_FACTOR = 1
 PRECISION_DEFAULT = 6
+RETENTION_S_DEFAULT = 60 * 10
 S_IN_HR = 3600
 
+# Timestamp buffer constants
+COMPACT_SIZE_MINIMUM = 1024
+
 # Rain gauge constants
 RAIN_MM_PER_COUNT = 0.2
 RAIN_AVERAGE_PERIOD_S = 60 * 5
+RAIN_WINDOWS_S = (RAIN_AVERAGE_PERIOD_S, S_IN_HR, S_IN_HR * 24)
 
 # Anemometer speed constants
 WIND_M_PER_COUNT = 1.00584
 WIND_AVERAGE_PERIOD_S = 3
+WIND_WINDOWS_S = (WIND_AVERAGE_PERIOD_S, 60 * 10)
+
+
+class TimestampBuffer:
+    """
+    A compact buffer of increasing timestamps, bounded by their maximum age.
+
+    Timestamps are stored as C doubles in an array, and those older than
+    the retention period are dropped as new ones are added. Since the
+    timestamps are sorted, window queries are answered by binary search.
+
+    Parameters
+    ----------
+    retention_s : float, optional
+        The maximum age of the timestamps to retain, in s,
+        relative to the most recent one added. The default is 10 min.
+
+    """
+
+    def __init__(self, retention_s=RETENTION_S_DEFAULT):
+        """See class docstring for full details."""
+        self.retention_s = retention_s
+        self._times = array.array("d")
+        self._start = 0
+        self._offset = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._times) - self._start
+
+    @property
+    def end_index(self):
+        """The absolute index one past the most recent timestamp."""
+        return len(self._times) + self._offset
+
+    def _prune(self, cutoff_time):
+        """Drop timestamps at or before the cutoff, compacting if needed."""
+        while (self._start < len(self._times)
+               and self._times[self._start] <= cutoff_time):
+            self._start += 1
+        # Only shift the array once at least half of it is stale,
+        # so the cost of compaction is amortized over the appends
+        if (self._start >= COMPACT_SIZE_MINIMUM
+                and self._start * 2 >= len(self._times)):
+            del self._times[:self._start]
+            self._offset += self._start
+            self._start = 0
+
+    def append(self, timestamp):
+        """
+        Add a timestamp, dropping any older than the retention period.
+
+        Parameters
+        ----------
+        timestamp : float
+            The timestamp to add, which must not be before the previous one.
+
+        Returns
+        -------
+        None.
+
+        """
+        with self._lock:
+            self._times.append(timestamp)
+            self._prune(timestamp - self.retention_s)
+
+    def count_after(self, cutoff_time):
+        """
+        Count the timestamps strictly after the given cutoff time.
+
+        Parameters
+        ----------
+        cutoff_time : float
+            The time after which to count timestamps.
+
+        Returns
+        -------
+        count : int
+            The number of retained timestamps after the cutoff.
+
+        """
+        with self._lock:
+            index = bisect.bisect_right(
+                self._times, cutoff_time, self._start)
+            return len(self._times) - index
+
+    def advance_index(self, index, cutoff_time):
+        """
+        Advance an index past all the timestamps at or before the cutoff.
+
+        Indices are absolute, counting every timestamp ever added, so they
+        stay valid as old timestamps are dropped and the array compacted.
+
+        Parameters
+        ----------
+        index : int
+            The absolute index to start from.
+        cutoff_time : float
+            The time to advance the index past.
+
+        Returns
+        -------
+        new_index : int
+            The absolute index of the first timestamp after the cutoff.
+        end_index : int
+            The absolute index one past the most recent timestamp.
+
+        """
+        with self._lock:
+            position = max(index - self._offset, self._start)
+            while (position < len(self._times)
+                   and self._times[position] <= cutoff_time):
+                position += 1
+            return position + self._offset, len(self._times) + self._offset
+
+    def clear(self):
+        """
+        Remove all the stored timestamps.
+
+        Returns
+        -------
+        None.
+
+        """
+        with self._lock:
+            self._offset += len(self._times)
+            self._times = array.array("d")
+            self._start = 0
+
+
+class RollingWindowCounter:
+    """
+    Running counts of timestamps within several trailing windows.
+
+    Each window keeps an index to its oldest timestamp, which only ever
+    moves forward, so updating every window costs amortized O(1) per
+    timestamp added, regardless of how long the windows are.
+
+    Parameters
+    ----------
+    timestamps : TimestampBuffer
+        The buffer of timestamps to count; its retention period is
+        extended to the longest window if shorter.
+    windows_s : iterable of float
+        The length of each trailing window to count over, in s.
+
+    """
+
+    def __init__(self, timestamps, windows_s):
+        """See class docstring for full details."""
+        self.timestamps = timestamps
+        self.windows_s = tuple(sorted(set(windows_s)))
+        if self.windows_s and self.windows_s[-1] > timestamps.retention_s:
+            timestamps.retention_s = self.windows_s[-1]
+        self._window_indices = {
+            window_s: timestamps.end_index for window_s in self.windows_s}
+
+    def __contains__(self, window_s):
+        return window_s in self._window_indices
+
+    def count(self, window_s, current_time):
+        """
+        Get the number of timestamps within one trailing window.
+
+        Parameters
+        ----------
+        window_s : float
+            The length of the window, which must be one of ``windows_s``.
+        current_time : float
+            The time the window ends at.
+
+        Returns
+        -------
+        count : int
+            The number of timestamps in the window.
+
+        """
+        window_index, end_index = self.timestamps.advance_index(
+            self._window_indices[window_s], current_time - window_s)
+        self._window_indices[window_s] = window_index
+        return end_index - window_index
+
+    def counts(self, current_time):
+        """
+        Get the number of timestamps within each trailing window.
+
+        Parameters
+        ----------
+        current_time : float
+            The time the windows end at.
+
+        Returns
+        -------
+        counts : dict of float: int
+            The number of timestamps in each window, keyed by its length.
+
+        """
+        return {window_s: self.count(window_s, current_time)
+                for window_s in self.windows_s}
 
 
 class CountDevice:
@@ -34,23 +238,43 @@ class CountDevice:
     conversion_factor : float, optional
         The conversion factor between the count and the processed output.
         The default is 1.
+    retention_s : float, optional
+        How long to retain count times for windowed averages, in s.
+        Extended automatically to the longest period requested.
+        The default is 10 min.
+    windows_s : iterable of float, optional
+        Averaging periods, in s, to keep running counts for, so averages
+        over them are updated incrementally. The default is none.
+    input_device : object or None, optional
+        The input to count the activations of, with a ``when_activated``
+        callback attribute, e.g. a simulated one. The default is None,
+        a ``gpiozero.DigitalInputDevice`` on the pin.
 
     """
 
-    def __init__(self, pin, conversion_factor=CONVERSION_FACTOR):
+    def __init__(self, pin, conversion_factor=CONVERSION_FACTOR,
+                 retention_s=RETENTION_S_DEFAULT, windows_s=(),
+                 input_device=None):
         """See class docstring for full details."""
         self.pin = pin
         self.conversion_factor = conversion_factor
         self.count = 0
-        self.count_times = []
-        self.device = gpiozero.DigitalInputDevice(
-            pin=self.pin, pull_up=True)
+        self.count_times = TimestampBuffer(retention_s=retention_s)
+        self.windows = RollingWindowCounter(self.count_times, windows_s)
+        self._count_since_start = 0
+        if input_device is None:
+            # Only imported when needed, as it requires the GPIO libraries
+            import gpiozero  # pylint: disable=C0415
+            input_device = gpiozero.DigitalInputDevice(
+                pin=self.pin, pull_up=True)
+        self.device = input_device
         self.device.when_activated = self._count
         self.start_time = time.monotonic()
 
     def _count(self):
         """Count one transition. Used as a callback."""
         self.count += 1
+        self._count_since_start += 1
         self.count_times.append(time.monotonic())
 
     @property
@@ -67,26 +291,60 @@ class CountDevice:
     def output_value_total(self, output_value_total):
         self.count = round(output_value_total / self.conversion_factor)
 
+    def _average(self, count, period_s, delta_t):
+        """Average a count over a period, limited to the time elapsed."""
+        return 0 if period_s <= 0 else round(
+            (count / min([period_s, delta_t])), PRECISION_DEFAULT)
+
     def output_value_average(self, period_s=None):
         """
         Get the output value, in counts per second, since the last reset.
 
+        Averages over one of the declared ``windows_s`` use their running
+        counts; any other period is computed from the stored count times.
+
+        Parameters
+        ----------
+        period_s : float or None, optional
+            The period to average over, in s. If None, the default,
+            averages over the time since the start time was last reset.
+
         Returns
         -------
         output_value_average : float
             Output value averaged over the time since the last reset.
 
         """
-        delta_t = time.monotonic() - self.start_time
+        current_time = time.monotonic()
+        delta_t = current_time - self.start_time
         if period_s is None:
             period_s = delta_t
-            output_value_period = self.output_value_total
-        output_value_period = sum([
-            1 for t in self.count_times if t > (time.monotonic() - period_s)])
-        output_value_average = 0 if period_s <= 0 else round(
-            (output_value_period / min([period_s, delta_t])),
-            PRECISION_DEFAULT)
-        return output_value_average
+            output_value_period = self._count_since_start
+        elif period_s in self.windows:
+            output_value_period = self.windows.count(period_s, current_time)
+        else:
+            if period_s > self.count_times.retention_s:
+                self.count_times.retention_s = period_s
+            output_value_period = self.count_times.count_after(
+                current_time - period_s)
+        return self._average(output_value_period, period_s, delta_t)
+
+    def output_value_averages(self):
+        """
+        Get the output value, in counts per second, over each window.
+
+        Returns
+        -------
+        output_value_averages : dict of float: float
+            Output value averaged over each of the declared ``windows_s``,
+            keyed by the window length in s.
+
+        """
+        current_time = time.monotonic()
+        delta_t = current_time - self.start_time
+        return {
+            window_s: self._average(count, window_s, delta_t)
+            for window_s, count in self.windows.counts(current_time).items()}
 
     def reset_count(self):
         """
@@ -108,6 +366,7 @@ class CountDevice:
         None.
 
         """
+        self._count_since_start = 0
         self.start_time = time.monotonic()
 
     def reset(self):
@@ -135,19 +394,31 @@ class TippingBucketRainGauge(CountDevice):
     conversion_factor : float, optional
         The conversion factor between the count and the processed output.
         The default is 0.2 mm/tip.
+    windows_s : iterable of float, optional
+        Averaging periods, in s, to keep running counts for.
+        The default is 5 min, 1 h and 24 h.
 
     """
 
-    def __init__(self, conversion_factor=RAIN_MM_PER_COUNT, **kwargs):
+    def __init__(self, conversion_factor=RAIN_MM_PER_COUNT,
+                 windows_s=RAIN_WINDOWS_S, **kwargs):
         """See class docstring for full details."""
-        super().__init__(conversion_factor=conversion_factor, **kwargs)
+        super().__init__(
+            conversion_factor=conversion_factor, windows_s=windows_s,
+            **kwargs)
 
-    def output_value_average(self, period_s=None):
+    def output_value_average(self, period_s=RAIN_AVERAGE_PERIOD_S):
         """
-        Get the output value, in mm per second, over the period.
+        Get the output value, in mm per hour, over the period.
 
         Specific to rain gauges, produces results in mm per hour, not per s.
 
+        Parameters
+        ----------
+        period_s : float or None, optional
+            The period to average over, in s. If None, averages over the
+            time since the start time was last reset. The default is 5 min.
+
         Returns
         -------
         output_value_average : float
@@ -156,6 +427,20 @@ class TippingBucketRainGauge(CountDevice):
         """
         return super().output_value_average(period_s=period_s) * S_IN_HR
 
+    def output_value_averages(self):
+        """
+        Get the output value, in mm per hour, over each window.
+
+        Returns
+        -------
+        output_value_averages : dict of float: float
+            Output value averaged over each of the declared ``windows_s``,
+            keyed by the window length in s.
+
+        """
+        return {window_s: output_value * S_IN_HR for window_s, output_value
+                in super().output_value_averages().items()}
+
 
 class AnemometerSpeed(CountDevice):
     """
@@ -169,12 +454,18 @@ class AnemometerSpeed(CountDevice):
     conversion_factor : float, optional
         The conversion factor between the count and the processed output.
         The default is 1.00584 m per count.
+    windows_s : iterable of float, optional
+        Averaging periods, in s, to keep running counts for.
+        The default is 3 s and 10 min.
 
     """
 
-    def __init__(self, conversion_factor=WIND_M_PER_COUNT, **kwargs):
+    def __init__(self, conversion_factor=WIND_M_PER_COUNT,
+                 windows_s=WIND_WINDOWS_S, **kwargs):
         """See class docstring for full details."""
-        super().__init__(conversion_factor=conversion_factor, **kwargs)
+        super().__init__(
+            conversion_factor=conversion_factor, windows_s=windows_s,
+            **kwargs)
 
     def output_value_average(self, period_s=WIND_AVERAGE_PERIOD_S):
         """
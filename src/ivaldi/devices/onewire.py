@@ -3,12 +3,17 @@ Sensor devices using the 1-wire communications protocol.
 """
 
 # Standard library imports
+import math
 from pathlib import Path
+import threading
+import time
 
 
 # General constants
 EQUALS_STRING = "="
 ONEWIRE_BASE_PATH = Path("/sys/bus/w1/devices")
+POLL_ERROR_WAIT_S = 1
+READ_RETRIES_DEFAULT = 2
 SLAVE_DIR = Path("w1_slave")
 YES_OFFSET_END = -3
 YES_STRING = "YES"
@@ -33,16 +38,43 @@ class OneWireDevice:
         The value to scale the raw output by. The default is 1.
     offset : numeric, optional
         The value to offset the raw output by. The default is 0.
+    read_retries : int, optional
+        How many times to retry a read that fails its CRC check.
+        The default is 2.
+    poll_period_s : float or None, optional
+        If not None, reads the sensor in a background thread at this period,
+        with ``value`` returning the most recent reading without blocking.
+        A period of 0 polls as fast as the device can convert.
+        The default is None, reading the sensor on every access to ``value``.
+    base_path : str or pathlib.Path, optional
+        The directory to search for the device in.
+        The default is ``/sys/bus/w1/devices``.
+
+    Attributes
+    ----------
+    read_errors : int
+        The number of background reads that failed with an error, rather
+        than a failed CRC check. The last good value is kept when they do.
 
     """
 
-    def __init__(self, family, index=0, scale=1, offset=0):
+    def __init__(self, family, index=0, scale=1, offset=0,
+                 read_retries=READ_RETRIES_DEFAULT, poll_period_s=None,
+                 base_path=ONEWIRE_BASE_PATH):
         """See class docstring for full information."""
         self._device_path = (
-            list(ONEWIRE_BASE_PATH.glob(str(family) + "*"))[index]
+            list(Path(base_path).glob(str(family) + "*"))[index]
             / SLAVE_DIR)
         self.scale = scale
         self.offset = offset
+        self.read_retries = read_retries
+        self.poll_period_s = poll_period_s
+        self._cached_reading = (float("nan"), None)
+        self.read_errors = 0
+        self._poll_stop_event = threading.Event()
+        self._poll_thread = None
+        if poll_period_s is not None:
+            self.start_polling()
 
     def _get_raw_data(self):
         """Get the raw data recieved from the device as a list of strings."""
@@ -62,10 +94,110 @@ class OneWireDevice:
         raw_value = float(raw_data_split[1].strip())
         return raw_value
 
+    def read_value(self):
+        """
+        Read the sensor, retrying if the data fails its CRC check.
+
+        Returns
+        -------
+        value : float
+            The value of the quantity measured, in physical units,
+            or NaN if every attempt to read it failed.
+
+        """
+        for __ in range(self.read_retries + 1):
+            raw_value = self.raw_value
+            if raw_value is not None:
+                return raw_value * self.scale + self.offset
+        return float("nan")
+
+    def _poll(self):
+        """Read the sensor until stopped, caching each valid value."""
+        last_error = None
+        while not self._poll_stop_event.is_set():
+            try:
+                value = self.read_value()
+            except (OSError, IndexError, ValueError) as error:
+                # Keep the last good value, and keep trying at the period
+                self.read_errors += 1
+                if last_error is None:
+                    print(f"\nError reading 1-wire device "
+                          f"{self._device_path.parent.name}, keeping last "
+                          f"value: {type(error).__name__}: {error}")
+                last_error = error
+                self._poll_stop_event.wait(
+                    max(self.poll_period_s, POLL_ERROR_WAIT_S))
+                continue
+            if last_error is not None:
+                print(f"\nReading 1-wire device "
+                      f"{self._device_path.parent.name} again after "
+                      f"{type(last_error).__name__}")
+                last_error = None
+            if not math.isnan(value):  # Skip failed reads
+                self._cached_reading = (value, time.monotonic())
+            self._poll_stop_event.wait(self.poll_period_s)
+
+    def start_polling(self):
+        """
+        Start reading the sensor in a background thread, if not already.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self._poll_thread is not None and self._poll_thread.is_alive():
+            return
+        if self.poll_period_s is None:
+            self.poll_period_s = 0
+        self._poll_stop_event.clear()
+        self._poll_thread = threading.Thread(
+            target=self._poll, name=f"onewire-{self._device_path.parent.name}",
+            daemon=True)
+        self._poll_thread.start()
+
+    def stop_polling(self, timeout=None):
+        """
+        Stop reading the sensor in the background, and wait for it to finish.
+
+        Parameters
+        ----------
+        timeout : float or None, optional
+            The maximum time to wait for the current read to finish, in s.
+            The default is None, waiting indefinitely.
+
+        Returns
+        -------
+        None.
+
+        """
+        self._poll_stop_event.set()
+        if self._poll_thread is not None:
+            self._poll_thread.join(timeout)
+        self._poll_thread = None
+
+    @property
+    def polling(self):
+        """Whether the sensor is being read in a background thread."""
+        return self._poll_thread is not None and self._poll_thread.is_alive()
+
+    @property
+    def value_age_s(self):
+        """The age of the most recent cached value, in s; inf if none."""
+        __, read_time = self._cached_reading
+        if read_time is None:
+            return float("inf")
+        return time.monotonic() - read_time
+
     @property
     def value(self):
         """The value of the quantity measured, in physical units."""
-        return self.raw_value * self.scale + self.offset
+        if self.polling:
+            return self._cached_reading[0]
+        value = self.read_value()
+        if not math.isnan(value):
+            self._cached_reading = (value, time.monotonic())
+        return value
 
 
 class MaximDS18B20(OneWireDevice):
@@ -0,0 +1,323 @@
+"""
+Simulated sensor hardware, for running and benchmarking without a Pi.
+"""
+
+# Standard library imports
+import math
+import os
+from pathlib import Path
+import random
+import tempfile
+import threading
+import time
+
+# Local imports
+import ivaldi.devices.adc
+
+
+# General constants
+SEED_DEFAULT = 0
+
+# Pulse generator constants
+RAIN_RATE_HZ_DEFAULT = 0.05
+WIND_RATE_HZ_DEFAULT = 5
+
+# ADC constants
+ADC_CHANNEL_MEANS_RAW_DEFAULT = {0: 12000, 1: 8000, 2: 16000, 3: 4000}
+ADC_DATA_RATE_DEFAULT = 128
+ADC_GAIN = 1
+ADC_NOISE_RAW = 50
+
+# I2C sensor constants
+ALTITUDE_M_PER_HPA = -8.3
+PRESSURE_HPA_DEFAULT = 1013.25
+RELATIVE_HUMIDITY_DEFAULT = 60
+TEMPERATURE_C_DEFAULT = 20
+WALK_STEP_FRACTION = 0.001
+
+# 1-wire constants
+ONEWIRE_FAMILY_DEFAULT = 28
+ONEWIRE_SERIAL_DEFAULT = "000000000001"
+ONEWIRE_UPDATE_PERIOD_S_DEFAULT = 1
+ONEWIRE_SLAVE_TEMPLATE = (
+    "72 01 4b 46 7f ff 0e 10 57 : crc=57 YES\n"
+    "72 01 4b 46 7f ff 0e 10 57 t={raw_value}\n")
+
+
+class SimulatedPulseInput:
+    """
+    A stand-in for a GPIO input, generating pulses at random intervals.
+
+    Pulses arrive as a Poisson process at the given mean rate, calling
+    ``when_activated`` from a background thread, like a real tipping bucket
+    or anemometer switch would through ``gpiozero``.
+
+    Parameters
+    ----------
+    rate_hz : float
+        The mean rate of pulses, in Hz. If 0, never pulses.
+    seed : int or None, optional
+        The seed for the random intervals. The default is 0.
+
+    """
+
+    def __init__(self, rate_hz, seed=SEED_DEFAULT):
+        """See class docstring for full details."""
+        self.rate_hz = rate_hz
+        self.when_activated = None
+        self._random = random.Random(seed)
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="simulated-pulses", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        """Generate pulses until closed."""
+        if self.rate_hz <= 0:
+            return
+        while not self._stop_event.wait(
+                self._random.expovariate(self.rate_hz)):
+            if self.when_activated is not None:
+                self.when_activated()
+
+    def close(self):
+        """
+        Stop generating pulses.
+
+        Returns
+        -------
+        None.
+
+        """
+        self._stop_event.set()
+
+
+class _RandomWalk:
+    """A value drifting randomly around a mean, per read."""
+
+    def __init__(self, mean, step, random_generator):
+        self.mean = mean
+        self.step = step
+        self.value = mean
+        self._random = random_generator
+
+    def __call__(self):
+        self.value += (self._random.gauss(0, self.step)
+                       - (self.value - self.mean) * WALK_STEP_FRACTION)
+        return self.value
+
+
+class SimulatedBMP280:
+    """
+    A stand-in for the BMP280 pressure sensor, with drifting readings.
+
+    Parameters
+    ----------
+    read_time_s : float, optional
+        How long each read blocks for, to emulate the bus. The default is 0.
+    seed : int or None, optional
+        The seed for the random drift. The default is 0.
+
+    """
+
+    def __init__(self, read_time_s=0, seed=SEED_DEFAULT):
+        """See class docstring for full details."""
+        random_generator = random.Random(seed)
+        self.read_time_s = read_time_s
+        self._temperature = _RandomWalk(
+            TEMPERATURE_C_DEFAULT, 0.01, random_generator)
+        self._pressure = _RandomWalk(
+            PRESSURE_HPA_DEFAULT, 0.01, random_generator)
+
+    def _read(self, walk):
+        if self.read_time_s:
+            time.sleep(self.read_time_s)
+        return walk()
+
+    @property
+    def temperature(self):
+        """The temperature, in degrees C."""
+        return self._read(self._temperature)
+
+    @property
+    def pressure(self):
+        """The pressure, in hPa."""
+        return self._read(self._pressure)
+
+    @property
+    def altitude(self):
+        """The altitude, in m, estimated from the pressure."""
+        return (self._read(self._pressure)
+                - PRESSURE_HPA_DEFAULT) * ALTITUDE_M_PER_HPA
+
+
+class SimulatedSHT31D:
+    """
+    A stand-in for the SHT31-D humidity sensor, with drifting readings.
+
+    Parameters
+    ----------
+    read_time_s : float, optional
+        How long each read blocks for, to emulate the bus. The default is 0.
+    seed : int or None, optional
+        The seed for the random drift. The default is 0.
+
+    """
+
+    def __init__(self, read_time_s=0, seed=SEED_DEFAULT):
+        """See class docstring for full details."""
+        random_generator = random.Random(seed)
+        self.read_time_s = read_time_s
+        self._temperature = _RandomWalk(
+            TEMPERATURE_C_DEFAULT, 0.01, random_generator)
+        self._relative_humidity = _RandomWalk(
+            RELATIVE_HUMIDITY_DEFAULT, 0.05, random_generator)
+
+    def _read(self, walk):
+        if self.read_time_s:
+            time.sleep(self.read_time_s)
+        return walk()
+
+    @property
+    def temperature(self):
+        """The temperature, in degrees C."""
+        return self._read(self._temperature)
+
+    @property
+    def relative_humidity(self):
+        """The relative humidity, in percent."""
+        return min(max(self._read(self._relative_humidity), 0), 100)
+
+
+class SimulatedADS1115Scanner(ivaldi.devices.adc.ADS1115Scanner):
+    """
+    A stand-in for ``AdafruitADS1115Scanner``, sampling noisy signals.
+
+    Shares the sweeping, consume-once and oversampling logic of the real
+    scanner, so ``AdafruitADS1115Channel`` and its subclasses can read
+    through it unchanged; only the conversions are simulated. Each channel
+    reads a slow sine around its mean, plus Gaussian noise.
+
+    Parameters
+    ----------
+    channels : iterable of int, optional
+        The ADC channels (0-3) to read in each sweep. The default is all.
+    data_rate : int or None, optional
+        The nominal conversion rate, in samples per second.
+        The default is None, 128.
+    continuous : bool, optional
+        Whether to pace consecutive samples of a channel one conversion
+        apart, as in continuous-conversion mode. The default is False.
+    oversample : int, optional
+        The number of samples to take of each channel per sweep.
+        The default is 1.
+    max_sweep_s : float or None, optional
+        If not None, takes fewer samples per channel as needed to keep the
+        duration of a sweep under this, in s. The default is None.
+    realtime : bool, optional
+        Whether to sleep for the conversion time of each single-shot
+        sample, like the real ADC. The default is False.
+    seed : int or None, optional
+        The seed for the random noise. The default is 0.
+
+    """
+
+    def __init__(self, channels=tuple(ADC_CHANNEL_MEANS_RAW_DEFAULT),
+                 data_rate=None, continuous=False, oversample=1,
+                 max_sweep_s=None, realtime=False, seed=SEED_DEFAULT):
+        """See class docstring for full details."""
+        self.data_rate = (
+            ADC_DATA_RATE_DEFAULT if data_rate is None else data_rate)
+        self.gain = ADC_GAIN
+        self.realtime = realtime
+        self._random = random.Random(seed)
+        super().__init__(
+            channels=channels, continuous=continuous, oversample=oversample,
+            max_sweep_s=max_sweep_s)
+
+    def _read_raw(self, channel):
+        """Take one simulated conversion of a channel."""
+        if self.realtime and not self.continuous:
+            time.sleep(1 / self.data_rate)
+        full_scale_raw = ivaldi.devices.adc.ADS1115_FULL_SCALE_RAW
+        mean = ADC_CHANNEL_MEANS_RAW_DEFAULT.get(channel, 0)
+        signal = mean * (1 + 0.1 * math.sin(time.monotonic() / (channel + 1)))
+        raw_value = round(signal + self._random.gauss(0, ADC_NOISE_RAW))
+        return min(max(raw_value, -full_scale_raw), full_scale_raw)
+
+
+class SimulatedOneWireTree:
+    """
+    A fake 1-wire sysfs device tree, with a temperature sensor in it.
+
+    Creates a temporary directory laid out like ``/sys/bus/w1/devices``,
+    with one device whose ``w1_slave`` file is rewritten with a drifting
+    temperature in the background, so ``OneWireDevice`` can read it via its
+    ``base_path``. The directory is removed once closed.
+
+    Parameters
+    ----------
+    family : int, optional
+        The device family ID. The default is 28, a DS18B20.
+    update_period_s : float, optional
+        How often to write a new reading, in s. The default is 1 s.
+    seed : int or None, optional
+        The seed for the random drift. The default is 0.
+
+    Attributes
+    ----------
+    path : pathlib.Path
+        The base path of the tree, to pass as ``base_path``.
+
+    """
+
+    def __init__(self, family=ONEWIRE_FAMILY_DEFAULT,
+                 update_period_s=ONEWIRE_UPDATE_PERIOD_S_DEFAULT,
+                 seed=SEED_DEFAULT):
+        """See class docstring for full details."""
+        self._temp_dir = tempfile.TemporaryDirectory(prefix="ivaldi-w1-")
+        self.path = Path(self._temp_dir.name)
+        self.update_period_s = update_period_s
+        self._device_dir = self.path / f"{family}-{ONEWIRE_SERIAL_DEFAULT}"
+        self._device_dir.mkdir()
+        self._temperature = _RandomWalk(
+            TEMPERATURE_C_DEFAULT, 0.01, random.Random(seed))
+        self._stop_event = threading.Event()
+        self._write_reading()
+        self._thread = threading.Thread(
+            target=self._run, name="simulated-onewire", daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _write_reading(self):
+        """Atomically replace the device file with a new reading."""
+        slave_path = self._device_dir / "w1_slave"
+        temp_path = slave_path.with_suffix(".tmp")
+        temp_path.write_text(
+            ONEWIRE_SLAVE_TEMPLATE.format(
+                raw_value=round(self._temperature() * 1000)),
+            encoding="utf-8")
+        os.replace(temp_path, slave_path)
+
+    def _run(self):
+        """Write new readings until closed."""
+        while not self._stop_event.wait(self.update_period_s):
+            self._write_reading()
+
+    def close(self):
+        """
+        Stop writing readings, and remove the tree.
+
+        Returns
+        -------
+        None.
+
+        """
+        self._stop_event.set()
+        self._thread.join()
+        self._temp_dir.cleanup()
@@ -0,0 +1,279 @@
+"""
+Framing of data packets sent over a serial link, with resynchronization.
+"""
+
+# Standard library imports
+import binascii
+import struct
+import time
+
+
+# Frame constants
+CRC_INITIAL = 0xFFFF
+CRC_STRUCT = struct.Struct("!H")
+HEADER_STRUCT = struct.Struct("!BHH")
+PAYLOAD_SIZE_MAXIMUM = 4096
+SEQUENCE_MODULUS = 2 ** 16
+SYNC_WORD = b"\xa5\x5a"
+
+# Frame types
+FRAME_TYPE_RECORD = 1
+FRAME_TYPE_BATCH = 2
+FRAME_TYPE_KEYFRAME = 3
+FRAME_TYPE_DELTA = 4
+FRAME_TYPES = {
+    FRAME_TYPE_RECORD, FRAME_TYPE_BATCH, FRAME_TYPE_KEYFRAME, FRAME_TYPE_DELTA}
+
+FRAME_OVERHEAD = len(SYNC_WORD) + HEADER_STRUCT.size + CRC_STRUCT.size
+
+
+class FrameEncoder:
+    """
+    Wrap payloads in frames, numbering them in sequence.
+
+    Each frame is a sync word, a header with the frame type, sequence number
+    and payload length, the payload itself, and a CRC-16 (CCITT) of the
+    header and payload, all in network byte order. Frames are assembled in
+    a preallocated buffer, rather than by concatenating their parts.
+
+    Parameters
+    ----------
+    sequence : int, optional
+        The sequence number of the first frame. The default is 0.
+
+    """
+
+    def __init__(self, sequence=0):
+        """See class docstring for full details."""
+        self.sequence = sequence % SEQUENCE_MODULUS
+        self._frame_buffer = bytearray(FRAME_OVERHEAD + PAYLOAD_SIZE_MAXIMUM)
+        self._frame_buffer[:len(SYNC_WORD)] = SYNC_WORD
+        self._frame_view = memoryview(self._frame_buffer)
+
+    def encode(self, payload, frame_type=FRAME_TYPE_RECORD):
+        """
+        Wrap a payload in the next frame in sequence.
+
+        Parameters
+        ----------
+        payload : bytes-like
+            The data to send in the frame.
+        frame_type : int, optional
+            The type of the frame, telling the reciever how to decode the
+            payload. The default is a single record.
+
+        Returns
+        -------
+        frame : bytes
+            The encoded frame, ready to send.
+
+        """
+        if len(payload) > PAYLOAD_SIZE_MAXIMUM:
+            raise ValueError(
+                f"Payload of {len(payload)} bytes exceeds maximum of "
+                f"{PAYLOAD_SIZE_MAXIMUM}")
+        header_end = len(SYNC_WORD) + HEADER_STRUCT.size
+        payload_end = header_end + len(payload)
+        HEADER_STRUCT.pack_into(self._frame_buffer, len(SYNC_WORD),
+                                frame_type, self.sequence, len(payload))
+        self._frame_buffer[header_end:payload_end] = payload
+        crc = binascii.crc_hqx(
+            self._frame_view[len(SYNC_WORD):payload_end], CRC_INITIAL)
+        CRC_STRUCT.pack_into(self._frame_buffer, payload_end, crc)
+        self.sequence = (self.sequence + 1) % SEQUENCE_MODULUS
+        return bytes(self._frame_view[:payload_end + CRC_STRUCT.size])
+
+
+class FrameBatcher:
+    """
+    Collect records into batch frames, to send fewer frames.
+
+    Records are added one at a time, and a frame with all the pending
+    records is returned once there are ``batch_size`` of them, or the oldest
+    is ``batch_interval_s`` old, trading latency for throughput.
+
+    Parameters
+    ----------
+    record_codec : ivaldi.codec.RecordCodec
+        The codec to encode each batch of records into a payload with.
+    frame_encoder : FrameEncoder or None, optional
+        The encoder to wrap the batches in frames with. The default is None,
+        creating a new one.
+    batch_size : int, optional
+        The number of records to send per frame. The default is 1,
+        sending each record as soon as it is added.
+    batch_interval_s : float or None, optional
+        If not None, sends the pending records once the oldest has waited
+        this long, in s, even if the batch is not full. The default is None.
+
+    """
+
+    def __init__(self, record_codec, frame_encoder=None, batch_size=1,
+                 batch_interval_s=None):
+        """See class docstring for full details."""
+        self.record_codec = record_codec
+        self.frame_encoder = (
+            FrameEncoder() if frame_encoder is None else frame_encoder)
+        self.batch_size = batch_size
+        self.batch_interval_s = batch_interval_s
+        self._records = []
+        self._first_record_time = None
+
+    @property
+    def records_pending(self):
+        """The number of records added but not yet sent in a frame."""
+        return len(self._records)
+
+    def add(self, record):
+        """
+        Add a record, returning a frame if the batch is complete.
+
+        Parameters
+        ----------
+        record : tuple
+            The values of the record to add, in order.
+
+        Returns
+        -------
+        frame : bytes
+            The frame of pending records to send, or empty if none is due.
+
+        """
+        if not self._records:
+            self._first_record_time = time.monotonic()
+        self._records.append(record)
+        if (len(self._records) >= self.batch_size
+                or (self.batch_interval_s is not None
+                    and (time.monotonic() - self._first_record_time)
+                    >= self.batch_interval_s)):
+            return self.flush()
+        return b""
+
+    def flush(self):
+        """
+        Wrap all pending records in a frame, even if the batch is not full.
+
+        Returns
+        -------
+        frame : bytes
+            The frame of pending records to send, or empty if there are none.
+
+        """
+        if not self._records:
+            return b""
+        frame_type, payload = self.record_codec.encode(self._records)
+        self._records.clear()
+        return self.frame_encoder.encode(payload, frame_type=frame_type)
+
+
+class FrameParser:
+    """
+    Extract frames from a stream of bytes, resynchronizing after errors.
+
+    Bytes are fed in as they arrive, in chunks of any size. The parser scans
+    for the sync word, and drops any frame with an invalid header or CRC,
+    resuming the scan one byte after its start, so it cannot lose alignment
+    for good. Frames missing from the sequence are counted as lost.
+
+    Attributes
+    ----------
+    frames_recieved : int
+        The number of valid frames extracted.
+    frames_bad : int
+        The number of frames dropped for an invalid header or CRC.
+    frames_lost : int
+        The number of frames missing from the sequence.
+    bytes_skipped : int
+        The number of bytes discarded while searching for a sync word.
+
+    """
+
+    def __init__(self):
+        """See class docstring for full details."""
+        self.frames_recieved = 0
+        self.frames_bad = 0
+        self.frames_lost = 0
+        self.bytes_skipped = 0
+        self._buffer = bytearray()
+        self._last_sequence = None
+
+    @property
+    def stats(self):
+        """The frame and byte counts of the parser, as a dict."""
+        return {
+            "frames_recieved": self.frames_recieved,
+            "frames_bad": self.frames_bad,
+            "frames_lost": self.frames_lost,
+            "bytes_skipped": self.bytes_skipped,
+            }
+
+    def _skip(self, byte_count):
+        """Discard bytes from the start of the buffer."""
+        self.bytes_skipped += byte_count
+        del self._buffer[:byte_count]
+
+    def feed(self, data):
+        """
+        Add recieved bytes, and extract any complete, valid frames.
+
+        Parameters
+        ----------
+        data : bytes
+            The bytes recieved.
+
+        Returns
+        -------
+        frames : list of tuple of (int, int, bytes)
+            The frame type, sequence number and payload of each frame.
+
+        """
+        self._buffer.extend(data)
+        buffer = self._buffer
+        frames = []
+        header_end = len(SYNC_WORD) + HEADER_STRUCT.size
+
+        while True:
+            sync_index = buffer.find(SYNC_WORD)
+            if sync_index < 0:
+                # Keep the last byte, in case it is the start of a sync word
+                self._skip(max(len(buffer) - len(SYNC_WORD) + 1, 0))
+                break
+            if sync_index:
+                self._skip(sync_index)
+            if len(buffer) < header_end:
+                break
+
+            frame_type, sequence, payload_size = HEADER_STRUCT.unpack_from(
+                buffer, len(SYNC_WORD))
+            if (frame_type not in FRAME_TYPES
+                    or payload_size > PAYLOAD_SIZE_MAXIMUM):
+                self.frames_bad += 1
+                self._skip(1)
+                continue
+            frame_end = header_end + payload_size + CRC_STRUCT.size
+            if len(buffer) < frame_end:
+                break
+
+            crc_expected = CRC_STRUCT.unpack_from(
+                buffer, header_end + payload_size)[0]
+            crc_actual = binascii.crc_hqx(
+                buffer[len(SYNC_WORD):header_end + payload_size], CRC_INITIAL)
+            if crc_actual != crc_expected:
+                self.frames_bad += 1
+                self._skip(1)
+                continue
+
+            if self._last_sequence is not None:
+                sequence_gap = (
+                    (sequence - self._last_sequence - 1) % SEQUENCE_MODULUS)
+                # Larger jumps are from the sender restarting, not losses
+                if sequence_gap < SEQUENCE_MODULUS // 2:
+                    self.frames_lost += sequence_gap
+            self._last_sequence = sequence
+            self.frames_recieved += 1
+            frames.append((
+                frame_type, sequence,
+                bytes(buffer[header_end:header_end + payload_size])))
+            del buffer[:frame_end]
+
+        return frames
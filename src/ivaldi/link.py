@@ -3,20 +3,31 @@ Send and recieve sensor data over a serial link.
 """
 
 # Standard library imports
-import struct
+import contextlib
+from pathlib import Path
+import queue
+import threading
+import time
 
 # Third party imports
 import serial
 
 # Local imports
-import ivaldi.devices.adafruit
-import ivaldi.devices.analog
-import ivaldi.devices.counter
+import ivaldi.codec
+import ivaldi.framing
 import ivaldi.monitor
+import ivaldi.output
+import ivaldi.schema
 import ivaldi.utils
 
 
-DATA_FORMAT = "!12fI"
+DATA_FORMAT = ivaldi.schema.RECORD_SCHEMA.data_format
+
+BATCH_SIZE_DEFAULT = 1
+QUEUE_GET_TIMEOUT_S = 0.5
+QUEUE_SIZE_DEFAULT = 1024
+STATION_FIELD = "station"
+STATION_SEPERATOR = "="
 
 PERIOD_S_DEFAULT = 1
 
@@ -29,50 +40,314 @@ SERIAL_PARAMS = {
     }
 
 
-def recieve_data_packet(serial_port, output_file=None, log=False):
+def create_record_codec(compress=False,
+                        keyframe_interval=(
+                            ivaldi.codec.KEYFRAME_INTERVAL_DEFAULT)):
     """
-    Recieve and print an individual data packet from a serial port.
+    Create a codec for the data records sent over the link.
 
     Parameters
     ----------
-    serial_port : serial.Serial
-        The serial port object to read from.
-    output_file : io.IOBase or None
-        File object to output the data to. If None, prints to the screen.
+    compress : bool, optional
+        Whether to send records delta-compressed at their display precision.
+        The default is False.
+    keyframe_interval : int, optional
+        When compressing, send a full record every this many frames.
+        The default is 10.
+
+    Returns
+    -------
+    record_codec : ivaldi.codec.RecordCodec
+        The codec for the records.
+
+    """
+    return ivaldi.codec.RecordCodec(
+        DATA_FORMAT, precisions=ivaldi.schema.RECORD_SCHEMA.precisions,
+        compress=compress, keyframe_interval=keyframe_interval)
+
+
+def create_frame_batcher(batch_size=BATCH_SIZE_DEFAULT, batch_interval_s=None,
+                         compress=False,
+                         keyframe_interval=(
+                             ivaldi.codec.KEYFRAME_INTERVAL_DEFAULT)):
+    """
+    Create a batcher to frame the data records to send over the link.
+
+    Parameters
+    ----------
+    batch_size : int, optional
+        The number of records to send together in each frame.
+        The default is 1.
+    batch_interval_s : float or None, optional
+        If not None, sends a partial batch once its first record has waited
+        this long, in s. The default is None.
+    compress : bool, optional
+        Whether to send records delta-compressed at their display precision.
+        The default is False.
+    keyframe_interval : int, optional
+        When compressing, send a full record every this many frames.
+        The default is 10.
+
+    Returns
+    -------
+    frame_batcher : ivaldi.framing.FrameBatcher
+        The batcher for the records.
+
+    """
+    record_codec = create_record_codec(
+        compress=compress, keyframe_interval=keyframe_interval)
+    batch_size_maximum = (ivaldi.framing.PAYLOAD_SIZE_MAXIMUM
+                          // record_codec.record_size_maximum)
+    if not 1 <= batch_size <= batch_size_maximum:
+        raise ValueError(
+            f"Batch size must be between 1 and {batch_size_maximum}, "
+            f"not {batch_size}")
+    return ivaldi.framing.FrameBatcher(
+        record_codec, batch_size=batch_size,
+        batch_interval_s=batch_interval_s)
+
+
+def decode_data(recieved_bytes, frame_parser, record_codec,
+                output_sink=None, log=False, station_id=None):
+    """
+    Decode, print and output the data packets in a chunk of recieved bytes.
+
+    Parameters
+    ----------
+    recieved_bytes : bytes
+        The bytes recieved from the serial link.
+    frame_parser : ivaldi.framing.FrameParser
+        The parser to extract the packets from the recieved bytes.
+    record_codec : ivaldi.codec.RecordCodec
+        The codec to decode the records in each packet with.
+    output_sink : ivaldi.output.CSVSink or None
+        Sink to output the data to. If None, only prints to the screen.
     log : bool, optional
         If true, will log every update on a seperate line;
         updates one line otherwise. The default is False.
+    station_id : str or None, optional
+        If not None, tags each record with this station ID, in a leading
+        ``station`` field. The default is None.
 
     Returns
     -------
-    unpacked_data : tuple or None
-        The unpacked and decoded data recieved, if any; else None.
+    recieved_data : list of dict
+        The decoded data of each record recieved, if any, with batches
+        expanded into their individual records.
 
     """
-    recieved_data = serial_port.read(size=struct.calcsize(DATA_FORMAT))
-    if not recieved_data:
-        return None
-    try:
-        unpacked_data = struct.unpack(DATA_FORMAT, recieved_data)
-    # Ignore errors reading the data and continue
-    except struct.error:
-        pass
+    records = record_codec.decode_frames(frame_parser.feed(recieved_bytes))
+    if not records:
+        return []
+
+    # Updating one line, only the last record of a backlog would be seen
+    print_prefix = "" if station_id is None else f"{station_id}|"
+    for record in (records if log else records[-1:]):
+        ivaldi.monitor.pretty_print_data(*record, log=log, prefix=print_prefix)
+
+    fieldnames = ivaldi.schema.RECORD_SCHEMA.fieldnames
+    if station_id is None:
+        recieved_data = [dict(zip(fieldnames, record)) for record in records]
     else:
-        ivaldi.monitor.pretty_print_data(*unpacked_data, log=log)
+        fieldnames = (STATION_FIELD, *fieldnames)
+        recieved_data = [dict(zip(fieldnames, (station_id, *record)))
+                         for record in records]
+
+    if output_sink is not None:
+        output_sink.write_rows(recieved_data)
+
+    return recieved_data
+
+
+def recieve_data_packet(serial_port, **decode_kwargs):
+    """
+    Recieve and print any data packets available from a serial port.
+
+    Parameters
+    ----------
+    serial_port : serial.Serial
+        The serial port object to read from.
+    decode_kwargs
+        The parser, codec, output sink and log flag, as for ``decode_data``.
+
+    Returns
+    -------
+    recieved_data : list of dict
+        The decoded data of each record recieved, if any.
+
+    """
+    recieved_bytes = serial_port.read(size=max(serial_port.in_waiting, 1))
+    if not recieved_bytes:
+        return []
+    return decode_data(recieved_bytes, **decode_kwargs)
+
+
+class SerialReader:
+    """
+    Read a serial port in a background thread into a bounded queue.
 
-        sensor_data_dict = {
-            key: value for key, value in zip(
-                ivaldi.monitor.VARIABLES.keys(), unpacked_data)}
+    Draining the port in its own thread means a slow consumer, e.g. a slow
+    disk or terminal, can't let the port's buffer overflow; bursts are
+    absorbed by the queue instead. If the queue is full, the chunk read is
+    dropped and counted, and the frame parser resynchronizes on the next.
+
+    Parameters
+    ----------
+    serial_port : serial.Serial
+        The serial port object to read from.
+    queue_size : int, optional
+        The maximum number of chunks of bytes to hold. The default is 1024.
+
+    Attributes
+    ----------
+    bytes_read : int
+        The number of bytes read from the port.
+    chunks_dropped : int
+        The number of chunks dropped because the queue was full.
+    bytes_dropped : int
+        The number of bytes in the dropped chunks.
+    queue_depth_maximum : int
+        The most chunks held in the queue at once.
+
+    """
+
+    def __init__(self, serial_port, queue_size=QUEUE_SIZE_DEFAULT):
+        """See class docstring for full details."""
+        self.serial_port = serial_port
+        self.bytes_read = 0
+        self.chunks_dropped = 0
+        self.bytes_dropped = 0
+        self.queue_depth_maximum = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @property
+    def queue_depth(self):
+        """The number of chunks currently waiting in the queue."""
+        return self._queue.qsize()
+
+    @property
+    def stats(self):
+        """The byte, drop and queue depth counts of the reader, as a dict."""
+        return {
+            "bytes_read": self.bytes_read,
+            "chunks_dropped": self.chunks_dropped,
+            "bytes_dropped": self.bytes_dropped,
+            "queue_depth": self.queue_depth,
+            "queue_depth_maximum": self.queue_depth_maximum,
+            }
 
-        if output_file is not None:
-            ivaldi.output.write_line_csv(
-                sensor_data_dict, out_file=output_file)
+    def _run(self):
+        """Read the serial port until stopped, queuing each chunk."""
+        while not (self._stop_event.is_set()
+                   or ivaldi.utils.EXIT_EVENT.is_set()):
+            recieved_bytes = self.serial_port.read(
+                size=max(self.serial_port.in_waiting, 1))
+            if not recieved_bytes:
+                continue
+            self.bytes_read += len(recieved_bytes)
+            try:
+                self._queue.put_nowait(recieved_bytes)
+            except queue.Full:
+                self.chunks_dropped += 1
+                self.bytes_dropped += len(recieved_bytes)
+            else:
+                self.queue_depth_maximum = max(
+                    self.queue_depth_maximum, self._queue.qsize())
 
-        return sensor_data_dict
+    def start(self):
+        """
+        Start reading the serial port in a background thread.
+
+        Returns
+        -------
+        None.
+
+        """
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="serial-reader", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop reading the serial port, waiting for the current read.
+
+        Returns
+        -------
+        None.
+
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._thread = None
+
+    def read(self, timeout=QUEUE_GET_TIMEOUT_S):
+        """
+        Get all the bytes queued so far, waiting for some if there are none.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            The maximum time to wait for bytes, in s. The default is 0.5 s.
+
+        Returns
+        -------
+        recieved_bytes : bytes
+            The bytes read, in order; empty if none arrived in time.
+
+        """
+        try:
+            chunks = [self._queue.get(timeout=timeout)]
+        except queue.Empty:
+            return b""
+        while True:
+            try:
+                chunks.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return b"".join(chunks)
+
+
+def recieve_queued_data(serial_reader, **decode_kwargs):
+    """
+    Decode and print the data packets read so far by a serial reader.
+
+    Parameters
+    ----------
+    serial_reader : SerialReader
+        The running reader to get the bytes from.
+    decode_kwargs
+        The parser, codec, output sink and log flag, as for ``decode_data``.
+
+    Returns
+    -------
+    recieved_data : list of dict
+        The decoded data of each record recieved, if any.
+
+    """
+    recieved_bytes = serial_reader.read()
+    if not recieved_bytes:
+        return []
+    return decode_data(recieved_bytes, **decode_kwargs)
 
 
 def recieve_monitoring_data(
-        serial_device="/dev/ttyAMA1", output_path=None, log=False):
+        serial_device="/dev/ttyAMA1", output_path=None, log=False,
+        output_format=ivaldi.output.OUTPUT_FORMAT_DEFAULT,
+        flush_rows=ivaldi.output.FLUSH_ROWS_DEFAULT,
+        flush_interval_s=ivaldi.output.FLUSH_INTERVAL_S_DEFAULT,
+        rotate_bytes=None, rotate_period=None, compression=None,
+        threaded=False, queue_size=QUEUE_SIZE_DEFAULT):
     """
     Recieve continous monitoring data from a serial port.
 
@@ -85,6 +360,30 @@ def recieve_monitoring_data(
     log : bool, optional
         If true, will log every update on a seperate line;
         updates one line otherwise. The default is False.
+    output_format : str, optional
+        The format to write the output in, "csv" or "binary".
+        The default is "csv".
+    flush_rows : int, optional
+        Write the output to disk every this many rows. The default is 60.
+    flush_interval_s : float, optional
+        Write the output to disk at least this often, in s.
+        The default is 60 s.
+    rotate_bytes : int or None, optional
+        Start a new output file once it reaches this size, in bytes.
+        The default is None, not rotating by size.
+    rotate_period : str or None, optional
+        Start a new output file each "hour", "day" or "month".
+        The default is None, not rotating by time.
+    compression : str or None, optional
+        Compress rotated output files with "gzip" or "lzma" in the
+        background. The default is None, leaving them uncompressed.
+    threaded : bool, optional
+        If True, reads the serial port in a dedicated thread into a queue,
+        so slow output can't cause the port's buffer to overflow.
+        The default is False.
+    queue_size : int, optional
+        If threaded, the maximum number of chunks of recieved bytes to
+        queue before dropping them. The default is 1024.
 
     Returns
     -------
@@ -92,22 +391,87 @@ def recieve_monitoring_data(
 
     """
     print("Recieving data...")
+    frame_parser = ivaldi.framing.FrameParser()
+    record_codec = create_record_codec()
+    serial_reader = None
     with serial.Serial(serial_device, **SERIAL_PARAMS) as serial_port:
         recieve_args = {
-            "serial_port": serial_port,
+            "frame_parser": frame_parser,
+            "record_codec": record_codec,
             "period_s": 0,
             "log": log
             }
-        if output_path is not None:
-            with open(output_path, mode="a",
-                      encoding="utf-8", newline="") as out_file:
-                ivaldi.utils.run_periodic(recieve_data_packet)(
-                    output_file=out_file, **recieve_args)
+        if threaded:
+            serial_reader = SerialReader(serial_port, queue_size=queue_size)
+            serial_reader.start()
+            recieve_func = recieve_queued_data
+            recieve_args["serial_reader"] = serial_reader
         else:
-            ivaldi.utils.run_periodic(recieve_data_packet)(**recieve_args)
+            recieve_func = recieve_data_packet
+            recieve_args["serial_port"] = serial_port
 
+        try:
+            if output_path is not None:
+                with ivaldi.output.SINK_TYPES[output_format](
+                        output_path,
+                        fieldnames=ivaldi.schema.RECORD_SCHEMA.fieldnames,
+                        flush_rows=flush_rows,
+                        flush_interval_s=flush_interval_s,
+                        rotate_bytes=rotate_bytes,
+                        rotate_period=rotate_period,
+                        compression=compression) as output_sink:
+                    ivaldi.utils.run_periodic(recieve_func)(
+                        output_sink=output_sink, **recieve_args)
+            else:
+                ivaldi.utils.run_periodic(recieve_func)(**recieve_args)
+        finally:
+            if serial_reader is not None:
+                serial_reader.stop()
 
-def send_data_packet(serial_port, **sensor_kwargs):
+    link_stats = {
+        **frame_parser.stats,
+        "frames_undecodable": record_codec.frames_undecodable,
+        }
+    if serial_reader is not None:
+        link_stats.update(serial_reader.stats)
+    print("Link stats: " + ", ".join(
+        f"{key}={value}" for key, value in link_stats.items()))
+
+
+def send_sensor_data(serial_port, frame_batcher, sensor_data,
+                     loop_stats=None):
+    """
+    Add one record of sensor data to a batch, sending it once complete.
+
+    Parameters
+    ----------
+    serial_port : serial.Serial
+        The serial port object to write to.
+    frame_batcher : ivaldi.framing.FrameBatcher
+        The batcher to add the record to, which frames it for sending.
+    sensor_data : dict
+        The value of each variable, in the order of ``VARIABLES``.
+    loop_stats : ivaldi.stats.LoopStats or None, optional
+        If passed, records the time taken to write to the port in it.
+        The default is None.
+
+    Returns
+    -------
+    data_packet : bytes
+        The encoded binary data send to the serial port, which is empty
+        if the record is held back for the rest of its batch.
+
+    """
+    data_packet = frame_batcher.add(tuple(sensor_data.values()))
+    if data_packet:
+        start_time = time.monotonic()
+        serial_port.write(data_packet)
+        if loop_stats is not None:
+            loop_stats.record("sink.serial", time.monotonic() - start_time)
+    return data_packet
+
+
+def send_data_packet(serial_port, frame_batcher, **sensor_kwargs):
     """
     Send an indiviudal data packet to a serial port.
 
@@ -115,20 +479,29 @@ def send_data_packet(serial_port, **sensor_kwargs):
     ----------
     serial_port : serial.Serial
         The serial port object to read from.
+    frame_batcher : ivaldi.framing.FrameBatcher
+        The batcher to add the packet to, which frames it for sending.
 
     Returns
     -------
     data_packet : bytes
-        The encoded binary data send to the serial port.
+        The encoded binary data send to the serial port, which is empty
+        if the packet is held back for the rest of its batch.
 
     """
     data_to_pack = ivaldi.monitor.get_sensor_data(**sensor_kwargs)
-    data_packet = struct.pack(DATA_FORMAT, *list(data_to_pack.values()))
-    serial_port.write(data_packet)
-    return data_packet
+    if data_to_pack is None:
+        return b""
+    return send_sensor_data(serial_port, frame_batcher, data_to_pack,
+                            loop_stats=sensor_kwargs.get("loop_stats"))
 
 
-def send_monitoring_data(serial_device="/dev/ttyAMA0", **sensor_kwargs):
+def send_monitoring_data(serial_device="/dev/ttyAMA0",
+                         batch_size=BATCH_SIZE_DEFAULT, batch_interval_s=None,
+                         compress=False,
+                         keyframe_interval=(
+                             ivaldi.codec.KEYFRAME_INTERVAL_DEFAULT),
+                         **sensor_kwargs):
     """
     Send continous monitoring data to a serial port.
 
@@ -136,15 +509,263 @@ def send_monitoring_data(serial_device="/dev/ttyAMA0", **sensor_kwargs):
     ----------
     serial_device : str, optional
         The serial device to write to. The default is "/dev/ttyAMA0".
+    batch_size : int, optional
+        The number of samples to send together in each frame, trading
+        latency for throughput. The default is 1.
+    batch_interval_s : float or None, optional
+        If not None, sends a partial batch once its first sample has waited
+        this long, in s. The default is None.
+    compress : bool, optional
+        Whether to send samples quantized to their display precision and
+        delta-compressed, to use less bandwidth. The default is False.
+    keyframe_interval : int, optional
+        When compressing, send a full sample every this many frames, so the
+        reciever can recover from lost frames. The default is 10.
 
     Returns
     -------
     None.
 
     """
-    sensor_args = ivaldi.monitor.setup_sensors(**sensor_kwargs)
+    frame_batcher = create_frame_batcher(
+        batch_size=batch_size, batch_interval_s=batch_interval_s,
+        compress=compress, keyframe_interval=keyframe_interval)
+    with contextlib.ExitStack() as stack:
+        sensor_args = ivaldi.monitor.setup_sensors(
+            **sensor_kwargs, exit_stack=stack)
 
-    print("Sending data...")
-    with serial.Serial(serial_device, **SERIAL_PARAMS) as serial_port:
-        ivaldi.utils.run_periodic(send_data_packet)(
-            **sensor_args, serial_port=serial_port)
+        print("Sending data...")
+        serial_port = stack.enter_context(
+            serial.Serial(serial_device, **SERIAL_PARAMS))
+        scheduler = ivaldi.utils.run_periodic(send_data_packet)(
+            **sensor_args, serial_port=serial_port,
+            frame_batcher=frame_batcher)
+        serial_port.write(frame_batcher.flush())
+    ivaldi.monitor.print_schedule_stats(scheduler)
+
+
+def parse_station_device(station_device):
+    """
+    Split a station device spec into its station ID and serial device.
+
+    Parameters
+    ----------
+    station_device : str
+        Either ``ID=DEVICE``, or just the ``DEVICE``, in which case the ID
+        is the device's file name (e.g. ``ttyUSB0``).
+
+    Returns
+    -------
+    station_id : str
+        The ID of the station.
+    serial_device : str
+        The serial device the station is connected to.
+
+    """
+    station_id, seperator, serial_device = station_device.partition(
+        STATION_SEPERATOR)
+    if not seperator:
+        return Path(station_device).name, station_device
+    return station_id, serial_device
+
+
+class StationReciever:
+    """
+    Recieve data from one station, when its serial port is readable.
+
+    Parameters
+    ----------
+    station_id : str
+        The ID to tag the station's records with.
+    serial_port : serial.Serial
+        The open, non-blocking serial port the station is connected to.
+    output_sink : ivaldi.output.CSVSink or None, optional
+        Sink to output the data to. If None, only prints to the screen.
+    log : bool, optional
+        If true, will log every update on a seperate line;
+        updates one line otherwise. The default is False.
+
+    Attributes
+    ----------
+    fileno : int
+        The file descriptor of the serial port, as watched for data.
+    down : bool
+        Whether the station was disconnected, closing its serial port.
+
+    """
+
+    def __init__(self, station_id, serial_port, output_sink=None, log=False):
+        """See class docstring for full details."""
+        self.station_id = station_id
+        self.serial_port = serial_port
+        self.output_sink = output_sink
+        self.log = log
+        self.fileno = serial_port.fileno()
+        self.down = False
+        self.frame_parser = ivaldi.framing.FrameParser()
+        self.record_codec = create_record_codec()
+
+    @property
+    def stats(self):
+        """The link stats of the station, as a dict."""
+        return {
+            **self.frame_parser.stats,
+            "frames_undecodable": self.record_codec.frames_undecodable,
+            }
+
+    def on_readable(self):
+        """
+        Read, decode and output the bytes available; used as a callback.
+
+        If the serial port was disconnected, closes it and marks the
+        station as down, rather than raising.
+
+        Returns
+        -------
+        None.
+
+        """
+        try:
+            recieved_bytes = self.serial_port.read(
+                size=max(self.serial_port.in_waiting, 1))
+        except (serial.SerialException, OSError) as error:
+            print(f"\nStation {self.station_id} is down, "
+                  f"disconnecting: {error}")
+            self.down = True
+            self.serial_port.close()
+            return
+        if recieved_bytes:
+            decode_data(
+                recieved_bytes, frame_parser=self.frame_parser,
+                record_codec=self.record_codec, output_sink=self.output_sink,
+                log=self.log, station_id=self.station_id)
+
+
+def _watch_exit_event(loop, callback):
+    """Call a callback in an event loop once the exit event is set."""
+    ivaldi.utils.EXIT_EVENT.wait()
+    try:
+        loop.call_soon_threadsafe(callback)
+    except RuntimeError:  # The loop already finished and was closed
+        pass
+
+
+async def _recieve_stations(station_recievers, loop):
+    """Watch each station's serial port until exiting or all are down."""
+    stop_future = loop.create_future()
+
+    def stop():
+        if not stop_future.done():
+            stop_future.set_result(None)
+
+    def on_readable(station_reciever):
+        station_reciever.on_readable()
+        if station_reciever.down:
+            loop.remove_reader(station_reciever.fileno)
+            if all(reciever.down for reciever in station_recievers):
+                print("All stations are down; stopping.")
+                stop()
+
+    for station_reciever in station_recievers:
+        loop.add_reader(
+            station_reciever.fileno, on_readable, station_reciever)
+    threading.Thread(
+        target=_watch_exit_event, args=(loop, stop), daemon=True).start()
+    try:
+        await stop_future
+    finally:
+        for station_reciever in station_recievers:
+            loop.remove_reader(station_reciever.fileno)
+
+
+def recieve_multiple_stations(
+        serial_devices, output_path=None, log=False,
+        output_format=ivaldi.output.OUTPUT_FORMAT_DEFAULT, **sink_kwargs):
+    """
+    Recieve data from several stations concurrently, in one event loop.
+
+    Each station's serial port is watched by an asyncio event loop, and
+    read whenever data arrives, so dozens of stations can be recieved in
+    one process without a thread or busy loop for each. Every record is
+    tagged with the ID of the station it came from. A station that is
+    disconnected is reported as down and no longer read, while the rest
+    carry on. Requires serial ports with a file descriptor, as on POSIX.
+
+    Parameters
+    ----------
+    serial_devices : list of str
+        The serial devices to read from, each as ``ID=DEVICE`` or just
+        ``DEVICE`` (taking the device's file name as the station ID).
+    output_path : str or pathlib.Path
+        Path to output the data to. If it contains ``{station}``,
+        writes a seperate file for each station, with it replaced by the
+        station ID; otherwise, writes all stations to the one file,
+        which is only possible for CSV. If None, prints to the screen.
+    log : bool, optional
+        If true, will log every update on a seperate line;
+        updates one line otherwise. The default is False.
+    output_format : str, optional
+        The format to write the output in, "csv" or "binary".
+        The default is "csv".
+    sink_kwargs
+        Flushing and rotation options, as for
+        ``ivaldi.output.BatchedFileSink``.
+
+    Returns
+    -------
+    None.
+
+    """
+    stations = [parse_station_device(station_device)
+                for station_device in serial_devices]
+    fieldnames = [STATION_FIELD, *ivaldi.schema.RECORD_SCHEMA.fieldnames]
+    if output_format == "binary" and output_path is not None:
+        # Binary records are all numeric, so the station is in the file name
+        if "{station}" not in str(output_path):
+            raise ValueError(
+                "Binary output of multiple stations requires '{station}' "
+                f"in the output path, got {output_path!r}")
+        fieldnames = fieldnames[1:]
+    serial_params = {**SERIAL_PARAMS, "timeout": 0}
+    output_sinks = {}
+    serial_ports = []
+    station_recievers = []
+
+    try:
+        for station_id, serial_device in stations:
+            if output_path is None:
+                output_sink = None
+            else:
+                station_path = str(output_path).format(station=station_id)
+                if station_path not in output_sinks:
+                    output_sinks[station_path] = ivaldi.output.SINK_TYPES[
+                        output_format](
+                            station_path, fieldnames=fieldnames,
+                            **sink_kwargs)
+                output_sink = output_sinks[station_path]
+            serial_port = serial.Serial(serial_device, **serial_params)
+            serial_ports.append(serial_port)
+            station_recievers.append(StationReciever(
+                station_id, serial_port, output_sink=output_sink, log=log))
+
+        print(f"Recieving data from {len(station_recievers)} stations...")
+        ivaldi.utils.set_quit_handler()
+        # Only imported when needed, as it is slow to import
+        import asyncio  # pylint: disable=C0415
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(
+                _recieve_stations(station_recievers, loop))
+        finally:
+            loop.close()
+    finally:
+        for serial_port in serial_ports:
+            serial_port.close()
+        for output_sink in output_sinks.values():
+            output_sink.close()
+
+    for station_reciever in station_recievers:
+        station_status = " (down)" if station_reciever.down else ""
+        print(f"Link stats for {station_reciever.station_id}{station_status}: "
+              + ", ".join(f"{key}={value}" for key, value
+                          in station_reciever.stats.items()))
@@ -0,0 +1,209 @@
+"""
+A local HTTP endpoint publishing live metrics in Prometheus text format.
+"""
+
+# Standard library imports
+import http.server
+import math
+import threading
+import time
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+METRICS_HOST_DEFAULT = "127.0.0.1"
+METRICS_PATHS = {"/", "/metrics"}
+METRICS_PREFIX = "ivaldi_"
+
+
+def _format_value(value):
+    """Format a number as a Prometheus sample value."""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return "NaN"
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
+
+
+def _format_metric(name, metric_type, help_str, samples):
+    """Format a metric and its samples, as (labels, value), as text lines."""
+    name = METRICS_PREFIX + name
+    lines = [f"# HELP {name} {help_str}", f"# TYPE {name} {metric_type}"]
+    for labels, value in samples:
+        labels_str = ",".join(
+            f'{label}="{label_value}"'
+            for label, label_value in labels.items())
+        if labels_str:
+            labels_str = "{" + labels_str + "}"
+        lines.append(f"{name}{labels_str} {_format_value(value)}")
+    return lines
+
+
+class MetricsServer:
+    """
+    Serve the latest sensor data and loop health over HTTP, for Prometheus.
+
+    The sampling loop only hands over each new record by reference, and the
+    scheduler and read latencies are read when scraped, so publishing adds
+    no locking or formatting cost to the loop; the text is rendered in the
+    server's own background thread, on request.
+
+    Parameters
+    ----------
+    port : int
+        The TCP port to listen on; 0 picks a free one.
+    host : str, optional
+        The address to listen on. The default is "127.0.0.1", only
+        accepting connections from the local machine.
+    sensor_latency_s : dict or None, optional
+        The dict the time taken to read each sensor is kept updated in,
+        as passed to ``ivaldi.monitor.get_sensor_data``. The default is None.
+    scheduler : ivaldi.utils.DeadlineScheduler or None, optional
+        The scheduler of the sampling loop, to publish the health of.
+        Can also be set once the loop has started. The default is None.
+
+    Attributes
+    ----------
+    records_published : int
+        The number of records published.
+
+    """
+
+    def __init__(self, port, host=METRICS_HOST_DEFAULT, sensor_latency_s=None,
+                 scheduler=None):
+        """See class docstring for full details."""
+        self.host = host
+        self.sensor_latency_s = sensor_latency_s
+        self.scheduler = scheduler
+        self.records_published = 0
+        self._sensor_data = None
+        self._publish_time = None
+        self._thread = None
+
+        metrics_server = self
+
+        class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in METRICS_PATHS:
+                    self.send_error(404)
+                    return
+                body = metrics_server.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._http_server = http.server.HTTPServer(
+            (host, port), _MetricsHandler)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @property
+    def port(self):
+        """The TCP port the server is listening on."""
+        return self._http_server.server_address[1]
+
+    def publish(self, sensor_data):
+        """
+        Publish a new record of sensor data, replacing the last.
+
+        Parameters
+        ----------
+        sensor_data : dict
+            The value of each variable. Must not be modified afterwards.
+
+        Returns
+        -------
+        None.
+
+        """
+        self._sensor_data = sensor_data
+        self._publish_time = time.time()
+        self.records_published += 1
+
+    def render(self):
+        """
+        Render the current metrics in Prometheus text format.
+
+        Returns
+        -------
+        metrics_text : str
+            The metrics, with their help and type lines.
+
+        """
+        sensor_data = self._sensor_data
+        lines = _format_metric(
+            "records_published_total", "counter",
+            "Number of records published.",
+            [({}, self.records_published)])
+        if sensor_data is not None:
+            lines += _format_metric(
+                "sensor_value", "gauge", "Latest value of each variable.",
+                [({"variable": variable}, value)
+                 for variable, value in sensor_data.items()])
+            lines += _format_metric(
+                "last_record_timestamp_seconds", "gauge",
+                "Unix time the latest record was published.",
+                [({}, self._publish_time)])
+        if self.sensor_latency_s is not None:
+            lines += _format_metric(
+                "sensor_read_seconds", "gauge",
+                "Time taken by the latest read of each sensor.",
+                [({"sensor": sensor_name}, latency_s)
+                 for sensor_name, latency_s
+                 in sorted(dict(self.sensor_latency_s).items())])
+        if self.scheduler is not None:
+            lines += _format_metric(
+                "loop_iterations_total", "counter",
+                "Number of iterations of the sampling loop.",
+                [({}, self.scheduler.iterations)])
+            lines += _format_metric(
+                "loop_deadlines_missed_total", "counter",
+                "Number of sampling loop deadlines overrun.",
+                [({}, self.scheduler.deadlines_missed)])
+            lines += _format_metric(
+                "loop_lateness_seconds", "gauge",
+                "How late the latest sampling loop iteration started.",
+                [({}, self.scheduler.lateness_s)])
+        return "\n".join(lines) + "\n"
+
+    def start(self):
+        """
+        Start serving in a background thread.
+
+        Returns
+        -------
+        None.
+
+        """
+        self._thread = threading.Thread(
+            target=self._http_server.serve_forever, name="metrics-server",
+            daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop serving, and close the server's socket.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self._thread is not None:
+            self._http_server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._http_server.server_close()
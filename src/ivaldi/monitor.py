@@ -3,37 +3,35 @@ Monitoring mainloop for Ivaldi.
 """
 
 # Standard library imports
+import concurrent.futures
+import contextlib
+import functools
+import math
 import sys
+import time
 
 # Local imports
-import ivaldi.devices.adafruit
+import ivaldi.aggregation
 import ivaldi.devices.analog
 import ivaldi.devices.counter
 import ivaldi.devices.onewire
+import ivaldi.devices.simulated
 import ivaldi.output
+import ivaldi.schema
+import ivaldi.stats
 import ivaldi.utils
 
 
+ADC_SWEEP_PERIOD_FRACTION = 0.5
 PERIOD_S_DEFAULT = 1
+# Resolution of the shared timeline of sensors sampled at different periods
+SAMPLE_PERIOD_RESOLUTION_S = 0.001
 
-VARIABLES = {
-    "time_elapsed_s": "{:.1f}s",
-    "temperature_bmp280_C": "{:.2f}C",
-    "pressure_hPa": "{:.2f}hPa",
-    "altitude_m": "{:.2f}m",
-    "temperature_sht31d_C": "{:.2f}C",
-    "relative_humidity": "{:.2f}%",
-    "wind_gust_m_s_3s": "{:.2f}m/s(3s)",
-    "wind_sustained_m_s_10min": "{:.2f}m/s(10min)",
-    "wind_direction_deg_n": "{:.1f}deg",
-    "rain_mm": "{:.1f}mm",
-    "rain_rate_mm_h": "{:.2f}mm/h(5min)",
-    "soil_temperature_C": "{:.2f}C",
-    "soil_moisture_raw": "{}",
-    }
+# Re-exported for compatibility; defined with the rest of the record schema
+VARIABLES = ivaldi.schema.VARIABLES
 
 
-def pretty_print_data(*data_to_print, log=False):
+def pretty_print_data(*data_to_print, log=False, prefix=""):
     """
     Pretty print the raingauge data to the terminal.
 
@@ -44,6 +42,9 @@ def pretty_print_data(*data_to_print, log=False):
         The default is False.
     data_to_print : dict
         The keys to pass to the data printing function.
+    prefix : str, optional
+        A string to print before the data, e.g. to identify the source.
+        The default is "".
 
     Returns
     -------
@@ -51,8 +52,7 @@ def pretty_print_data(*data_to_print, log=False):
         Pretty-printed output string.
 
     """
-    output_str = "|".join(VARIABLES.values())
-    output_str = output_str.format(*data_to_print)
+    output_str = prefix + ivaldi.schema.RECORD_SCHEMA.format(*data_to_print)
 
     if log:
         print(output_str)
@@ -63,9 +63,276 @@ def pretty_print_data(*data_to_print, log=False):
     return output_str
 
 
+def _read_raingauge(raingauge_obj):
+    """Read the variables measured by the rain gauge."""
+    rain_rates = raingauge_obj.output_value_averages()
+    return {
+        "time_elapsed_s": raingauge_obj.time_elapsed_s,
+        "rain_mm": raingauge_obj.output_value_total,
+        "rain_rate_mm_h": rain_rates[
+            ivaldi.devices.counter.RAIN_AVERAGE_PERIOD_S],
+        "rain_rate_mm_h_1h": rain_rates[ivaldi.devices.counter.S_IN_HR],
+        "rain_rate_mm_h_24h": rain_rates[
+            ivaldi.devices.counter.S_IN_HR * 24],
+        }
+
+
+def _read_windspeed(windspeed_obj):
+    """Read the variables measured by the anemometer."""
+    wind_speed_averages = windspeed_obj.output_value_averages()
+    return {
+        "wind_gust_m_s_3s": wind_speed_averages[3],
+        "wind_sustained_m_s_10min": wind_speed_averages[60 * 10],
+        }
+
+
+def _read_winddir(winddir_obj):
+    """Read the variables measured by the wind vane."""
+    return {"wind_direction_deg_n": winddir_obj.value}
+
+
+def _read_soiltemperature(soiltemperature_obj):
+    """Read the variables measured by the soil temperature sensor."""
+    return {"soil_temperature_C": soiltemperature_obj.value}
+
+
+def _read_soilmoisture(soilmoisture_obj):
+    """Read the variables measured by the soil moisture sensor."""
+    return {"soil_moisture_raw": soilmoisture_obj.value}
+
+
+def _read_pressure(pressure_obj):
+    """Read the variables measured by the pressure sensor."""
+    return {
+        "temperature_bmp280_C": pressure_obj.temperature,
+        "pressure_hPa": pressure_obj.pressure,
+        "altitude_m": pressure_obj.altitude,
+        }
+
+
+def _read_humidity(humidity_obj):
+    """Read the variables measured by the humidity sensor."""
+    return {
+        "temperature_sht31d_C": humidity_obj.temperature,
+        "relative_humidity": humidity_obj.relative_humidity,
+        }
+
+
+# Slowest sensors first, so they are started first when read concurrently
+SENSOR_READERS = {
+    "soiltemperature_obj": _read_soiltemperature,
+    "pressure_obj": _read_pressure,
+    "humidity_obj": _read_humidity,
+    "winddir_obj": _read_winddir,
+    "soilmoisture_obj": _read_soilmoisture,
+    "windspeed_obj": _read_windspeed,
+    "raingauge_obj": _read_raingauge,
+    }
+
+
+# How to combine several samples of a variable into one output value;
+# the rest are already averaged by their device, so the last is used
+SAMPLE_AGGREGATIONS = {
+    "temperature_bmp280_C": "mean",
+    "pressure_hPa": "mean",
+    "altitude_m": "mean",
+    "temperature_sht31d_C": "mean",
+    "relative_humidity": "mean",
+    "wind_direction_deg_n": "circular_mean_deg",
+    "soil_temperature_C": "mean",
+    "soil_moisture_raw": "mean",
+    }
+
+
+def _timed_read(reader, sensor_obj):
+    """Call a sensor reader function, returning its output and latency."""
+    start_time = time.monotonic()
+    sensor_values = reader(sensor_obj)
+    return sensor_values, time.monotonic() - start_time
+
+
+def read_sensors(sensor_objs, sensor_names=None, executor=None,
+                 sensor_latency_s=None):
+    """
+    Read the variables measured by each of a set of sensors.
+
+    Parameters
+    ----------
+    sensor_objs : dict of str: object
+        The initialized sensor objects, keyed by the name of their
+        argument to ``get_sensor_data``, e.g. ``winddir_obj``.
+    sensor_names : iterable of str or None, optional
+        The names of the sensors to read. The default is None, all of them.
+    executor : concurrent.futures.Executor or None, optional
+        If passed, reads each sensor concurrently using this executor.
+        Otherwise, the default, reads them one after another.
+    sensor_latency_s : dict or None, optional
+        If passed, updated with the time taken to read each sensor, in s,
+        keyed by the name of the sensor. The default is None.
+
+    Returns
+    -------
+    sensor_values : dict
+        The value of each variable measured by the sensors read.
+
+    """
+    sensor_readers = {
+        sensor_name: reader for sensor_name, reader in SENSOR_READERS.items()
+        if sensor_names is None or sensor_name in sensor_names}
+
+    if executor is None:
+        sensor_results = {
+            sensor_name: _timed_read(reader, sensor_objs[sensor_name])
+            for sensor_name, reader in sensor_readers.items()}
+    else:
+        sensor_futures = {
+            sensor_name: executor.submit(
+                _timed_read, reader, sensor_objs[sensor_name])
+            for sensor_name, reader in sensor_readers.items()}
+        sensor_results = {
+            sensor_name: sensor_future.result()
+            for sensor_name, sensor_future in sensor_futures.items()}
+
+    sensor_values = {}
+    for sensor_name, (values, latency_s) in sensor_results.items():
+        sensor_values.update(values)
+        if sensor_latency_s is not None:
+            sensor_latency_s[sensor_name] = latency_s
+
+    return sensor_values
+
+
+class MultiRateSampler:
+    """
+    Read each sensor at its own period, and output records at another.
+
+    All the reads run on one timeline, ticking at the greatest common
+    divisor of the periods, with each sensor read on the ticks that are a
+    multiple of its period. At every output period, a record is output with
+    the latest value of each variable or, if aggregating, the (vector) mean
+    of its samples since the last record, for variables that aren't already
+    averaged by their device.
+
+    Ticks are counted by the deadlines of the scheduler driving the sampler,
+    if it has one, rather than by the calls to ``sample``, so deadlines
+    skipped after an overrun don't shift later reads off their periods.
+    A sensor is read, or a record output, on the first tick of each of its
+    periods reached, so those due on a skipped tick happen on the next one.
+
+    Parameters
+    ----------
+    sensor_periods_s : dict of str: float
+        The period to read each sensor at, in s, keyed by the name of its
+        argument to ``get_sensor_data``, e.g. ``winddir_obj``. Sensors not
+        listed are read at the output period.
+    output_period_s : float
+        The period to output records at, in s.
+    aggregate : bool, optional
+        Whether to output the mean of the samples of each variable since the
+        last record, rather than the latest. The default is True.
+
+    Attributes
+    ----------
+    tick_s : float
+        The period of the shared timeline, to call ``sample`` at, in s.
+    scheduler : ivaldi.utils.DeadlineScheduler or None
+        The scheduler calling ``sample`` every tick, set by
+        ``ivaldi.utils.run_periodic``. If None, every call is a tick.
+
+    """
+
+    def __init__(self, sensor_periods_s, output_period_s, aggregate=True):
+        """See class docstring for full details."""
+        unknown_sensors = set(sensor_periods_s) - set(SENSOR_READERS)
+        if unknown_sensors:
+            raise ValueError(
+                f"Unknown sensors {sorted(unknown_sensors)}; "
+                f"must be among {list(SENSOR_READERS)}")
+        self.sensor_periods_s = {
+            sensor_name: sensor_periods_s.get(sensor_name, output_period_s)
+            for sensor_name in SENSOR_READERS}
+        self.output_period_s = output_period_s
+        self.aggregate = aggregate
+
+        periods_ticks = [
+            round(period_s / SAMPLE_PERIOD_RESOLUTION_S) for period_s in
+            [output_period_s, *self.sensor_periods_s.values()]]
+        if min(periods_ticks) < 1:
+            raise ValueError(
+                f"Periods must be at least {SAMPLE_PERIOD_RESOLUTION_S} s")
+        tick_resolutions = functools.reduce(math.gcd, periods_ticks)
+        self.tick_s = tick_resolutions * SAMPLE_PERIOD_RESOLUTION_S
+        self._sensor_ticks = {
+            sensor_name: round(period_s / self.tick_s)
+            for sensor_name, period_s in self.sensor_periods_s.items()}
+        self._output_ticks = round(output_period_s / self.tick_s)
+        self.scheduler = None
+        self._tick = 0
+        self._sensor_periods = {}
+        self._output_period = None
+        self._latest_values = {}
+        self._samples = {variable: [] for variable in SAMPLE_AGGREGATIONS}
+
+    def sample(self, sensor_objs, executor=None, sensor_latency_s=None):
+        """
+        Read the sensors due this tick, and get a record if one is due.
+
+        Parameters
+        ----------
+        sensor_objs : dict of str: object
+            The initialized sensor objects, keyed by the name of their
+            argument to ``get_sensor_data``.
+        executor : concurrent.futures.Executor or None, optional
+            If passed, reads each sensor concurrently using this executor.
+        sensor_latency_s : dict or None, optional
+            If passed, updated with the time taken to read each sensor read.
+
+        Returns
+        -------
+        sensor_data : dict or None
+            The value of each variable, in the order of ``VARIABLES``,
+            if a record is due this tick; None otherwise.
+
+        """
+        if self.scheduler is not None:
+            self._tick = self.scheduler.deadline_index
+        sensor_names = set()
+        for sensor_name, ticks in self._sensor_ticks.items():
+            period = self._tick // ticks
+            if period != self._sensor_periods.get(sensor_name):
+                self._sensor_periods[sensor_name] = period
+                sensor_names.add(sensor_name)
+        sensor_values = read_sensors(
+            sensor_objs, sensor_names=sensor_names, executor=executor,
+            sensor_latency_s=sensor_latency_s)
+        self._latest_values.update(sensor_values)
+        for variable, samples in self._samples.items():
+            if variable in sensor_values:
+                samples.append(sensor_values[variable])
+
+        output_period = self._tick // self._output_ticks
+        output_due = output_period != self._output_period
+        self._output_period = output_period
+        self._tick += 1
+        if not output_due:
+            return None
+
+        sensor_data = {key: self._latest_values[key]
+                       for key in ivaldi.schema.RECORD_SCHEMA.fieldnames}
+        if self.aggregate:
+            for variable, samples in self._samples.items():
+                if samples:
+                    sensor_data[variable] = ivaldi.aggregation.AGGREGATIONS[
+                        SAMPLE_AGGREGATIONS[variable]](samples)
+                    samples.clear()
+        return sensor_data
+
+
 def get_sensor_data(raingauge_obj, windspeed_obj, winddir_obj,
                     soiltemperature_obj, soilmoisture_obj,
-                    pressure_obj, humidity_obj):
+                    pressure_obj, humidity_obj,
+                    executor=None, sensor_latency_s=None, sampler=None,
+                    loop_stats=None, metrics_server=None):
     """
     Get observations from each sensor.
 
@@ -85,42 +352,99 @@ def get_sensor_data(raingauge_obj, windspeed_obj, winddir_obj,
         Initialized adafruit pressure sensor to retrieve data from.
     humidity_obj : ivaldi.devices.adafruit.AdafruitSHT31D
         Initialized adafruit humidity sensor to retrieve data from.
+    executor : concurrent.futures.Executor or None, optional
+        If passed, reads each sensor concurrently using this executor.
+        Otherwise, the default, reads them one after another.
+    sensor_latency_s : dict or None, optional
+        If passed, updated with the time taken to read each sensor, in s,
+        keyed by the name of the sensor's argument. The default is None.
+    sampler : MultiRateSampler or None, optional
+        If passed, reads only the sensors due on this tick of the sampler,
+        and only returns a record when one is due. The default is None.
+    loop_stats : ivaldi.stats.LoopStats or None, optional
+        If passed, records the time taken to read each sensor in it.
+        The default is None.
+    metrics_server : ivaldi.metrics.MetricsServer or None, optional
+        If passed, publishes each record to it. The default is None.
 
     Returns
     -------
-    None.
+    sensor_data : dict or None
+        The value of each variable, in the order of ``VARIABLES``; None if
+        sampling at multiple rates and no record is due.
 
     """
-    sensor_data = [
-        raingauge_obj.time_elapsed_s,
-        pressure_obj.temperature,
-        pressure_obj.pressure,
-        pressure_obj.altitude,
-        humidity_obj.temperature,
-        humidity_obj.relative_humidity,
-        windspeed_obj.output_value_average(period_s=3),
-        windspeed_obj.output_value_average(period_s=60 * 10),
-        winddir_obj.value,
-        raingauge_obj.output_value_total,
-        raingauge_obj.output_value_average(),
-        soiltemperature_obj.value,
-        soilmoisture_obj.value,
-        ]
-
-    sensor_data = {
-        key: value for key, value in zip(VARIABLES.keys(), sensor_data)}
+    sensor_objs = {
+        "raingauge_obj": raingauge_obj,
+        "windspeed_obj": windspeed_obj,
+        "winddir_obj": winddir_obj,
+        "soiltemperature_obj": soiltemperature_obj,
+        "soilmoisture_obj": soilmoisture_obj,
+        "pressure_obj": pressure_obj,
+        "humidity_obj": humidity_obj,
+        }
+
+    read_latency_s = {}
+    if sampler is not None:
+        sensor_data = sampler.sample(
+            sensor_objs, executor=executor, sensor_latency_s=read_latency_s)
+    else:
+        sensor_values = read_sensors(
+            sensor_objs, executor=executor, sensor_latency_s=read_latency_s)
+        sensor_data = {key: sensor_values[key]
+                       for key in ivaldi.schema.RECORD_SCHEMA.fieldnames}
+
+    if sensor_latency_s is not None:
+        sensor_latency_s.update(read_latency_s)
+    if loop_stats is not None:
+        for sensor_name, latency_s in read_latency_s.items():
+            loop_stats.record("sensor." + sensor_name, latency_s)
+    if metrics_server is not None and sensor_data is not None:
+        metrics_server.publish(sensor_data)
 
     return sensor_data
 
 
-def get_monitoring_data(output_file=None, log=False, **sensor_kwargs):
+def output_sensor_data(sensor_data, output_sink=None, log=False,
+                       loop_stats=None):
+    """
+    Print one record of sensor data, and write it to the output sink if any.
+
+    Parameters
+    ----------
+    sensor_data : dict
+        The value of each variable, in the order of ``VARIABLES``.
+    output_sink : ivaldi.output.CSVSink or None
+        Sink to output the data to. If None, only prints to the screen.
+    log : bool, optional
+        Whether to print every observation on a seperate line or update one.
+        The default is False.
+    loop_stats : ivaldi.stats.LoopStats or None, optional
+        If passed, records the time taken to write to the sink in it.
+        The default is None.
+
+    Returns
+    -------
+    None.
+
+    """
+    pretty_print_data(log=log, *list(sensor_data.values()))
+
+    if output_sink is not None:
+        start_time = time.monotonic()
+        output_sink.write(sensor_data)
+        if loop_stats is not None:
+            loop_stats.record("sink.write", time.monotonic() - start_time)
+
+
+def get_monitoring_data(output_sink=None, log=False, **sensor_kwargs):
     """
     Get and print one sample from the sensors.
 
     Parameters
     ----------
-    output_file : io.IOBase or None
-        File object to output the data to. If None, prints to the screen.
+    output_sink : ivaldi.output.CSVSink or None
+        Sink to output the data to. If None, only prints to the screen.
     log : bool, optional
         Whether to print every observation on a seperate line or update one.
         The default is False.
@@ -131,17 +455,44 @@ def get_monitoring_data(output_file=None, log=False, **sensor_kwargs):
 
     """
     sensor_data = get_sensor_data(**sensor_kwargs)
+    if sensor_data is None:
+        return None
 
-    pretty_print_data(log=log, *list(sensor_data.values()))
+    output_sensor_data(sensor_data, output_sink=output_sink, log=log,
+                       loop_stats=sensor_kwargs.get("loop_stats"))
+    return sensor_data
 
-    if output_file is not None:
-        ivaldi.output.write_line_csv(sensor_data, out_file=output_file)
 
-    return sensor_data
+def print_schedule_stats(scheduler):
+    """
+    Print how many updates ran, and how many missed their deadline.
+
+    Parameters
+    ----------
+    scheduler : ivaldi.utils.DeadlineScheduler
+        The scheduler the updates were run by.
+
+    Returns
+    -------
+    None.
+
+    """
+    print(f"\nUpdates: {scheduler.iterations}, "
+          f"deadlines missed: {scheduler.deadlines_missed} "
+          f"(overrun policy: {scheduler.overrun_policy})")
 
 
 def setup_sensors(pin_rain, pin_wind, channel_wind, channel_soil,
-                  period_s=PERIOD_S_DEFAULT):
+                  period_s=PERIOD_S_DEFAULT,
+                  overrun_policy=ivaldi.utils.OVERRUN_POLICY_DEFAULT,
+                  sensor_periods_s=None, aggregate_samples=True,
+                  parallel=False, stats=False,
+                  stats_interval_s=ivaldi.stats.STATS_INTERVAL_S_DEFAULT,
+                  stats_path=None, metrics_port=None, metrics_host=None,
+                  simulate=False, onewire_poll_period_s=None,
+                  adc_data_rate=None, adc_continuous=False, adc_oversample=1,
+                  adc_reduction=ivaldi.devices.analog.REDUCTION_DEFAULT,
+                  exit_stack=None):
     """
     Mainloop for continously reporting key metrics from the rain gauge.
 
@@ -157,21 +508,133 @@ def setup_sensors(pin_rain, pin_wind, channel_wind, channel_soil,
         The ADC channel (0-3) to use for the soil moisture sensor.
     period_s : float, optional
         The period at which to update, in s. The default is 1 s.
+    overrun_policy : str, optional
+        What to do when an update overruns the next one's start time;
+        "skip", "catch_up" or "coalesce", as for
+        ``ivaldi.utils.DeadlineScheduler``. The default is "skip".
+    sensor_periods_s : dict of str: float or None, optional
+        If passed, reads each listed sensor at its own period, in s, keyed by
+        its name, e.g. ``winddir`` or ``winddir_obj``, while still outputting
+        a record every ``period_s``. Also accepts (name, period) pairs.
+        The default is None, reading every sensor every ``period_s``.
+    aggregate_samples : bool, optional
+        When reading sensors at their own periods, whether to output the
+        mean of each variable's samples, rather than the latest.
+        The default is True.
+    parallel : bool, optional
+        If True, reads the sensors concurrently in a thread pool, so the
+        time taken is set by the slowest sensor rather than the sum of all
+        of them. The default is False.
+    stats : bool, optional
+        If True, records histograms of each sensor's read time, the loop's
+        jitter and busy time, and the time spent in the sink, and reports
+        their percentiles periodically. The default is False.
+    stats_interval_s : float, optional
+        How often to report the stats, in s. The default is 60 s.
+    stats_path : str or pathlib.Path or None, optional
+        The file to append the stats reports to. The default is None,
+        printing them instead.
+    metrics_port : int or None, optional
+        If passed, serves the latest record, read times and loop health
+        over HTTP on this port, in Prometheus text format, from a
+        background thread. The default is None.
+    metrics_host : str or None, optional
+        The address to serve the metrics on. The default is None,
+        "127.0.0.1", only accepting connections from the local machine.
+    simulate : bool, optional
+        If True, uses simulated sensors from ``ivaldi.devices.simulated``
+        instead of the real hardware, e.g. for testing and benchmarking.
+        The default is False.
+    onewire_poll_period_s : float or None, optional
+        If not None, reads the 1-wire soil temperature sensor in the
+        background at this period, in s, so reading it never blocks.
+        The default is None.
+    adc_data_rate : int or None, optional
+        The ADC conversion rate, in samples per second. The default is None,
+        the ADC's own default.
+    adc_continuous : bool, optional
+        Whether to run the ADC in continuous-conversion mode.
+        The default is False.
+    adc_oversample : int, optional
+        The number of ADC samples to take per channel per update, limited
+        to what fits in half the update period. The default is 1.
+    adc_reduction : str, optional
+        How to reduce the ADC samples to one value per update; "mean",
+        "median" or "trimmed_mean". The default is "mean".
+    exit_stack : contextlib.ExitStack or None, optional
+        If passed, the background threads, servers and simulated hardware
+        set up are registered with it, to be stopped and closed on exit.
+        The default is None.
 
     Returns
     -------
-    None.
+    sensor_args : dict
+        The arguments to pass to ``get_sensor_data`` and ``run_periodic``.
 
     """
-    rain_gauge = ivaldi.devices.counter.TippingBucketRainGauge(pin=pin_rain)
-    anemometer_speed = ivaldi.devices.counter.AnemometerSpeed(pin=pin_wind)
+    sampler = None
+    adc_period_s = period_s
+    if sensor_periods_s:
+        sensor_periods_s = {
+            sensor_name if sensor_name.endswith("_obj")
+            else sensor_name + "_obj": sensor_period_s
+            for sensor_name, sensor_period_s in dict(sensor_periods_s).items()}
+        sampler = MultiRateSampler(
+            sensor_periods_s, output_period_s=period_s,
+            aggregate=aggregate_samples)
+        adc_period_s = min(
+            sampler.sensor_periods_s["winddir_obj"],
+            sampler.sensor_periods_s["soilmoisture_obj"])
+
+    adc_args = {
+        "channels": sorted({channel_wind, channel_soil}),
+        "data_rate": adc_data_rate,
+        "continuous": adc_continuous,
+        "oversample": adc_oversample,
+        "max_sweep_s": adc_period_s * ADC_SWEEP_PERIOD_FRACTION,
+        }
+    if simulate:
+        simulated = ivaldi.devices.simulated
+        # Seed each device differently, so their random values don't match
+        rain_input = simulated.SimulatedPulseInput(
+            simulated.RAIN_RATE_HZ_DEFAULT, seed=simulated.SEED_DEFAULT)
+        wind_input = simulated.SimulatedPulseInput(
+            simulated.WIND_RATE_HZ_DEFAULT, seed=simulated.SEED_DEFAULT + 1)
+        adc_scanner = simulated.SimulatedADS1115Scanner(
+            **adc_args, seed=simulated.SEED_DEFAULT + 2)
+        onewire_tree = simulated.SimulatedOneWireTree(
+            seed=simulated.SEED_DEFAULT + 3)
+        if exit_stack is not None:
+            exit_stack.callback(rain_input.close)
+            exit_stack.callback(wind_input.close)
+            exit_stack.enter_context(onewire_tree)
+        onewire_base_path = onewire_tree.path
+        pressure_sensor = simulated.SimulatedBMP280(
+            seed=simulated.SEED_DEFAULT + 4)
+        humidity_sensor = simulated.SimulatedSHT31D(
+            seed=simulated.SEED_DEFAULT + 5)
+    else:
+        # Only imported when needed, as it requires the hardware libraries
+        from ivaldi.devices import adafruit  # pylint: disable=C0415
+        rain_input = None
+        wind_input = None
+        adc_scanner = adafruit.AdafruitADS1115Scanner(**adc_args)
+        onewire_base_path = ivaldi.devices.onewire.ONEWIRE_BASE_PATH
+        pressure_sensor = adafruit.AdafruitBMP280()
+        humidity_sensor = adafruit.AdafruitSHT31D()
+
+    rain_gauge = ivaldi.devices.counter.TippingBucketRainGauge(
+        pin=pin_rain, input_device=rain_input)
+    anemometer_speed = ivaldi.devices.counter.AnemometerSpeed(
+        pin=pin_wind, input_device=wind_input)
     anemometer_direction = ivaldi.devices.analog.AnemometerDirection(
-        channel=channel_wind)
-    soil_temperature = ivaldi.devices.onewire.MaximDS18B20()
+        channel=channel_wind, scanner=adc_scanner, reduction=adc_reduction)
+    soil_temperature = ivaldi.devices.onewire.MaximDS18B20(
+        poll_period_s=onewire_poll_period_s, base_path=onewire_base_path)
+    if exit_stack is not None:
+        exit_stack.callback(soil_temperature.stop_polling)
     soil_moisture = ivaldi.devices.analog.SoilMoisture(
-        channel=channel_soil)
-    pressure_sensor = ivaldi.devices.adafruit.AdafruitBMP280()
-    humidity_sensor = ivaldi.devices.adafruit.AdafruitSHT31D()
+        channel=channel_soil, scanner=adc_scanner, reduction=adc_reduction)
 
     sensor_args = {
         "raingauge_obj": rain_gauge,
@@ -182,12 +645,39 @@ def setup_sensors(pin_rain, pin_wind, channel_wind, channel_soil,
         "pressure_obj": pressure_sensor,
         "humidity_obj": humidity_sensor,
         "period_s": period_s,
+        "overrun_policy": overrun_policy,
+        "sensor_latency_s": {},
         }
+    if sampler is not None:
+        sensor_args["sampler"] = sampler
+        sensor_args["period_s"] = sampler.tick_s
+    if parallel:
+        sensor_args["executor"] = concurrent.futures.ThreadPoolExecutor(
+            max_workers=len(SENSOR_READERS))
+        if exit_stack is not None:
+            exit_stack.enter_context(sensor_args["executor"])
+    if stats:
+        sensor_args["loop_stats"] = ivaldi.stats.LoopStats(
+            interval_s=stats_interval_s, output_path=stats_path)
+    if metrics_port is not None:
+        from ivaldi import metrics  # pylint: disable=C0415
+        sensor_args["metrics_server"] = metrics.MetricsServer(
+            metrics_port, host=(metrics.METRICS_HOST_DEFAULT
+                                if metrics_host is None else metrics_host),
+            sensor_latency_s=sensor_args["sensor_latency_s"])
+        sensor_args["metrics_server"].start()
+        if exit_stack is not None:
+            exit_stack.callback(sensor_args["metrics_server"].stop)
 
     return sensor_args
 
 
-def start_monitoring(output_path=None, log=False, **sensor_kwargs):
+def start_monitoring(output_path=None, log=False,
+                     output_format=ivaldi.output.OUTPUT_FORMAT_DEFAULT,
+                     flush_rows=ivaldi.output.FLUSH_ROWS_DEFAULT,
+                     flush_interval_s=ivaldi.output.FLUSH_INTERVAL_S_DEFAULT,
+                     rotate_bytes=None, rotate_period=None, compression=None,
+                     **sensor_kwargs):
     """
     Mainloop for continously reporting key metrics from the rain gauge.
 
@@ -198,6 +688,23 @@ def start_monitoring(output_path=None, log=False, **sensor_kwargs):
     log : bool, optional
         If true, will log every update on a seperate line;
         updates one line otherwise. The default is False.
+    output_format : str, optional
+        The format to write the output in, "csv" or "binary".
+        The default is "csv".
+    flush_rows : int, optional
+        Write the output to disk every this many rows. The default is 60.
+    flush_interval_s : float, optional
+        Write the output to disk at least this often, in s.
+        The default is 60 s.
+    rotate_bytes : int or None, optional
+        Start a new output file once it reaches this size, in bytes.
+        The default is None, not rotating by size.
+    rotate_period : str or None, optional
+        Start a new output file each "hour", "day" or "month".
+        The default is None, not rotating by time.
+    compression : str or None, optional
+        Compress rotated output files with "gzip" or "lzma" in the
+        background. The default is None, leaving them uncompressed.
 
     Returns
     -------
@@ -205,11 +712,18 @@ def start_monitoring(output_path=None, log=False, **sensor_kwargs):
 
     """
     # Mainloop to measure tipping bucket
-    sensor_args = setup_sensors(**sensor_kwargs)
-    sensor_args["log"] = log
-    if output_path is not None:
-        with open(output_path, "a", encoding="utf-8", newline="") as out_file:
-            ivaldi.utils.run_periodic(get_monitoring_data)(
-                **sensor_args, output_file=out_file)
-    else:
-        ivaldi.utils.run_periodic(get_monitoring_data)(**sensor_args)
+    with contextlib.ExitStack() as stack:
+        sensor_args = setup_sensors(**sensor_kwargs, exit_stack=stack)
+        sensor_args["log"] = log
+        if output_path is not None:
+            sensor_args["output_sink"] = stack.enter_context(
+                ivaldi.output.SINK_TYPES[output_format](
+                    output_path,
+                    fieldnames=ivaldi.schema.RECORD_SCHEMA.fieldnames,
+                    flush_rows=flush_rows,
+                    flush_interval_s=flush_interval_s,
+                    rotate_bytes=rotate_bytes, rotate_period=rotate_period,
+                    compression=compression))
+        scheduler = ivaldi.utils.run_periodic(get_monitoring_data)(
+            **sensor_args)
+    print_schedule_stats(scheduler)
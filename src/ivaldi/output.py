@@ -1,9 +1,25 @@
 """
-Functions to write out collected monitoring data to a CSV file.
+Functions and sinks to write out collected monitoring data to CSV or binary.
+
+Also reads the logs they write back in, for replay and aggregation.
 """
 
 # Standard library imports
 import csv
+import gzip
+import io
+import itertools
+import json
+import lzma
+import os
+from pathlib import Path
+import shutil
+import struct
+import threading
+import time
+
+# Local imports
+import ivaldi.utils
 
 
 CSV_PARAMS = {
@@ -14,6 +30,33 @@ CSV_PARAMS = {
     "strict": False,
     }
 
+CHUNK_ROWS_DEFAULT = 1024
+FLUSH_INTERVAL_S_DEFAULT = 60
+FLUSH_ROWS_DEFAULT = 60
+
+# Binary log constants
+BINARY_ALIGNMENT = 8
+BINARY_BYTE_ORDER = "<"
+BINARY_FIELD_TYPES = {"time_elapsed_s": "d"}
+BINARY_HEADER_SIZE = struct.Struct("<I")
+BINARY_MAGIC = b"IVALDI\x00B"
+BINARY_TYPE_DEFAULT = "f"
+BINARY_VERSION = 1
+
+OUTPUT_FORMAT_DEFAULT = "csv"
+
+# Rotation constants
+COMPRESSION_TYPES = {
+    "gzip": (gzip.open, ".gz"),
+    "lzma": (lzma.open, ".xz"),
+    }
+ROTATE_PERIOD_FORMATS = {
+    "hour": "%Y%m%d%H",
+    "day": "%Y%m%d",
+    "month": "%Y%m",
+    }
+SEGMENT_TIME_FORMAT = "%Y%m%dT%H%M%SZ"
+
 
 def write_line_csv(data, out_file):
     """
@@ -36,3 +79,613 @@ def write_line_csv(data, out_file):
     if not out_file.tell():
         csv_writer.writeheader()
     csv_writer.writerow(data)
+
+
+def compress_file(input_path, compression="gzip"):
+    """
+    Compress a file to a new one with the matching suffix, then delete it.
+
+    Parameters
+    ----------
+    input_path : str or pathlib.Path
+        The path of the file to compress.
+    compression : str, optional
+        The compression to use, "gzip" or "lzma". The default is "gzip".
+
+    Returns
+    -------
+    output_path : pathlib.Path
+        The path of the compressed file.
+
+    """
+    open_compressed, suffix = COMPRESSION_TYPES[compression]
+    input_path = Path(input_path)
+    output_path = input_path.with_name(input_path.name + suffix)
+    temp_path = output_path.with_name(output_path.name + ".tmp")
+    with open(input_path, mode="rb") as in_file:
+        with open_compressed(temp_path, mode="wb") as out_file:
+            shutil.copyfileobj(in_file, out_file)
+    os.replace(temp_path, output_path)
+    input_path.unlink()
+    return output_path
+
+
+class BatchedFileSink:
+    """
+    Base class for a long-lived output file, which writes rows in batches.
+
+    Rows are buffered in memory and flushed (and optionally fsynced) once
+    enough rows are pending or enough time has passed since the last flush,
+    so at most that many rows can be lost in a power cut. Any pending rows
+    are flushed when the sink is closed, or written as soon as
+    ``ivaldi.utils.EXIT_EVENT`` is set. Use as a context manager.
+
+    Optionally, the file can be rotated once it reaches a given size or a
+    new calendar period (in UTC) starts, renaming it with the time it was
+    started and starting a new file with a fresh header at the output path.
+    Rotated segments can be compressed in a background thread, so the
+    sampling loop never waits on compression.
+
+    Subclasses implement ``_open_file``, ``_start_file`` and ``_write_rows``.
+
+    Parameters
+    ----------
+    output_path : str or pathlib.Path
+        The path of the file to append to.
+    fieldnames : iterable of str or None, optional
+        The names of the fields in each row. The default is None, using the
+        keys of the first row written.
+    flush_rows : int, optional
+        Flush once at least this many rows are pending. The default is 60.
+    flush_interval_s : float or None, optional
+        Flush once this long has passed since the last flush, in s.
+        If None, flushes only by row count. The default is 60 s.
+    fsync : bool, optional
+        Whether to fsync the file after each flush, so the data is
+        committed to the storage device. The default is True.
+    rotate_bytes : int or None, optional
+        Rotate the file once it reaches this size, in bytes.
+        The default is None, not rotating by size.
+    rotate_period : str or None, optional
+        Rotate the file at the start of each "hour", "day" or "month".
+        The default is None, not rotating by time.
+    compression : str or None, optional
+        Compress rotated segments with "gzip" or "lzma".
+        The default is None, leaving them uncompressed.
+
+    """
+
+    def __init__(self, output_path, fieldnames=None,
+                 flush_rows=FLUSH_ROWS_DEFAULT,
+                 flush_interval_s=FLUSH_INTERVAL_S_DEFAULT, fsync=True,
+                 rotate_bytes=None, rotate_period=None, compression=None):
+        """See class docstring for full details."""
+        if rotate_period is not None and (
+                rotate_period not in ROTATE_PERIOD_FORMATS):
+            raise ValueError(
+                f"Rotation period must be one of {set(ROTATE_PERIOD_FORMATS)}"
+                f", not {rotate_period!r}")
+        if compression is not None and compression not in COMPRESSION_TYPES:
+            raise ValueError(
+                f"Compression must be one of {set(COMPRESSION_TYPES)}, "
+                f"not {compression!r}")
+        self.output_path = Path(output_path)
+        self.fieldnames = None if fieldnames is None else list(fieldnames)
+        self.flush_rows = flush_rows
+        self.flush_interval_s = flush_interval_s
+        self.fsync = fsync
+        self.rotate_bytes = rotate_bytes
+        self.rotate_period = rotate_period
+        self.compression = compression
+        self.rows_written = 0
+        self.segments_rotated = 0
+        self._compress_threads = []
+        self._pending_rows = []
+        self._last_flush_time = time.monotonic()
+        self._open_segment()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _open_file(self):
+        """Open the output file for appending, returning the file object."""
+        raise NotImplementedError
+
+    def _start_file(self):
+        """Prepare to write rows once the fieldnames are known."""
+        raise NotImplementedError
+
+    def _write_rows(self, rows):
+        """Write rows to the open output file."""
+        raise NotImplementedError
+
+    def _open_segment(self):
+        """Open the output file, and start it if the fieldnames are known."""
+        self._out_file = self._open_file()
+        # Set by _start_file, so a file with only its header isn't rotated
+        self._header_size = 0
+        if self._out_file.tell():
+            self._segment_start_time = os.stat(self.output_path).st_mtime
+        else:
+            self._segment_start_time = time.time()
+        if self.fieldnames is not None:
+            self._start_file()
+
+    def _get_period(self, timestamp):
+        """Get the calendar period a timestamp falls in, as a string."""
+        return time.strftime(
+            ROTATE_PERIOD_FORMATS[self.rotate_period], time.gmtime(timestamp))
+
+    def _should_rotate(self):
+        """Check if the current file has reached its size or time limit."""
+        if self._out_file.tell() <= self._header_size:
+            return False
+        if (self.rotate_bytes is not None
+                and self._out_file.tell() >= self.rotate_bytes):
+            return True
+        if self.rotate_period is not None and (
+                self._get_period(self._segment_start_time)
+                != self._get_period(time.time())):
+            return True
+        return False
+
+    def _get_segment_path(self):
+        """Get an unused path to rename the current file to on rotation."""
+        segment_time = time.strftime(
+            SEGMENT_TIME_FORMAT, time.gmtime(self._segment_start_time))
+        segment_stem = f"{self.output_path.stem}.{segment_time}"
+        segment_path = self.output_path.with_name(
+            segment_stem + self.output_path.suffix)
+        segment_number = 0
+        while segment_path.exists() or any(
+                segment_path.with_name(segment_path.name + suffix).exists()
+                for __, suffix in COMPRESSION_TYPES.values()):
+            segment_number += 1
+            segment_path = self.output_path.with_name(
+                f"{segment_stem}_{segment_number}{self.output_path.suffix}")
+        return segment_path
+
+    def rotate(self):
+        """
+        Close the current file, rename it and start a new one.
+
+        The renamed segment is compressed in a background thread,
+        if compression is enabled. Pending rows are not flushed first.
+
+        Returns
+        -------
+        segment_path : pathlib.Path
+            The path the current file was renamed to, before compression.
+
+        """
+        self._out_file.close()
+        segment_path = self._get_segment_path()
+        os.replace(self.output_path, segment_path)
+        self.segments_rotated += 1
+
+        if self.compression is not None:
+            self._compress_threads = [
+                thread for thread in self._compress_threads
+                if thread.is_alive()]
+            compress_thread = threading.Thread(
+                target=compress_file, args=(segment_path, self.compression),
+                name=f"compress-{segment_path.name}")
+            compress_thread.start()
+            self._compress_threads.append(compress_thread)
+
+        self._open_segment()
+        return segment_path
+
+    @property
+    def closed(self):
+        """Whether the sink has been closed."""
+        return self._out_file.closed
+
+    @property
+    def rows_pending(self):
+        """The number of rows written but not yet flushed to the file."""
+        return len(self._pending_rows)
+
+    def write(self, row):
+        """
+        Add a row to the output, flushing if a limit is reached.
+
+        Parameters
+        ----------
+        row : dict
+            The row of data to write, keyed by field name.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.write_rows((row,))
+
+    def write_rows(self, rows):
+        """
+        Add several rows to the output, flushing if a limit is reached.
+
+        Parameters
+        ----------
+        rows : iterable of dict
+            The rows of data to write, each keyed by field name.
+
+        Returns
+        -------
+        None.
+
+        """
+        self._pending_rows.extend(rows)
+        if (len(self._pending_rows) >= self.flush_rows
+                or ivaldi.utils.EXIT_EVENT.is_set()
+                or (self.flush_interval_s is not None
+                    and (time.monotonic() - self._last_flush_time)
+                    >= self.flush_interval_s)):
+            self.flush()
+
+    def flush(self):
+        """
+        Write all pending rows to the file, and fsync it if enabled.
+
+        Returns
+        -------
+        None.
+
+        """
+        self._last_flush_time = time.monotonic()
+        if not self._pending_rows:
+            return
+        if self.fieldnames is None:
+            self.fieldnames = list(self._pending_rows[0].keys())
+            self._start_file()
+        if self._should_rotate():
+            self.rotate()
+        self._write_rows(self._pending_rows)
+        self.rows_written += len(self._pending_rows)
+        self._pending_rows = []
+        self._out_file.flush()
+        if self.fsync:
+            os.fsync(self._out_file.fileno())
+
+    def close(self):
+        """
+        Flush any pending rows, close the file and finish any compression.
+
+        Returns
+        -------
+        None.
+
+        """
+        if self.closed:
+            return
+        try:
+            self.flush()
+        finally:
+            self._out_file.close()
+            for compress_thread in self._compress_threads:
+                compress_thread.join()
+            self._compress_threads = []
+
+
+class CSVSink(BatchedFileSink):
+    """
+    A long-lived CSV output file, which writes rows to disk in batches.
+
+    See ``BatchedFileSink`` for details on buffering, flushing and rotation.
+
+    Parameters
+    ----------
+    output_path : str or pathlib.Path
+        The path of the CSV file to append to. If it already exists, its
+        header must match the fieldnames of the data.
+    fieldnames : iterable of str or None, optional
+        The names of the columns. The default is None, using the keys of
+        the first row written.
+    sink_kwargs
+        Flushing and rotation options, as for ``BatchedFileSink``.
+
+    """
+
+    def _open_file(self):
+        self._csv_writer = None
+        return open(self.output_path, mode="a", encoding="utf-8", newline="")
+
+    def _start_file(self):
+        """Write the header if the file is new, or check it matches if not."""
+        self._csv_writer = csv.DictWriter(
+            self._out_file, fieldnames=self.fieldnames, **CSV_PARAMS)
+        if self._out_file.tell():
+            with open(self.output_path, mode="rb") as in_file:
+                header_line = in_file.readline()
+            self._header_size = len(header_line)
+            existing_fieldnames = next(csv.reader(
+                [header_line.decode("utf-8")],
+                delimiter=CSV_PARAMS["delimiter"]), [])
+            if tuple(existing_fieldnames) != tuple(self.fieldnames):
+                raise ValueError(
+                    f"Header of existing file {self.output_path} "
+                    f"{existing_fieldnames} does not match data "
+                    f"{list(self.fieldnames)}")
+        else:
+            self._csv_writer.writeheader()
+            self._header_size = self._out_file.tell()
+
+    def _write_rows(self, rows):
+        self._csv_writer.writerows(rows)
+
+
+def _get_binary_format(fieldnames, field_types=None):
+    """Get the struct format of a binary record with the given fields."""
+    field_types = BINARY_FIELD_TYPES if field_types is None else field_types
+    return BINARY_BYTE_ORDER + "".join(
+        field_types.get(fieldname, BINARY_TYPE_DEFAULT)
+        for fieldname in fieldnames)
+
+
+def _read_binary_header(in_file):
+    """Read the header of a binary log, returning the schema and its size."""
+    magic = in_file.read(len(BINARY_MAGIC))
+    if magic != BINARY_MAGIC:
+        raise ValueError(
+            f"{getattr(in_file, 'name', 'File')} is not an Ivaldi binary log "
+            f"(expected {BINARY_MAGIC!r}, got {magic!r})")
+    schema_size = BINARY_HEADER_SIZE.unpack(
+        in_file.read(BINARY_HEADER_SIZE.size))[0]
+    schema = json.loads(in_file.read(schema_size).decode("utf-8"))
+    header_size = (
+        len(BINARY_MAGIC) + BINARY_HEADER_SIZE.size + schema_size)
+    return schema, header_size
+
+
+class BinarySink(BatchedFileSink):
+    """
+    A fixed-width binary record file, which writes rows to disk in batches.
+
+    The file starts with a small header, with a magic string, the length of
+    the schema, and the schema itself as JSON, padded so the records that
+    follow are 8-byte aligned. Each record is then a packed little-endian
+    struct of the fields, in order; floats by default, with the types of
+    specific fields set in ``BINARY_FIELD_TYPES``. Use ``read_binary_log``
+    to load the file back as a NumPy structured array.
+
+    See ``BatchedFileSink`` for details on buffering, flushing and rotation.
+
+    Parameters
+    ----------
+    output_path : str or pathlib.Path
+        The path of the binary file to append to. If it already exists,
+        its schema must match that of the data, and any partial record at
+        its end, e.g. from a power cut mid-write, is cut off first.
+    fieldnames : iterable of str or None, optional
+        The names of the fields. The default is None, using the keys of
+        the first row written.
+    sink_kwargs
+        Flushing and rotation options, as for ``BatchedFileSink``.
+
+    """
+
+    def _open_file(self):
+        self._record_struct = None
+        return open(self.output_path, mode="ab")
+
+    def _start_file(self):
+        """Write the header if the file is new, or check it matches if not."""
+        record_format = _get_binary_format(self.fieldnames)
+        self._record_struct = struct.Struct(record_format)
+        schema = {
+            "version": BINARY_VERSION,
+            "fields": self.fieldnames,
+            "format": record_format,
+            }
+        if self._out_file.tell():
+            with open(self.output_path, mode="rb") as in_file:
+                existing_schema, self._header_size = _read_binary_header(
+                    in_file)
+            if (existing_schema["fields"] != schema["fields"]
+                    or existing_schema["format"] != schema["format"]):
+                raise ValueError(
+                    f"Schema of existing file {self.output_path} "
+                    f"{existing_schema} does not match data {schema}")
+            # Drop any partial record left by a crash, so appends line up
+            data_size = self._out_file.tell() - self._header_size
+            torn_size = data_size % self._record_struct.size
+            if torn_size:
+                self._out_file.truncate(self._out_file.tell() - torn_size)
+                self._out_file.seek(0, os.SEEK_END)
+            return
+
+        schema_bytes = json.dumps(schema).encode("utf-8")
+        header_size = (
+            len(BINARY_MAGIC) + BINARY_HEADER_SIZE.size + len(schema_bytes))
+        schema_bytes += b" " * (-header_size % BINARY_ALIGNMENT)
+        self._out_file.write(
+            BINARY_MAGIC + BINARY_HEADER_SIZE.pack(len(schema_bytes))
+            + schema_bytes)
+        self._header_size = self._out_file.tell()
+
+    def _write_rows(self, rows):
+        nan = float("nan")
+        self._out_file.write(b"".join(
+            self._record_struct.pack(*[
+                row.get(fieldname, nan) for fieldname in self.fieldnames])
+            for row in rows))
+
+
+def read_binary_log(input_path):
+    """
+    Load a binary log written by ``BinarySink`` as a NumPy structured array.
+
+    The file is memory-mapped rather than read, so the data is only loaded
+    from disk as it is accessed. Any partial record at the end of the file,
+    e.g. from a power cut mid-write, is ignored.
+
+    Parameters
+    ----------
+    input_path : str or pathlib.Path
+        The path of the binary log to read.
+
+    Returns
+    -------
+    data : numpy.memmap
+        Read-only structured array of the records, with one named field per
+        variable.
+
+    """
+    # Only imported when needed, as it is optional and slow to import
+    try:
+        import numpy  # pylint: disable=C0415
+    except ImportError:
+        raise ImportError("NumPy is required to read binary logs") from None
+    with open(input_path, mode="rb") as in_file:
+        schema, header_size = _read_binary_header(in_file)
+        in_file.seek(0, os.SEEK_END)
+        data_size = in_file.tell() - header_size
+    record_struct = struct.Struct(schema["format"])
+    record_dtype = numpy.dtype([
+        (fieldname, BINARY_BYTE_ORDER + type_code)
+        for fieldname, type_code
+        in zip(schema["fields"], schema["format"][1:])])
+    record_count = data_size // record_struct.size
+    if not record_count:
+        return numpy.zeros(0, dtype=record_dtype)
+    return numpy.memmap(input_path, dtype=record_dtype, mode="r",
+                        offset=header_size, shape=(record_count,))
+
+
+def _parse_csv_value(value):
+    """Parse a CSV field as a float, or NaN if empty, else leave it as is."""
+    if not value:
+        return float("nan")
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+class LogReader:
+    """
+    Stream the rows of a log written by ``CSVSink`` or ``BinarySink``.
+
+    The format is detected from the start of the file, and rotated
+    segments compressed with gzip or lzma are read by their suffix. Rows
+    are read from the file a chunk at a time, so memory use is constant
+    however long the log is, and NumPy is not needed. Values are read as
+    floats, with empty CSV fields as NaN; non-numeric CSV fields, such as
+    the station ID, are left as strings. Any partial record at the end of
+    a binary log is ignored. Use as a context manager.
+
+    Parameters
+    ----------
+    input_path : str or pathlib.Path
+        The path of the log to read.
+    chunk_rows : int, optional
+        The number of rows to read from the file at a time.
+        The default is 1024.
+
+    Attributes
+    ----------
+    fieldnames : tuple of str
+        The name of each field, in the order of the values of each row.
+    input_format : str
+        The format of the log, "csv" or "binary".
+
+    """
+
+    def __init__(self, input_path, chunk_rows=CHUNK_ROWS_DEFAULT):
+        """See class docstring for full details."""
+        self.input_path = Path(input_path)
+        self.chunk_rows = chunk_rows
+        open_file = open
+        for open_compressed, suffix in COMPRESSION_TYPES.values():
+            if self.input_path.suffix == suffix:
+                open_file = open_compressed
+        self._in_file = open_file(self.input_path, mode="rb")
+        try:
+            is_binary = self._in_file.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+            self._in_file.seek(0)
+            if is_binary:
+                self.input_format = "binary"
+                schema, __ = _read_binary_header(self._in_file)
+                self.fieldnames = tuple(schema["fields"])
+                self._record_struct = struct.Struct(schema["format"])
+            else:
+                self.input_format = "csv"
+                self._csv_reader = csv.reader(
+                    io.TextIOWrapper(
+                        self._in_file, encoding="utf-8", newline=""),
+                    **{key: value for key, value in CSV_PARAMS.items()
+                       if key != "extrasaction"})
+                self.fieldnames = tuple(next(self._csv_reader, ()))
+        except Exception:
+            self._in_file.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __iter__(self):
+        for chunk in self.iter_chunks():
+            yield from chunk
+
+    def _iter_chunks_binary(self):
+        """Unpack whole records from each chunk of bytes read."""
+        record_size = self._record_struct.size
+        remainder = b""
+        while True:
+            chunk_bytes = self._in_file.read(self.chunk_rows * record_size)
+            if not chunk_bytes:
+                return
+            chunk_bytes = remainder + chunk_bytes
+            end = len(chunk_bytes) - len(chunk_bytes) % record_size
+            remainder = chunk_bytes[end:]
+            if end:
+                yield list(self._record_struct.iter_unpack(
+                    memoryview(chunk_bytes)[:end]))
+
+    def _iter_chunks_csv(self):
+        """Parse the values of each chunk of lines read."""
+        while True:
+            rows = list(itertools.islice(self._csv_reader, self.chunk_rows))
+            if not rows:
+                return
+            yield [tuple(_parse_csv_value(value) for value in row)
+                   for row in rows if row]
+
+    def iter_chunks(self):
+        """
+        Iterate over the rows of the log a chunk at a time.
+
+        Yields
+        ------
+        chunk : list of tuple
+            Up to ``chunk_rows`` rows, each a tuple of its values in the
+            order of ``fieldnames``.
+
+        """
+        if self.input_format == "binary":
+            return self._iter_chunks_binary()
+        return self._iter_chunks_csv()
+
+    def close(self):
+        """
+        Close the log file.
+
+        Returns
+        -------
+        None.
+
+        """
+        self._in_file.close()
+
+
+SINK_TYPES = {
+    "csv": CSVSink,
+    "binary": BinarySink,
+    }
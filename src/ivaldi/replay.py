@@ -0,0 +1,241 @@
+"""
+Replay recorded logs through the output and link pipeline, at any speed.
+"""
+
+# Standard library imports
+import contextlib
+import math
+import time
+
+# Third party imports
+import serial
+
+# Local imports
+import ivaldi.codec
+import ivaldi.link
+import ivaldi.monitor
+import ivaldi.output
+import ivaldi.schema
+import ivaldi.stats
+import ivaldi.utils
+
+
+SPEED_DEFAULT = 1
+
+
+class ReplayClock:
+    """
+    Pace replayed records by their recorded time, scaled by a speed factor.
+
+    Each record is due at the time the first was replayed, plus the time
+    recorded between them divided by the speed, so pacing doesn't drift
+    however long each record takes to output. Where the recorded time
+    goes backwards, e.g. where the logger was restarted, pacing restarts
+    from that record. Waiting returns as soon as ``EXIT_EVENT`` is set.
+
+    Parameters
+    ----------
+    speed : float, optional
+        How many times faster than real time to replay. If 0, never waits,
+        replaying as fast as possible. The default is 1, real time.
+
+    Attributes
+    ----------
+    lateness_s : float
+        How long after it was due the last record was released, in s.
+
+    """
+
+    def __init__(self, speed=SPEED_DEFAULT):
+        """See class docstring for full details."""
+        if speed < 0:
+            raise ValueError(f"Speed must be 0 or positive, not {speed}")
+        self.speed = speed
+        self.lateness_s = 0
+        self._start_time = None
+        self._start_record_time_s = None
+        self._last_record_time_s = None
+
+    def wait(self, record_time_s):
+        """
+        Wait until a record is due, or until told to exit.
+
+        Parameters
+        ----------
+        record_time_s : float
+            The time the record was recorded at, in s. If not finite,
+            the record is due immediately.
+
+        Returns
+        -------
+        running : bool
+            False if ``EXIT_EVENT`` was set, True otherwise.
+
+        """
+        if self.speed > 0 and math.isfinite(record_time_s):
+            if (self._start_time is None
+                    or record_time_s < self._last_record_time_s):
+                self._start_time = time.monotonic()
+                self._start_record_time_s = record_time_s
+            self._last_record_time_s = record_time_s
+            due_time = self._start_time + (
+                record_time_s - self._start_record_time_s) / self.speed
+            wait_time_s = due_time - time.monotonic()
+            if wait_time_s > 0 and ivaldi.utils.EXIT_EVENT.wait(wait_time_s):
+                return False
+            self.lateness_s = time.monotonic() - due_time
+        return not ivaldi.utils.EXIT_EVENT.is_set()
+
+
+def replay_log(input_path, speed=SPEED_DEFAULT, serial_device=None,
+               output_path=None, log=False,
+               output_format=ivaldi.output.OUTPUT_FORMAT_DEFAULT,
+               flush_rows=ivaldi.output.FLUSH_ROWS_DEFAULT,
+               flush_interval_s=ivaldi.output.FLUSH_INTERVAL_S_DEFAULT,
+               rotate_bytes=None, rotate_period=None, compression=None,
+               batch_size=ivaldi.link.BATCH_SIZE_DEFAULT,
+               batch_interval_s=None, compress=False,
+               keyframe_interval=ivaldi.codec.KEYFRAME_INTERVAL_DEFAULT,
+               stats=False,
+               stats_interval_s=ivaldi.stats.STATS_INTERVAL_S_DEFAULT,
+               stats_path=None):
+    """
+    Replay a recorded log through the same printing, sinks and link as live.
+
+    Each record is printed and written to the output sink and serial link
+    just as live sensor data is, paced by its recorded ``time_elapsed_s``
+    (or one period apart if the log has none) at real time, a multiple of
+    it, or as fast as possible, to load test the output stages and the
+    recieving side with real data. Fields of the log not in the record
+    schema, such as the station ID, are dropped, and any missing are NaN.
+
+    Parameters
+    ----------
+    input_path : str or pathlib.Path
+        The CSV or binary log to replay, optionally gzip or lzma compressed.
+    speed : float, optional
+        How many times faster than real time to replay. If 0, replays
+        as fast as possible. The default is 1, real time.
+    serial_device : str or None, optional
+        The serial device to send the records to. The default is None,
+        not sending them.
+    output_path : str or pathlib.Path
+        Path to output the data to. If None, prints to the screen.
+    log : bool, optional
+        If true, will log every update on a seperate line;
+        updates one line otherwise. The default is False.
+    output_format : str, optional
+        The format to write the output in, "csv" or "binary".
+        The default is "csv".
+    flush_rows : int, optional
+        Write the output to disk every this many rows. The default is 60.
+    flush_interval_s : float, optional
+        Write the output to disk at least this often, in s.
+        The default is 60 s.
+    rotate_bytes : int or None, optional
+        Start a new output file once it reaches this size, in bytes.
+        The default is None, not rotating by size.
+    rotate_period : str or None, optional
+        Start a new output file each "hour", "day" or "month".
+        The default is None, not rotating by time.
+    compression : str or None, optional
+        Compress rotated output files with "gzip" or "lzma" in the
+        background. The default is None, leaving them uncompressed.
+    batch_size : int, optional
+        The number of records to send together in each frame.
+        The default is 1.
+    batch_interval_s : float or None, optional
+        If not None, sends a partial batch once its first record has waited
+        this long, in s. The default is None.
+    compress : bool, optional
+        Whether to send records delta-compressed at their display precision.
+        The default is False.
+    keyframe_interval : int, optional
+        When compressing, send a full record every this many frames.
+        The default is 10.
+    stats : bool, optional
+        If True, periodically reports how late each record was replayed and
+        the time taken to output it. The default is False.
+    stats_interval_s : float, optional
+        How often to report the stats, in s. The default is 60 s.
+    stats_path : str or pathlib.Path or None, optional
+        The file to append the stats reports to. The default is None,
+        printing them instead.
+
+    Returns
+    -------
+    None.
+
+    """
+    replay_clock = ReplayClock(speed=speed)
+    frame_batcher = None
+    if serial_device is not None:
+        frame_batcher = ivaldi.link.create_frame_batcher(
+            batch_size=batch_size, batch_interval_s=batch_interval_s,
+            compress=compress, keyframe_interval=keyframe_interval)
+    loop_stats = None
+    if stats:
+        loop_stats = ivaldi.stats.LoopStats(
+            interval_s=stats_interval_s, output_path=stats_path)
+
+    with contextlib.ExitStack() as stack:
+        log_reader = stack.enter_context(
+            ivaldi.output.LogReader(input_path))
+        output_sink = None
+        if output_path is not None:
+            output_sink = stack.enter_context(
+                ivaldi.output.SINK_TYPES[output_format](
+                    output_path,
+                    fieldnames=ivaldi.schema.RECORD_SCHEMA.fieldnames,
+                    flush_rows=flush_rows,
+                    flush_interval_s=flush_interval_s,
+                    rotate_bytes=rotate_bytes, rotate_period=rotate_period,
+                    compression=compression))
+        serial_port = None
+        if serial_device is not None:
+            serial_port = stack.enter_context(
+                serial.Serial(serial_device, **ivaldi.link.SERIAL_PARAMS))
+
+        # Where each field of the record is in the log's rows, if anywhere
+        fieldnames = ivaldi.schema.RECORD_SCHEMA.fieldnames
+        field_indices = [
+            log_reader.fieldnames.index(fieldname)
+            if fieldname in log_reader.fieldnames else None
+            for fieldname in fieldnames]
+        time_index = field_indices[fieldnames.index(ivaldi.schema.TIME_FIELD)]
+        nan = float("nan")
+
+        print(f"Replaying {log_reader.input_format} log {input_path} at "
+              + (f"{speed:g}x speed..." if speed else "maximum speed..."))
+        ivaldi.utils.set_quit_handler()
+        records_replayed = 0
+        start_time = time.monotonic()
+        for row in log_reader:
+            record_time_s = (
+                records_replayed * ivaldi.monitor.PERIOD_S_DEFAULT
+                if time_index is None else row[time_index])
+            if not replay_clock.wait(record_time_s):
+                break
+            if loop_stats is not None:
+                loop_stats.record("loop.jitter", replay_clock.lateness_s)
+            sensor_data = dict(zip(fieldnames, [
+                nan if index is None else row[index]
+                for index in field_indices]))
+            ivaldi.monitor.output_sensor_data(
+                sensor_data, output_sink=output_sink, log=log,
+                loop_stats=loop_stats)
+            if serial_port is not None:
+                ivaldi.link.send_sensor_data(
+                    serial_port, frame_batcher, sensor_data,
+                    loop_stats=loop_stats)
+            records_replayed += 1
+            if loop_stats is not None:
+                loop_stats.report_if_due()
+        if serial_port is not None:
+            serial_port.write(frame_batcher.flush())
+        elapsed_s = time.monotonic() - start_time
+
+    print(f"\nReplayed {records_replayed} records in {elapsed_s:.2f} s "
+          f"({records_replayed / max(elapsed_s, 1e-9):.0f} records/s)")
+    if loop_stats is not None:
+        loop_stats.report()
@@ -0,0 +1,330 @@
+"""
+Resample recorded logs to longer intervals, streaming in constant memory.
+"""
+
+# Standard library imports
+import contextlib
+import csv
+import math
+import sys
+
+# Local imports
+import ivaldi.aggregation
+import ivaldi.output
+import ivaldi.schema
+
+
+AGGREGATION_DEFAULT = "mean"
+COUNT_FIELD = "record_count"
+GROUP_FIELD = "station"
+INTERVAL_S_DEFAULT = 60 * 60
+SEGMENT_FIELD = "segment"
+
+# How to combine the records in each interval; the rest are averaged
+RESAMPLE_AGGREGATIONS = {
+    "rain_mm": "sum",
+    "wind_gust_m_s_3s": "max",
+    "wind_direction_deg_n": "circular_mean_deg",
+    }
+# Running totals, which are summed as their increase from record to record
+CUMULATIVE_FIELDS = {"rain_mm"}
+
+
+class _GroupState:
+    """The interval being aggregated for one station, and its aggregators."""
+
+    def __init__(self, methods):
+        self.aggregators = {
+            fieldname: ivaldi.aggregation.StreamingAggregator(method)
+            for fieldname, method in methods.items()}
+        self.bin_key = None
+        self.count = 0
+        self.last_time_s = None
+        self.previous_totals = {}
+        self.segment = 0
+
+
+class Resampler:
+    """
+    Resample the rows of a log into fixed intervals of their recorded time.
+
+    Rows are binned by ``time_elapsed_s`` into intervals starting at
+    multiples of ``interval_s``, and the values of each variable combined
+    per ``RESAMPLE_AGGREGATIONS``: rain is summed, from the increase in its
+    running total, gusts are maxed, the wind direction is vector averaged
+    and the rest are averaged, ignoring NaNs. The intervals are of the time
+    elapsed since the logger started, not of the calendar, so e.g. hourly
+    intervals start on the hour only if the logger did. Where the recorded
+    time goes backwards, e.g. where the logger was restarted, a new segment
+    starts, numbered from 0 in the ``segment`` field, so intervals with the
+    same start in different runs are told apart. Rows from several stations
+    are resampled per station.
+
+    Rows are added a chunk at a time, with each run of rows in the same
+    interval reduced together, and only running totals are kept, so memory
+    use is constant however long the log and the interval.
+
+    Parameters
+    ----------
+    fieldnames : iterable of str
+        The name of each field of the rows, in order. Must include
+        ``time_elapsed_s``.
+    interval_s : float
+        The length of the intervals to resample to, in s.
+
+    Attributes
+    ----------
+    output_fieldnames : tuple of str
+        The name of each field of the resampled rows, in order.
+
+    """
+
+    def __init__(self, fieldnames, interval_s=INTERVAL_S_DEFAULT):
+        """See class docstring for full details."""
+        if interval_s <= 0:
+            raise ValueError(f"Interval must be positive, not {interval_s}")
+        self.fieldnames = tuple(fieldnames)
+        if ivaldi.schema.TIME_FIELD not in self.fieldnames:
+            raise ValueError(
+                f"Log has no {ivaldi.schema.TIME_FIELD!r} field to "
+                f"resample by, only {self.fieldnames}")
+        self.interval_s = interval_s
+        self._time_index = self.fieldnames.index(ivaldi.schema.TIME_FIELD)
+        self._group_index = (self.fieldnames.index(GROUP_FIELD)
+                             if GROUP_FIELD in self.fieldnames else None)
+        self._value_fields = [
+            (index, fieldname) for index, fieldname
+            in enumerate(self.fieldnames)
+            if fieldname not in {
+                ivaldi.schema.TIME_FIELD, GROUP_FIELD, SEGMENT_FIELD}]
+        self._methods = {
+            fieldname: RESAMPLE_AGGREGATIONS.get(
+                fieldname, AGGREGATION_DEFAULT)
+            for __, fieldname in self._value_fields}
+        self._group_states = {}
+        self.output_fieldnames = (
+            SEGMENT_FIELD, ivaldi.schema.TIME_FIELD, COUNT_FIELD,
+            *(fieldname for __, fieldname in self._value_fields))
+        if self._group_index is not None:
+            self.output_fieldnames = (GROUP_FIELD, *self.output_fieldnames)
+
+    def _get_bins(self, times_s):
+        """Get the interval of each time, carrying the last over NaNs."""
+        bins = []
+        bin_index = None
+        for time_s in times_s:
+            if math.isfinite(time_s):
+                bin_index = math.floor(time_s / self.interval_s)
+            bins.append(bin_index)
+        return bins
+
+    @staticmethod
+    def _get_increments(group_state, fieldname, values):
+        """Get the increase in a running total since the previous value."""
+        increments = []
+        previous_value = group_state.previous_totals.get(fieldname)
+        for value in values:
+            if not math.isfinite(value):
+                increments.append(value)
+                continue
+            if previous_value is None:
+                increments.append(0.0)
+            elif value < previous_value:
+                # The counter was reset, so counts from zero again
+                increments.append(value)
+            else:
+                increments.append(value - previous_value)
+            previous_value = value
+        group_state.previous_totals[fieldname] = previous_value
+        return increments
+
+    def _emit(self, group, group_state):
+        """Get the resampled row of a group's interval, and reset it."""
+        segment, bin_index = group_state.bin_key
+        row = {} if self._group_index is None else {GROUP_FIELD: group}
+        row[SEGMENT_FIELD] = segment
+        row[ivaldi.schema.TIME_FIELD] = (
+            float("nan") if bin_index is None
+            else bin_index * self.interval_s)
+        row[COUNT_FIELD] = group_state.count
+        for fieldname, aggregator in group_state.aggregators.items():
+            row[fieldname] = aggregator.result()
+            aggregator.reset()
+        group_state.count = 0
+        return row
+
+    def _add_run(self, columns, start, end, group, bin_index):
+        """Add a run of rows in the same group and interval."""
+        try:
+            group_state = self._group_states[group]
+        except KeyError:
+            group_state = self._group_states[group] = _GroupState(
+                self._methods)
+        resampled_rows = []
+
+        first_time_s = columns[self._time_index][start]
+        if (group_state.last_time_s is not None
+                and first_time_s < group_state.last_time_s):
+            group_state.segment += 1
+            group_state.previous_totals = dict.fromkeys(
+                group_state.previous_totals, 0.0)
+        bin_key = (group_state.segment, bin_index)
+        if group_state.bin_key is not None and bin_key != group_state.bin_key:
+            resampled_rows.append(self._emit(group, group_state))
+        group_state.bin_key = bin_key
+
+        group_state.count += end - start
+        for index, fieldname in self._value_fields:
+            values = columns[index][start:end]
+            if fieldname in CUMULATIVE_FIELDS:
+                values = self._get_increments(group_state, fieldname, values)
+            group_state.aggregators[fieldname].add(values)
+        last_time_s = columns[self._time_index][end - 1]
+        if math.isfinite(last_time_s):
+            group_state.last_time_s = last_time_s
+        return resampled_rows
+
+    def add_chunk(self, rows):
+        """
+        Add a chunk of rows, getting any intervals they complete.
+
+        Parameters
+        ----------
+        rows : sequence of tuple
+            The rows to add, each a tuple of values in the order of
+            ``fieldnames``, as read by ``ivaldi.output.LogReader``.
+
+        Returns
+        -------
+        resampled_rows : list of dict
+            The resampled row of each interval completed, keyed by the
+            names in ``output_fieldnames``.
+
+        """
+        if not rows:
+            return []
+        columns = list(zip(*rows))
+        times_s = columns[self._time_index]
+        bins = self._get_bins(times_s)
+        groups = (columns[self._group_index] if self._group_index is not None
+                  else (None,) * len(rows))
+
+        resampled_rows = []
+        run_start = 0
+        for index in range(1, len(rows) + 1):
+            if (index < len(rows) and groups[index] == groups[run_start]
+                    and bins[index] == bins[run_start]
+                    and not times_s[index] < times_s[index - 1]):
+                continue
+            resampled_rows += self._add_run(
+                columns, run_start, index, groups[run_start],
+                bins[run_start])
+            run_start = index
+        return resampled_rows
+
+    def flush(self):
+        """
+        Get the resampled rows of the intervals still being aggregated.
+
+        Returns
+        -------
+        resampled_rows : list of dict
+            The resampled row of each, as for ``add_chunk``.
+
+        """
+        resampled_rows = [
+            self._emit(group, group_state)
+            for group, group_state in self._group_states.items()
+            if group_state.count]
+        for group_state in self._group_states.values():
+            group_state.bin_key = None
+        return resampled_rows
+
+
+def aggregate_logs(input_paths, interval_s=INTERVAL_S_DEFAULT,
+                   output_path=None,
+                   output_format=ivaldi.output.OUTPUT_FORMAT_DEFAULT,
+                   chunk_rows=ivaldi.output.CHUNK_ROWS_DEFAULT):
+    """
+    Resample one or more recorded logs to a longer interval.
+
+    The logs are streamed through a chunk at a time, so this runs in
+    constant memory even over years of data. Intervals are bins of the
+    recorded ``time_elapsed_s``, the time since the logger started, rather
+    than calendar hours or days. Each resampled row has the run of the
+    logger it is from as its ``segment``, counting restarts from 0, the
+    start of its interval as its ``time_elapsed_s``, the number of records
+    in it as its ``record_count``, and the combined value of each variable;
+    see ``Resampler`` for how each is combined.
+
+    Parameters
+    ----------
+    input_paths : iterable of str or pathlib.Path
+        The CSV or binary logs to read, in order, such as the rotated
+        segments of one log; optionally gzip or lzma compressed.
+    interval_s : float, optional
+        The length of the intervals of elapsed time to resample to, in s.
+        The default is 3600 s, an hour.
+    output_path : str or pathlib.Path or None, optional
+        Path to append the resampled data to. The default is None,
+        printing it as CSV.
+    output_format : str, optional
+        The format to write the output in, "csv" or "binary".
+        The default is "csv".
+    chunk_rows : int, optional
+        The number of rows to read and resample at a time.
+        The default is 1024.
+
+    Returns
+    -------
+    None.
+
+    """
+    resampler = None
+    records_read = 0
+    intervals_written = 0
+    with contextlib.ExitStack() as stack:
+        for input_path in input_paths:
+            with ivaldi.output.LogReader(
+                    input_path, chunk_rows=chunk_rows) as log_reader:
+                if resampler is None:
+                    resampler = Resampler(
+                        log_reader.fieldnames, interval_s=interval_s)
+                    if output_path is None:
+                        csv_writer = csv.DictWriter(
+                            sys.stdout, fieldnames=resampler.output_fieldnames,
+                            **ivaldi.output.CSV_PARAMS)
+                        csv_writer.writeheader()
+                        write_rows = csv_writer.writerows
+                    else:
+                        if (output_format == "binary"
+                                and GROUP_FIELD in log_reader.fieldnames):
+                            raise ValueError(
+                                "Cannot write the station IDs of a "
+                                "multi-station log to a binary file")
+                        write_rows = stack.enter_context(
+                            ivaldi.output.SINK_TYPES[output_format](
+                                output_path,
+                                fieldnames=resampler.output_fieldnames,
+                                flush_interval_s=None, fsync=False,
+                            )).write_rows
+                elif log_reader.fieldnames != resampler.fieldnames:
+                    raise ValueError(
+                        f"Fields of {input_path} {log_reader.fieldnames} "
+                        f"do not match those of the first log "
+                        f"{resampler.fieldnames}")
+
+                for chunk in log_reader.iter_chunks():
+                    records_read += len(chunk)
+                    resampled_rows = resampler.add_chunk(chunk)
+                    intervals_written += len(resampled_rows)
+                    write_rows(resampled_rows)
+
+        if resampler is not None:
+            resampled_rows = resampler.flush()
+            intervals_written += len(resampled_rows)
+            write_rows(resampled_rows)
+
+    if output_path is not None:
+        print(f"Aggregated {records_read} records into {intervals_written} "
+              f"intervals of {interval_s:g} s")
@@ -0,0 +1,91 @@
+"""
+The schema of the sensor data records, compiled once for fast formatting.
+"""
+
+# Local imports
+import ivaldi.codec
+
+
+BYTE_ORDER_DEFAULT = "!"
+FIELD_SEPERATOR = "|"
+# One float per variable; floats represent the raw soil moisture exactly
+FIELD_TYPE_DEFAULT = "f"
+# The field records are timed by, in s since the start of the run
+TIME_FIELD = "time_elapsed_s"
+
+VARIABLES = {
+    "time_elapsed_s": "{:.1f}s",
+    "temperature_bmp280_C": "{:.2f}C",
+    "pressure_hPa": "{:.2f}hPa",
+    "altitude_m": "{:.2f}m",
+    "temperature_sht31d_C": "{:.2f}C",
+    "relative_humidity": "{:.2f}%",
+    "wind_gust_m_s_3s": "{:.2f}m/s(3s)",
+    "wind_sustained_m_s_10min": "{:.2f}m/s(10min)",
+    "wind_direction_deg_n": "{:.1f}deg",
+    "rain_mm": "{:.1f}mm",
+    "rain_rate_mm_h": "{:.2f}mm/h(5min)",
+    "rain_rate_mm_h_1h": "{:.2f}mm/h(1h)",
+    "rain_rate_mm_h_24h": "{:.2f}mm/h(24h)",
+    "soil_temperature_C": "{:.2f}C",
+    "soil_moisture_raw": "{}",
+    }
+
+
+class RecordSchema:
+    """
+    A record layout, with its wire format and formatter built once up front.
+
+    Everything derived from the variables is computed once, so printing a
+    record on every update only does the work that depends on its values.
+    Records are packed for sending by ``ivaldi.codec.RecordCodec``, built
+    from ``data_format``, into its own preallocated payload buffer.
+
+    Parameters
+    ----------
+    variables : dict of str: str
+        The name and display format string of each variable, in order.
+    byte_order : str, optional
+        The struct byte order character to pack records with.
+        The default is "!", network byte order.
+
+    Attributes
+    ----------
+    fieldnames : tuple of str
+        The name of each variable, in order.
+    data_format : str
+        The struct format of a packed record.
+    precisions : list of int
+        The number of decimal places each variable is displayed with.
+
+    """
+
+    def __init__(self, variables, byte_order=BYTE_ORDER_DEFAULT):
+        """See class docstring for full details."""
+        self.fieldnames = tuple(variables.keys())
+        self.data_format = byte_order + FIELD_TYPE_DEFAULT * len(variables)
+        self.precisions = ivaldi.codec.get_precisions(variables)
+        self._format_record = FIELD_SEPERATOR.join(variables.values()).format
+
+    def __len__(self):
+        return len(self.fieldnames)
+
+    def format(self, *values):
+        """
+        Format the values of a record as a human-readable string.
+
+        Parameters
+        ----------
+        values : float
+            The value of each variable, in order.
+
+        Returns
+        -------
+        record_str : str
+            The values in their display formats, seperated by ``|``.
+
+        """
+        return self._format_record(*values)
+
+
+RECORD_SCHEMA = RecordSchema(VARIABLES)
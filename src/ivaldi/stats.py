@@ -0,0 +1,239 @@
+"""
+Low-overhead timing statistics of the sampling loop.
+"""
+
+# Standard library imports
+import bisect
+import time
+
+
+# Log-spaced histogram buckets from 1 us to 1000 s, within about 12% each
+HISTOGRAM_BUCKETS_PER_DECADE = 20
+HISTOGRAM_DECADES = range(-6, 3)
+HISTOGRAM_BOUNDS_S = tuple(
+    10 ** (decade + step / HISTOGRAM_BUCKETS_PER_DECADE)
+    for decade in HISTOGRAM_DECADES
+    for step in range(HISTOGRAM_BUCKETS_PER_DECADE))
+PERCENTILES = (50, 95, 99)
+STATS_INTERVAL_S_DEFAULT = 60
+
+
+class LatencyHistogram:
+    """
+    A histogram of durations, in fixed log-spaced buckets.
+
+    Recording a duration is one bisection and an increment, whatever the
+    number recorded, so it can be left on in the sampling loop. Percentiles
+    are approximate, to the upper bound of the bucket they fall in.
+
+    Attributes
+    ----------
+    count : int
+        The number of durations recorded.
+    total_s : float
+        The sum of the durations recorded, in s.
+    maximum_s : float
+        The longest duration recorded, in s.
+
+    """
+
+    def __init__(self):
+        """See class docstring for full details."""
+        self.reset()
+
+    def reset(self):
+        """
+        Clear all the durations recorded.
+
+        Returns
+        -------
+        None.
+
+        """
+        self.count = 0
+        self.total_s = 0
+        self.maximum_s = 0
+        self._bucket_counts = [0] * (len(HISTOGRAM_BOUNDS_S) + 1)
+
+    def record(self, duration_s):
+        """
+        Add a duration to the histogram.
+
+        Parameters
+        ----------
+        duration_s : float
+            The duration, in s.
+
+        Returns
+        -------
+        None.
+
+        """
+        self._bucket_counts[
+            bisect.bisect_left(HISTOGRAM_BOUNDS_S, duration_s)] += 1
+        self.count += 1
+        self.total_s += duration_s
+        if duration_s > self.maximum_s:
+            self.maximum_s = duration_s
+
+    def percentile(self, percent):
+        """
+        Get the approximate duration a percentage of those recorded are under.
+
+        Parameters
+        ----------
+        percent : float
+            The percentile to get, from 0 to 100.
+
+        Returns
+        -------
+        duration_s : float
+            The upper bound of the bucket of the percentile, in s, capped at
+            the maximum recorded; NaN if none have been recorded.
+
+        """
+        if not self.count:
+            return float("nan")
+        target_count = self.count * percent / 100
+        cumulative_count = 0
+        for bound_s, bucket_count in zip(
+                HISTOGRAM_BOUNDS_S, self._bucket_counts):
+            cumulative_count += bucket_count
+            if cumulative_count >= target_count:
+                return min(bound_s, self.maximum_s)
+        return self.maximum_s
+
+
+class LoopStats:
+    """
+    Histograms of the timings of the sampling loop, reported periodically.
+
+    Each timing is recorded under a name, e.g. ``sensor.pressure_obj``,
+    ``loop.jitter`` or ``sink.write``, in its own ``LatencyHistogram``.
+    Every ``interval_s``, a summary of the percentiles of each is printed
+    or appended to a file, and the histograms are cleared.
+
+    Parameters
+    ----------
+    interval_s : float, optional
+        How often to report a summary, in s. The default is 60 s.
+    output_path : str or pathlib.Path or None, optional
+        The file to append the summaries to. The default is None, printing
+        them instead.
+
+    Attributes
+    ----------
+    histograms : dict of str: LatencyHistogram
+        The histogram of each timing recorded, by name.
+    reports : int
+        The number of summaries reported.
+
+    """
+
+    def __init__(self, interval_s=STATS_INTERVAL_S_DEFAULT, output_path=None):
+        """See class docstring for full details."""
+        self.interval_s = interval_s
+        self.output_path = output_path
+        self.histograms = {}
+        self.reports = 0
+        self._interval_start = time.monotonic()
+
+    def record(self, name, duration_s):
+        """
+        Record a timing under the given name.
+
+        Parameters
+        ----------
+        name : str
+            The name of what was timed.
+        duration_s : float
+            The duration, in s.
+
+        Returns
+        -------
+        None.
+
+        """
+        try:
+            histogram = self.histograms[name]
+        except KeyError:
+            histogram = self.histograms[name] = LatencyHistogram()
+        histogram.record(duration_s)
+
+    def summary(self, deadlines_missed=None):
+        """
+        Summarize the timings recorded since the last report.
+
+        Parameters
+        ----------
+        deadlines_missed : int or None, optional
+            If passed, the number of loop deadlines missed so far,
+            to include in the summary. The default is None.
+
+        Returns
+        -------
+        summary_str : str
+            The count and percentiles of each timing, in ms, one per line.
+
+        """
+        elapsed_s = time.monotonic() - self._interval_start
+        header = f"Stats over {elapsed_s:.1f} s"
+        if deadlines_missed is not None:
+            header += f", {deadlines_missed} deadlines missed in total"
+        lines = [header + ":"]
+        name_width = max((len(name) for name in self.histograms), default=0)
+        for name, histogram in sorted(self.histograms.items()):
+            percentiles_str = " ".join(
+                f"p{percent}={histogram.percentile(percent) * 1000:.3f}"
+                for percent in PERCENTILES)
+            lines.append(
+                f"  {name:<{name_width}} n={histogram.count} "
+                f"{percentiles_str} max={histogram.maximum_s * 1000:.3f} ms")
+        return "\n".join(lines)
+
+    def report(self, deadlines_missed=None):
+        """
+        Report a summary of the timings, and start a new interval.
+
+        Parameters
+        ----------
+        deadlines_missed : int or None, optional
+            If passed, the number of loop deadlines missed so far,
+            to include in the summary. The default is None.
+
+        Returns
+        -------
+        summary_str : str
+            The summary reported.
+
+        """
+        summary_str = self.summary(deadlines_missed=deadlines_missed)
+        if self.output_path is None:
+            print("\n" + summary_str)
+        else:
+            with open(self.output_path, mode="a",
+                      encoding="utf-8") as out_file:
+                out_file.write(summary_str + "\n")
+        for histogram in self.histograms.values():
+            histogram.reset()
+        self._interval_start = time.monotonic()
+        self.reports += 1
+        return summary_str
+
+    def report_if_due(self, deadlines_missed=None):
+        """
+        Report a summary of the timings if the interval has passed.
+
+        Parameters
+        ----------
+        deadlines_missed : int or None, optional
+            If passed, the number of loop deadlines missed so far,
+            to include in the summary. The default is None.
+
+        Returns
+        -------
+        None.
+
+        """
+        if time.monotonic() - self._interval_start >= self.interval_s:
+            self.report(deadlines_missed=deadlines_missed)
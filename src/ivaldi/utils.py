@@ -10,10 +10,10 @@ import time
 
 
 EXIT_EVENT = threading.Event()
+OVERRUN_POLICIES = {"skip", "catch_up", "coalesce"}
+OVERRUN_POLICY_DEFAULT = "skip"
 PERIOD_S_DEFAULT = 1
 SIGNALS_SET = ["SIG" + signame for signame in {"TERM", "HUP", "INT", "BREAK"}]
-SLEEP_TICK_S = 0.5
-SLEEP_TIME_MINIMUM = 0.01
 
 
 def _quit_handler(signo, _frame):
@@ -31,24 +31,169 @@ def _set_signal_handler(signal_handler, signals=SIGNALS_SET):
             continue
 
 
+def set_quit_handler():
+    """Set a handler that sets ``EXIT_EVENT`` on any quit signal."""
+    _set_signal_handler(_quit_handler)
+
+
+class DeadlineScheduler:
+    """
+    Wait for each of a series of absolute deadlines, spaced a period apart.
+
+    Deadlines are computed from the first, rather than from when each
+    iteration ends, so they don't drift however long the iterations take.
+    If aligned, they fall on multiples of the period in wall clock time,
+    e.g. exactly on the second. Waiting returns as soon as ``EXIT_EVENT``
+    is set, rather than at the deadline.
+
+    If an iteration overruns one or more deadlines, the overrun policy
+    decides what happens next: "skip" waits for the next deadline still in
+    the future, "catch_up" runs an iteration for each deadline missed, back
+    to back, until back on schedule, and "coalesce" runs one iteration
+    immediately in place of all those missed, then resumes on schedule.
+
+    Parameters
+    ----------
+    period_s : float
+        The time between deadlines, in s. If 0, never waits.
+    overrun_policy : str, optional
+        How to handle missed deadlines: "skip", "catch_up" or "coalesce".
+        The default is "skip".
+    align : bool, optional
+        Whether to align deadlines to multiples of the period in wall clock
+        time. Otherwise, the first deadline is immediate. The default is True.
+
+    Attributes
+    ----------
+    iterations : int
+        The number of deadlines waited for.
+    deadlines_missed : int
+        The number of deadlines passed before they could be waited for.
+    deadline_index : int or None
+        The number of periods the last deadline waited for is after the
+        first, counting any skipped; None before the first.
+    lateness_s : float
+        How long after its deadline the last wait returned, in s.
+
+    """
+
+    def __init__(self, period_s, overrun_policy=OVERRUN_POLICY_DEFAULT,
+                 align=True):
+        """See class docstring for full details."""
+        if overrun_policy not in OVERRUN_POLICIES:
+            raise ValueError(
+                f"Overrun policy must be one of {OVERRUN_POLICIES}, "
+                f"not {overrun_policy!r}")
+        self.period_s = period_s
+        self.overrun_policy = overrun_policy
+        self.align = align
+        self.iterations = 0
+        self.deadlines_missed = 0
+        self.deadline_index = None
+        self.lateness_s = 0
+        self.deadline = None
+
+    def _first_deadline(self):
+        """Get the first deadline, on the monotonic clock."""
+        current_time = time.monotonic()
+        if not self.align:
+            return current_time
+        return current_time + (-time.time()) % self.period_s
+
+    def _next_deadline(self):
+        """Advance to the next deadline, applying the overrun policy."""
+        self.deadline += self.period_s
+        self.deadline_index += 1
+        overrun_s = time.monotonic() - self.deadline
+        if overrun_s <= 0:
+            return
+        if self.overrun_policy == "catch_up":
+            self.deadlines_missed += 1
+            return
+        deadlines_passed = int(overrun_s // self.period_s) + 1
+        self.deadlines_missed += deadlines_passed
+        if self.overrun_policy == "skip":
+            deadlines_skipped = deadlines_passed
+        else:
+            deadlines_skipped = deadlines_passed - 1
+        self.deadline += deadlines_skipped * self.period_s
+        self.deadline_index += deadlines_skipped
+
+    def wait(self):
+        """
+        Wait until the next deadline, or until told to exit.
+
+        Returns
+        -------
+        running : bool
+            False if ``EXIT_EVENT`` was set, True otherwise.
+
+        """
+        if self.period_s > 0:
+            if self.deadline is None:
+                self.deadline = self._first_deadline()
+                self.deadline_index = 0
+            else:
+                self._next_deadline()
+            wait_time_s = self.deadline - time.monotonic()
+            if wait_time_s > 0 and EXIT_EVENT.wait(wait_time_s):
+                return False
+            self.lateness_s = time.monotonic() - self.deadline
+        else:
+            self.deadline_index = self.iterations
+        if EXIT_EVENT.is_set():
+            return False
+        self.iterations += 1
+        return True
+
+
 def run_periodic(func):
-    """Decorator to run a function at a periodic interval w/signal handling."""
+    """
+    Decorator to run a function on a fixed schedule w/signal handling.
+
+    The wrapped function takes the ``period_s``, ``overrun_policy`` and
+    ``align`` arguments of ``DeadlineScheduler``, runs until ``EXIT_EVENT``
+    is set, and returns the scheduler, to inspect the missed deadlines.
+    If a ``loop_stats`` argument (``ivaldi.stats.LoopStats``) is passed,
+    it is also passed on to the function, and the loop's jitter and busy
+    time are recorded in it and reported periodically. Likewise, if a
+    ``metrics_server`` argument (``ivaldi.metrics.MetricsServer``) is
+    passed, the scheduler is handed to it, to publish the loop's health.
+    The scheduler is also handed to any ``sampler`` argument
+    (``ivaldi.monitor.MultiRateSampler``), to tick by its deadlines.
+
+    """
     @functools.wraps(func)
-    def _run_periodic(*args, period_s=PERIOD_S_DEFAULT, **kwargs):
+    def _run_periodic(*args, period_s=PERIOD_S_DEFAULT,
+                      overrun_policy=OVERRUN_POLICY_DEFAULT, align=True,
+                      **kwargs):
 
         # Set up quit signal handler
-        _set_signal_handler(_quit_handler)
+        set_quit_handler()
 
         # Mainloop to measure tipping bucket
-        while not EXIT_EVENT.is_set():
-            wakeup_time = time.monotonic() + period_s
-
+        scheduler = DeadlineScheduler(
+            period_s, overrun_policy=overrun_policy, align=align)
+        loop_stats = kwargs.get("loop_stats")
+        metrics_server = kwargs.get("metrics_server")
+        if metrics_server is not None:
+            metrics_server.scheduler = scheduler
+        sampler = kwargs.get("sampler")
+        if sampler is not None:
+            sampler.scheduler = scheduler
+        while scheduler.wait():
+            if loop_stats is None:
+                func(*args, **kwargs)
+                continue
+            start_time = time.monotonic()
+            loop_stats.record("loop.jitter", scheduler.lateness_s)
             func(*args, **kwargs)
+            loop_stats.record("loop.busy", time.monotonic() - start_time)
+            loop_stats.report_if_due(
+                deadlines_missed=scheduler.deadlines_missed)
 
-            if wakeup_time <= time.monotonic():
-                wakeup_time = time.monotonic() + SLEEP_TIME_MINIMUM
-            while not EXIT_EVENT.is_set() and wakeup_time > time.monotonic():
-                time.sleep(max(
-                    min(SLEEP_TICK_S, wakeup_time - time.monotonic()), 0))
+        if loop_stats is not None:
+            loop_stats.report(deadlines_missed=scheduler.deadlines_missed)
+        return scheduler
 
     return _run_periodic
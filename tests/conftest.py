@@ -0,0 +1,14 @@
+"""
+Shared configuration for the Ivaldi test suite.
+"""
+
+# Standard library imports
+from pathlib import Path
+import sys
+
+
+# Run against the source tree, as the hardware requirements can't be
+# installed off the Pi
+SRC_PATH = Path(__file__).resolve().parent.parent / "src"
+if str(SRC_PATH) not in sys.path:
+    sys.path.insert(0, str(SRC_PATH))
@@ -0,0 +1,109 @@
+"""
+Tests for the shared ADS1115 scanner and the channels read through it.
+"""
+
+# Standard library imports
+import time
+
+# Third party imports
+import pytest
+
+# Local imports
+import ivaldi.devices.adc
+import ivaldi.devices.analog
+import ivaldi.devices.simulated
+
+
+class CountingScanner(ivaldi.devices.adc.ADS1115Scanner):
+    """A scanner whose conversions count up, one per read."""
+
+    def __init__(self, **scanner_kwargs):
+        self.data_rate = 100
+        self.gain = 1
+        self.conversions = 0
+        super().__init__(**scanner_kwargs)
+
+    def _read_raw(self, channel):
+        self.conversions += 1
+        return self.conversions
+
+
+def test_each_sweep_read_once():
+    scanner = CountingScanner(channels=(0, 1))
+    assert scanner.read_samples(0) == (1,)
+    assert scanner.read_samples(1) == (2,)
+    assert scanner.conversions == 2
+    # Reading a channel again sweeps all of them
+    assert scanner.read_samples(1) == (4,)
+    assert scanner.read_samples(0) == (3,)
+    assert scanner.conversions == 4
+
+
+def test_oversample_each_channel_in_turn():
+    scanner = CountingScanner(channels=(0, 1), oversample=8)
+    assert scanner.sweep() == {0: tuple(range(1, 9)), 1: tuple(range(9, 17))}
+
+
+@pytest.mark.parametrize("oversample, max_sweep_s, samples_expected", [
+    (8, None, 8),
+    (8, 1, 8),
+    (8, 0.05, 2),
+    (8, 0.06, 3),
+    (8, 0.001, 1),
+    (1, 0.001, 1),
+    ])
+def test_samples_per_channel_capped(oversample, max_sweep_s, samples_expected):
+    # At 100 samples/s, each sample of the 2 channels takes 0.01 s
+    scanner = CountingScanner(
+        channels=(0, 1), oversample=oversample, max_sweep_s=max_sweep_s)
+    assert scanner.samples_per_channel == samples_expected
+    assert len(scanner.sweep()[0]) == samples_expected
+    assert scanner.conversions == samples_expected * 2
+
+
+def test_samples_per_channel_uses_measured_cost():
+    scanner = CountingScanner(channels=(0, 1), oversample=8, max_sweep_s=0.05)
+    scanner.sample_cost_s = 0.001
+    assert scanner.samples_per_channel == 8
+    scanner.sample_cost_s = 0.02
+    assert scanner.samples_per_channel == 1
+    scanner.sample_cost_s = 0
+    assert scanner.samples_per_channel == 8
+
+
+def test_continuous_samples_paced_by_conversion():
+    scanner = CountingScanner(channels=(0,), continuous=True, oversample=4)
+    start_time = time.monotonic()
+    assert scanner.sweep() == {0: (1, 2, 3, 4)}
+    assert time.monotonic() - start_time >= 3 / scanner.data_rate
+
+
+@pytest.mark.parametrize("reduction, value_expected", [
+    ("mean", 3.5),
+    ("median", 3),
+    ("trimmed_mean", 3),
+    ])
+def test_reductions(reduction, value_expected):
+    reduce_samples = ivaldi.devices.analog.REDUCTIONS[reduction]
+    assert reduce_samples((4, 1, 2, 3, 10, 1, 3, 4)) == value_expected
+    assert reduce_samples((7,)) == 7
+    assert reduce_samples((0.5, 1.5)) == 1.0
+
+
+def test_channel_averages_samples():
+    scanner = CountingScanner(channels=(2,), oversample=3)
+    channel = ivaldi.devices.adc.AdafruitADS1115Channel(
+        channel=2, scanner=scanner)
+    assert channel.raw_value == 2
+    assert channel.voltage == scanner.raw_to_voltage(5)
+    assert scanner.raw_to_voltage(
+        ivaldi.devices.adc.ADS1115_FULL_SCALE_RAW) == 4.096
+
+
+def test_simulated_scanner_in_range():
+    scanner = ivaldi.devices.simulated.SimulatedADS1115Scanner(oversample=4)
+    for channel, raw_samples in scanner.sweep().items():
+        assert len(raw_samples) == 4
+        assert all(abs(raw_value) <= ivaldi.devices.adc.ADS1115_FULL_SCALE_RAW
+                   for raw_value in raw_samples)
+        assert scanner.read_samples(channel) == raw_samples
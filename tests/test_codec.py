@@ -0,0 +1,93 @@
+"""
+Tests for the encoding and compression of records into frame payloads.
+"""
+
+# Standard library imports
+import math
+
+# Third party imports
+import pytest
+
+# Local imports
+import ivaldi.codec
+import ivaldi.framing
+
+
+DATA_FORMAT = "<ddd"
+PRECISIONS = [1, 2, 0]
+RECORDS = [(0.0, 20.25, 1013.0), (1.0, 20.5, 1012.0), (2.0, -3.75, 1012.0)]
+
+
+def _round_trip(records, compress=True, keyframe_interval=2, batch_size=1):
+    encoder = ivaldi.codec.RecordCodec(
+        DATA_FORMAT, PRECISIONS, compress=compress,
+        keyframe_interval=keyframe_interval)
+    decoder = ivaldi.codec.RecordCodec(DATA_FORMAT, PRECISIONS)
+    frames = []
+    for sequence, index in enumerate(range(0, len(records), batch_size)):
+        frame_type, payload = encoder.encode(records[index:index + batch_size])
+        frames.append((frame_type, sequence, bytes(payload)))
+    return frames, decoder
+
+
+def test_get_precisions():
+    assert ivaldi.codec.get_precisions(
+        {"a": "{:.2f}", "b": "{}", "c": "{:.0f}x"}) == [2, 0, 0]
+
+
+@pytest.mark.parametrize("value", [0, 1, -1, 63, -64, 2 ** 40, -(2 ** 62)])
+def test_varint_round_trip(value):
+    output = bytearray()
+    ivaldi.codec.encode_varint(value, output)
+    assert len(output) <= ivaldi.codec.VARINT_SIZE_MAXIMUM
+    assert ivaldi.codec.decode_varint(output, 0) == (value, len(output))
+
+
+@pytest.mark.parametrize("compress", [False, True])
+@pytest.mark.parametrize("batch_size", [1, 2])
+def test_round_trip(compress, batch_size):
+    frames, decoder = _round_trip(
+        RECORDS, compress=compress, batch_size=batch_size)
+    assert decoder.decode_frames(frames) == RECORDS
+    assert decoder.frames_undecodable == 0
+
+
+def test_non_finite_sent_as_nan():
+    frames, decoder = _round_trip(
+        [(0.0, float("inf"), float("nan")), (1.0, 20.0, 1000.0)])
+    records = decoder.decode_frames(frames)
+    assert all(math.isnan(value) for value in records[0][1:])
+    assert records[1] == (1.0, 20.0, 1000.0)
+
+
+def test_out_of_range_sent_as_nan():
+    records = [(0.0, 20.0, 1000.0), (1.0, 1e300, -1e30), (2.0, 21.0, 999.0)]
+    frames, decoder = _round_trip(records, keyframe_interval=10)
+    decoded = decoder.decode_frames(frames)
+    assert decoder.frames_undecodable == 0
+    assert decoded[0] == records[0]
+    assert all(math.isnan(value) for value in decoded[1][1:])
+    assert decoded[2] == records[2]
+
+
+def test_delta_after_lost_frame_dropped():
+    frames, decoder = _round_trip(RECORDS, keyframe_interval=2)
+    assert [frame_type for frame_type, __, __ in frames] == [
+        ivaldi.framing.FRAME_TYPE_KEYFRAME, ivaldi.framing.FRAME_TYPE_DELTA,
+        ivaldi.framing.FRAME_TYPE_KEYFRAME]
+    records = decoder.decode_frames([frames[0], frames[2]])
+    assert records == [RECORDS[0], RECORDS[2]]
+
+    frames, decoder = _round_trip(RECORDS, keyframe_interval=10)
+    assert decoder.decode_frames([frames[0], frames[2]]) == [RECORDS[0]]
+    assert decoder.frames_undecodable == 1
+
+
+@pytest.mark.parametrize("payload", [b"", b"\x00" * 5])
+def test_malformed_plain_frame_counted(payload):
+    frames, decoder = _round_trip(RECORDS[:2], compress=False)
+    frames.insert(1, (ivaldi.framing.FRAME_TYPE_BATCH, 1, payload))
+    assert decoder.decode_frames(frames) == RECORDS[:2]
+    assert decoder.frames_undecodable == 1
+    assert decoder.decode(*frames[1]) == []
+    assert decoder.frames_undecodable == 2
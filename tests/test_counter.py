@@ -0,0 +1,81 @@
+"""
+Tests for the timestamp storage and counting of counter devices.
+"""
+
+# Standard library imports
+import time
+
+# Third party imports
+import pytest
+
+# Local imports
+import ivaldi.devices.counter
+import ivaldi.devices.simulated
+
+
+def test_buffer_drops_old_timestamps():
+    timestamps = ivaldi.devices.counter.TimestampBuffer(retention_s=10)
+    for timestamp in range(20):
+        timestamps.append(float(timestamp))
+    assert len(timestamps) == 10
+    assert timestamps.count_after(14.5) == 5
+    assert timestamps.count_after(-1) == 10
+    assert timestamps.end_index == 20
+
+
+def test_buffer_indices_survive_compaction():
+    timestamps = ivaldi.devices.counter.TimestampBuffer(retention_s=10)
+    index = timestamps.end_index
+    timestamp_count = ivaldi.devices.counter.COMPACT_SIZE_MINIMUM * 3
+    for timestamp in range(timestamp_count):
+        timestamps.append(float(timestamp))
+        if not timestamp % 100:
+            index, end_index = timestamps.advance_index(index, timestamp - 5)
+            assert end_index - index == min(timestamp + 1, 5)
+    assert len(timestamps) == 10
+    assert timestamps.end_index == timestamp_count
+
+
+def test_buffer_clear():
+    timestamps = ivaldi.devices.counter.TimestampBuffer()
+    timestamps.append(1.0)
+    timestamps.append(2.0)
+    timestamps.clear()
+    assert not len(timestamps)
+    assert timestamps.end_index == 2
+    assert timestamps.count_after(0) == 0
+
+
+def test_rolling_windows_match_brute_force():
+    timestamps = ivaldi.devices.counter.TimestampBuffer(retention_s=5)
+    windows_s = (3, 10, 60)
+    window_counter = ivaldi.devices.counter.RollingWindowCounter(
+        timestamps, windows_s)
+    assert timestamps.retention_s == 60
+    assert 10 in window_counter and 5 not in window_counter
+
+    added = []
+    for step in range(400):
+        timestamp = step * 0.7
+        if step % 3:
+            timestamps.append(timestamp)
+            added.append(timestamp)
+        assert window_counter.counts(timestamp) == {
+            window_s: sum(
+                1 for added_time in added if added_time > timestamp - window_s)
+            for window_s in windows_s}
+
+
+def test_rain_rates_per_window():
+    rain_gauge = ivaldi.devices.counter.TippingBucketRainGauge(
+        pin=None,
+        input_device=ivaldi.devices.simulated.SimulatedPulseInput(0))
+    current_time = time.monotonic()
+    rain_gauge.start_time = current_time - 2 * ivaldi.devices.counter.S_IN_HR
+    for age_s in [5000, 1800, 60]:
+        rain_gauge.count_times.append(current_time - age_s)
+
+    # Over 24 h, averaged over the 2 h elapsed rather than the full window
+    assert rain_gauge.output_value_averages() == pytest.approx(
+        {300: 12, 3600: 2, 86400: 1.5}, rel=1e-3)
+    assert rain_gauge.output_value_average() == pytest.approx(12, rel=1e-3)
@@ -0,0 +1,90 @@
+"""
+Tests for framing and batching of serial link packets.
+"""
+
+# Third party imports
+import pytest
+
+# Local imports
+import ivaldi.codec
+import ivaldi.framing
+
+
+def _encode_frames(payloads, sequence=0):
+    frame_encoder = ivaldi.framing.FrameEncoder(sequence=sequence)
+    return [frame_encoder.encode(payload) for payload in payloads]
+
+
+def test_round_trip():
+    payloads = [b"first", b"", b"third" * 100]
+    frame_parser = ivaldi.framing.FrameParser()
+    frames = frame_parser.feed(b"".join(_encode_frames(payloads)))
+    assert [payload for __, __, payload in frames] == payloads
+    assert [sequence for __, sequence, __ in frames] == [0, 1, 2]
+    assert frame_parser.frames_recieved == 3
+    assert frame_parser.frames_bad == 0
+
+
+def test_split_across_feeds():
+    data = b"".join(_encode_frames([b"first", b"second"]))
+    frame_parser = ivaldi.framing.FrameParser()
+    frames = []
+    for index in range(len(data)):
+        frames += frame_parser.feed(data[index:index + 1])
+    assert [payload for __, __, payload in frames] == [b"first", b"second"]
+    assert frame_parser.bytes_skipped == 0
+
+
+def test_resync_after_garbage():
+    frames_data = _encode_frames([b"first", b"second"])
+    data = b"\x00\xa5garbage" + frames_data[0] + b"\xa5\x5a\xff" + (
+        frames_data[1])
+    frame_parser = ivaldi.framing.FrameParser()
+    frames = frame_parser.feed(data)
+    assert [payload for __, __, payload in frames] == [b"first", b"second"]
+    assert frame_parser.bytes_skipped > 0
+
+
+def test_resync_after_corrupt_frame():
+    frames_data = _encode_frames([b"first", b"second", b"third"])
+    corrupt_frame = bytearray(frames_data[1])
+    corrupt_frame[-3] ^= 0xFF
+    frame_parser = ivaldi.framing.FrameParser()
+    frames = frame_parser.feed(
+        frames_data[0] + bytes(corrupt_frame) + frames_data[2])
+    assert [payload for __, __, payload in frames] == [b"first", b"third"]
+    assert frame_parser.frames_bad >= 1
+    assert frame_parser.frames_lost == 1
+
+
+def test_sequence_wraps_without_loss():
+    frame_parser = ivaldi.framing.FrameParser()
+    frame_parser.feed(b"".join(_encode_frames(
+        [b"a", b"b", b"c"],
+        sequence=ivaldi.framing.SEQUENCE_MODULUS - 2)))
+    assert frame_parser.frames_recieved == 3
+    assert frame_parser.frames_lost == 0
+
+
+def test_payload_too_large():
+    frame_encoder = ivaldi.framing.FrameEncoder()
+    with pytest.raises(ValueError):
+        frame_encoder.encode(
+            b"\x00" * (ivaldi.framing.PAYLOAD_SIZE_MAXIMUM + 1))
+
+
+def test_batcher_sends_full_batches():
+    record_codec = ivaldi.codec.RecordCodec("<dd", [2, 2])
+    frame_batcher = ivaldi.framing.FrameBatcher(record_codec, batch_size=3)
+    records = [(float(index), index / 2) for index in range(4)]
+    frames_data = [frame_batcher.add(record) for record in records]
+    assert [bool(frame_data) for frame_data in frames_data] == [
+        False, False, True, False]
+    assert frame_batcher.records_pending == 1
+    frames_data.append(frame_batcher.flush())
+    assert frame_batcher.flush() == b""
+
+    frames = ivaldi.framing.FrameParser().feed(b"".join(frames_data))
+    assert [frame_type for frame_type, __, __ in frames] == [
+        ivaldi.framing.FRAME_TYPE_BATCH, ivaldi.framing.FRAME_TYPE_RECORD]
+    assert record_codec.decode_frames(frames) == records
@@ -0,0 +1,88 @@
+"""
+Tests for the threaded, queued reading of the serial link.
+"""
+
+# Standard library imports
+import threading
+import time
+
+# Local imports
+import ivaldi.framing
+import ivaldi.link
+import ivaldi.schema
+import ivaldi.utils
+
+
+READ_TIMEOUT_S = 0.01
+WAIT_TIMEOUT_S = 5
+
+
+class FakeSerial:
+    """A serial port that returns the given chunks, then times out."""
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+        self.drained = threading.Event()
+
+    @property
+    def in_waiting(self):
+        return len(self.chunks[0]) if self.chunks else 0
+
+    def read(self, size=1):
+        if self.chunks:
+            return self.chunks.pop(0)
+        self.drained.set()
+        time.sleep(READ_TIMEOUT_S)
+        return b""
+
+
+def test_reader_decodes_chunks_in_order():
+    frame_batcher = ivaldi.link.create_frame_batcher()
+    fieldnames = ivaldi.schema.RECORD_SCHEMA.fieldnames
+    records = [(float(index),) * len(fieldnames) for index in range(3)]
+    data = b"".join(frame_batcher.add(record) for record in records)
+    fake_serial = FakeSerial(data[index:index + 7]
+                             for index in range(0, len(data), 7))
+
+    with ivaldi.link.SerialReader(fake_serial) as serial_reader:
+        assert fake_serial.drained.wait(WAIT_TIMEOUT_S)
+        recieved_data = ivaldi.link.recieve_queued_data(
+            serial_reader, frame_parser=ivaldi.framing.FrameParser(),
+            record_codec=ivaldi.link.create_record_codec())
+    assert recieved_data == [dict(zip(fieldnames, record))
+                             for record in records]
+    assert serial_reader.bytes_read == len(data)
+    assert serial_reader.chunks_dropped == 0
+
+
+def test_full_queue_drops_chunks():
+    chunks = [bytes([index]) * 3 for index in range(5)]
+    fake_serial = FakeSerial(chunks)
+    with ivaldi.link.SerialReader(fake_serial, queue_size=2) as serial_reader:
+        assert fake_serial.drained.wait(WAIT_TIMEOUT_S)
+        assert serial_reader.stats == {
+            "bytes_read": 15,
+            "chunks_dropped": 3,
+            "bytes_dropped": 9,
+            "queue_depth": 2,
+            "queue_depth_maximum": 2,
+            }
+        assert serial_reader.read() == chunks[0] + chunks[1]
+        assert serial_reader.read(timeout=READ_TIMEOUT_S) == b""
+
+
+def test_stop_and_exit_end_thread(monkeypatch):
+    serial_reader = ivaldi.link.SerialReader(FakeSerial([]))
+    serial_reader.start()
+    serial_reader.stop()
+    assert not any(thread.name == "serial-reader"
+                   for thread in threading.enumerate())
+
+    exit_event = threading.Event()
+    monkeypatch.setattr(ivaldi.utils, "EXIT_EVENT", exit_event)
+    serial_reader.start()
+    reader_thread = serial_reader._thread  # pylint: disable=W0212
+    exit_event.set()
+    reader_thread.join(WAIT_TIMEOUT_S)
+    assert not reader_thread.is_alive()
+    serial_reader.stop()
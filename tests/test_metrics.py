@@ -0,0 +1,58 @@
+"""
+Tests for the Prometheus metrics endpoint.
+"""
+
+# Standard library imports
+import urllib.error
+import urllib.request
+
+# Third party imports
+import pytest
+
+# Local imports
+import ivaldi.metrics
+import ivaldi.utils
+
+
+SCRAPE_TIMEOUT_S = 5
+
+
+def _scrape(metrics_server, path="/metrics"):
+    url = f"http://{metrics_server.host}:{metrics_server.port}{path}"
+    with urllib.request.urlopen(url, timeout=SCRAPE_TIMEOUT_S) as response:
+        assert response.headers["Content-Type"] == (
+            ivaldi.metrics.CONTENT_TYPE)
+        return response.read().decode("utf-8").splitlines()
+
+
+def test_scrape_metrics():
+    sensor_latency_s = {"winddir_obj": 0.25}
+    with ivaldi.metrics.MetricsServer(
+            0, sensor_latency_s=sensor_latency_s) as metrics_server:
+        assert metrics_server.port
+        lines = _scrape(metrics_server)
+        assert "ivaldi_records_published_total 0.0" in lines
+        assert not any(line.startswith("ivaldi_sensor_value")
+                       for line in lines)
+
+        metrics_server.scheduler = ivaldi.utils.DeadlineScheduler(1)
+        metrics_server.publish(
+            {"temperature_bmp280_C": 20.5, "rain_mm": float("nan")})
+        lines = _scrape(metrics_server)
+
+    assert "# TYPE ivaldi_records_published_total counter" in lines
+    assert "ivaldi_records_published_total 1.0" in lines
+    assert "# TYPE ivaldi_sensor_value gauge" in lines
+    assert 'ivaldi_sensor_value{variable="temperature_bmp280_C"} 20.5' in lines
+    assert 'ivaldi_sensor_value{variable="rain_mm"} NaN' in lines
+    assert 'ivaldi_sensor_read_seconds{sensor="winddir_obj"} 0.25' in lines
+    assert "ivaldi_loop_iterations_total 0.0" in lines
+    assert any(line.startswith("ivaldi_last_record_timestamp_seconds ")
+               for line in lines)
+
+
+def test_unknown_path_not_found():
+    with ivaldi.metrics.MetricsServer(0) as metrics_server:
+        with pytest.raises(urllib.error.HTTPError) as error_info:
+            _scrape(metrics_server, path="/other")
+    assert error_info.value.code == 404
@@ -0,0 +1,82 @@
+"""
+Tests for reading and background polling of 1-wire devices.
+"""
+
+# Standard library imports
+import math
+import time
+
+# Third party imports
+import pytest
+
+# Local imports
+import ivaldi.devices.onewire
+
+
+DEVICE_NAME = "28-000000000001"
+POLL_PERIOD_S = 0.005
+SLAVE_TEMPLATE = (
+    "72 01 4b 46 7f ff 0e 10 57 : crc=57 {crc_status}\n"
+    "72 01 4b 46 7f ff 0e 10 57 t={raw_value}\n")
+WAIT_TIMEOUT_S = 5
+
+
+@pytest.fixture
+def slave_path(tmp_path):
+    device_dir = tmp_path / DEVICE_NAME
+    device_dir.mkdir()
+    return device_dir / ivaldi.devices.onewire.SLAVE_DIR
+
+
+def _write_reading(slave_path, raw_value, crc_status="YES"):
+    slave_path.write_text(SLAVE_TEMPLATE.format(
+        raw_value=raw_value, crc_status=crc_status), encoding="utf-8")
+
+
+def _wait_until(condition):
+    deadline = time.monotonic() + WAIT_TIMEOUT_S
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(POLL_PERIOD_S)
+
+
+def _create_device(slave_path, **onewire_kwargs):
+    return ivaldi.devices.onewire.OneWireDevice(
+        family=28, scale=0.001, base_path=slave_path.parent.parent,
+        **onewire_kwargs)
+
+
+def test_read_value(slave_path):
+    _write_reading(slave_path, 23125)
+    onewire_device = _create_device(slave_path)
+    assert not onewire_device.polling
+    assert onewire_device.value == pytest.approx(23.125)
+    assert onewire_device.value_age_s < WAIT_TIMEOUT_S
+
+    _write_reading(slave_path, 24000, crc_status="NO")
+    assert math.isnan(onewire_device.value)
+
+
+def test_polling_keeps_last_good_value(slave_path, monkeypatch):
+    monkeypatch.setattr(
+        ivaldi.devices.onewire, "POLL_ERROR_WAIT_S", POLL_PERIOD_S)
+    _write_reading(slave_path, 23125)
+    onewire_device = _create_device(slave_path, poll_period_s=POLL_PERIOD_S)
+    try:
+        assert onewire_device.polling
+        _wait_until(lambda: onewire_device.value == pytest.approx(23.125))
+
+        # Neither failed CRC checks nor a missing device lose the value
+        _write_reading(slave_path, 24000, crc_status="NO")
+        time.sleep(POLL_PERIOD_S * 5)
+        assert onewire_device.value == pytest.approx(23.125)
+        slave_path.unlink()
+        _wait_until(lambda: onewire_device.read_errors)
+        assert onewire_device.value == pytest.approx(23.125)
+
+        _write_reading(slave_path, 25500)
+        _wait_until(lambda: onewire_device.value == pytest.approx(25.5))
+        assert onewire_device.polling
+    finally:
+        onewire_device.stop_polling()
+    assert not onewire_device.polling
@@ -0,0 +1,126 @@
+"""
+Tests for the output sinks and log readers.
+"""
+
+# Standard library imports
+import math
+import os
+
+# Third party imports
+import pytest
+
+# Local imports
+import ivaldi.output
+
+
+FIELDNAMES = ("time_elapsed_s", "value")
+
+
+def _write_rows(output_path, rows, sink_type=ivaldi.output.BinarySink):
+    with sink_type(output_path, fieldnames=FIELDNAMES, fsync=False) as sink:
+        sink.write_rows(
+            [dict(zip(FIELDNAMES, row)) for row in rows])
+
+
+def _read_rows(input_path):
+    with ivaldi.output.LogReader(input_path) as log_reader:
+        return list(log_reader)
+
+
+@pytest.mark.parametrize("sink_type", list(ivaldi.output.SINK_TYPES.values()))
+def test_round_trip(tmp_path, sink_type):
+    output_path = tmp_path / "log.out"
+    _write_rows(output_path, [(1.0, 2.0), (2.0, float("nan"))], sink_type)
+
+    with ivaldi.output.LogReader(output_path) as log_reader:
+        assert log_reader.fieldnames == FIELDNAMES
+        rows = list(log_reader)
+    assert rows[0] == (1.0, 2.0)
+    assert rows[1][0] == 2.0 and math.isnan(rows[1][1])
+
+
+def test_append_matching_schema(tmp_path):
+    output_path = tmp_path / "log.bin"
+    _write_rows(output_path, [(1.0, 2.0)])
+    _write_rows(output_path, [(2.0, 3.0)])
+    assert _read_rows(output_path) == [(1.0, 2.0), (2.0, 3.0)]
+
+
+def test_append_mismatched_schema(tmp_path):
+    output_path = tmp_path / "log.bin"
+    _write_rows(output_path, [(1.0, 2.0)])
+    with pytest.raises(ValueError):
+        ivaldi.output.BinarySink(output_path, fieldnames=("other",))
+
+
+def test_append_mismatched_csv_header(tmp_path):
+    output_path = tmp_path / "log.csv"
+    output_path.write_text("a,b\n1,2\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        _write_rows(output_path, [(3.0, 4.0)], ivaldi.output.CSVSink)
+    assert output_path.read_text(encoding="utf-8") == "a,b\n1,2\n"
+
+    _write_rows(output_path.with_name("new.csv"), [(1.0, 2.0)],
+                ivaldi.output.CSVSink)
+    _write_rows(output_path.with_name("new.csv"), [(2.0, 3.0)],
+                ivaldi.output.CSVSink)
+    assert _read_rows(output_path.with_name("new.csv")) == [
+        (1.0, 2.0), (2.0, 3.0)]
+
+
+def test_partial_record_ignored_on_read(tmp_path):
+    output_path = tmp_path / "log.bin"
+    _write_rows(output_path, [(1.0, 2.0), (2.0, 3.0)])
+    os.truncate(output_path, os.path.getsize(output_path) - 3)
+    assert _read_rows(output_path) == [(1.0, 2.0)]
+
+
+def test_partial_record_truncated_on_append(tmp_path):
+    output_path = tmp_path / "log.bin"
+    _write_rows(output_path, [(1.0, 2.0), (2.0, 3.0)])
+    os.truncate(output_path, os.path.getsize(output_path) - 3)
+    _write_rows(output_path, [(3.0, 4.0)])
+    assert _read_rows(output_path) == [(1.0, 2.0), (3.0, 4.0)]
+
+
+def test_read_binary_log_after_recovery(tmp_path):
+    numpy = pytest.importorskip("numpy")
+    output_path = tmp_path / "log.bin"
+    _write_rows(output_path, [(1.0, 2.0), (2.0, 3.0)])
+    os.truncate(output_path, os.path.getsize(output_path) - 3)
+    _write_rows(output_path, [(3.0, 4.0)])
+    data = ivaldi.output.read_binary_log(output_path)
+    assert numpy.array_equal(data["value"], [2.0, 4.0])
+
+
+def test_compressed_segment(tmp_path):
+    output_path = tmp_path / "log.csv"
+    _write_rows(output_path, [(1.0, 2.0)], ivaldi.output.CSVSink)
+    compressed_path = ivaldi.output.compress_file(output_path, "lzma")
+    assert compressed_path.suffix == ".xz"
+    assert _read_rows(compressed_path) == [(1.0, 2.0)]
+
+
+def test_read_in_chunks(tmp_path):
+    output_path = tmp_path / "log.bin"
+    rows = [(float(index), float(index * 2)) for index in range(10)]
+    _write_rows(output_path, rows)
+    with ivaldi.output.LogReader(output_path, chunk_rows=3) as log_reader:
+        chunks = list(log_reader.iter_chunks())
+    assert [len(chunk) for chunk in chunks] == [3, 3, 3, 1]
+    assert [row for chunk in chunks for row in chunk] == rows
+
+
+@pytest.mark.parametrize("sink_type", list(ivaldi.output.SINK_TYPES.values()))
+def test_rotate_skips_header_only_segments(tmp_path, sink_type):
+    output_path = tmp_path / "log.out"
+    with sink_type(output_path, fieldnames=FIELDNAMES, flush_rows=1,
+                   fsync=False, rotate_bytes=1) as sink:
+        for index in range(3):
+            sink.write(dict(zip(FIELDNAMES, (float(index), 0.0))))
+    assert sink.segments_rotated == 2
+    log_paths = sorted(tmp_path.iterdir())
+    assert len(log_paths) == 3
+    assert sorted(row for log_path in log_paths
+                  for row in _read_rows(log_path)) == [
+                      (0.0, 0.0), (1.0, 0.0), (2.0, 0.0)]
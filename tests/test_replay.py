@@ -0,0 +1,101 @@
+"""
+Tests for replaying recorded logs through the output and link pipeline.
+"""
+
+# Standard library imports
+import math
+
+# Third party imports
+import pytest
+import serial
+
+# Local imports
+import ivaldi.framing
+import ivaldi.link
+import ivaldi.output
+import ivaldi.replay
+import ivaldi.schema
+import ivaldi.utils
+
+
+INPUT_FIELDNAMES = ("time_elapsed_s", "temperature_bmp280_C", "extra")
+INPUT_ROWS = [(0.0, 20.5, 1.0), (1.0, 21.0, 2.0), (2.0, 21.5, 3.0)]
+
+
+class FakeSerial:
+    """A serial port that keeps everything written to it."""
+
+    def __init__(self, *__, **___):
+        self.written = bytearray()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def write(self, data):
+        self.written += data
+
+
+@pytest.fixture(autouse=True)
+def no_quit_handler(monkeypatch):
+    monkeypatch.setattr(ivaldi.utils, "set_quit_handler", lambda: None)
+
+
+def _write_log(input_path, sink_type):
+    with sink_type(input_path, fieldnames=INPUT_FIELDNAMES,
+                   fsync=False) as sink:
+        sink.write_rows([dict(zip(INPUT_FIELDNAMES, row))
+                         for row in INPUT_ROWS])
+
+
+def _check_records(records):
+    """Check replayed records hold the logged fields, and NaN otherwise."""
+    fieldnames = ivaldi.schema.RECORD_SCHEMA.fieldnames
+    assert len(records) == len(INPUT_ROWS)
+    for record, row in zip(records, INPUT_ROWS):
+        record = dict(zip(fieldnames, record))
+        assert record.pop("time_elapsed_s") == row[0]
+        assert record.pop("temperature_bmp280_C") == row[1]
+        assert all(math.isnan(value) for value in record.values())
+
+
+@pytest.mark.parametrize("input_format", list(ivaldi.output.SINK_TYPES))
+@pytest.mark.parametrize("output_format", list(ivaldi.output.SINK_TYPES))
+def test_replay_to_sink(tmp_path, input_format, output_format):
+    input_path = tmp_path / "input.log"
+    output_path = tmp_path / "output.log"
+    _write_log(input_path, ivaldi.output.SINK_TYPES[input_format])
+
+    ivaldi.replay.replay_log(
+        input_path, speed=0, output_path=output_path,
+        output_format=output_format, log=True)
+    with ivaldi.output.LogReader(output_path) as log_reader:
+        assert log_reader.fieldnames == ivaldi.schema.RECORD_SCHEMA.fieldnames
+        _check_records(list(log_reader))
+
+
+def test_replay_to_link(tmp_path, monkeypatch):
+    input_path = tmp_path / "input.csv"
+    _write_log(input_path, ivaldi.output.CSVSink)
+    fake_serials = []
+
+    def create_fake_serial(*args, **kwargs):
+        fake_serials.append(FakeSerial(*args, **kwargs))
+        return fake_serials[-1]
+
+    monkeypatch.setattr(serial, "Serial", create_fake_serial)
+    ivaldi.replay.replay_log(
+        input_path, speed=0, serial_device="/dev/null", batch_size=2)
+
+    frame_parser = ivaldi.framing.FrameParser()
+    record_codec = ivaldi.link.create_record_codec()
+    _check_records(record_codec.decode_frames(
+        frame_parser.feed(bytes(fake_serials[0].written))))
+    assert frame_parser.frames_recieved == 2
+
+
+def test_replay_clock_rejects_negative_speed():
+    with pytest.raises(ValueError):
+        ivaldi.replay.ReplayClock(speed=-1)
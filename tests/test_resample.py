@@ -0,0 +1,133 @@
+"""
+Tests for streaming aggregation and resampling of recorded logs.
+"""
+
+# Third party imports
+import pytest
+
+# Local imports
+import ivaldi.aggregation
+import ivaldi.output
+import ivaldi.resample
+
+
+FIELDNAMES = ("time_elapsed_s", "temperature_C", "rain_mm",
+              "wind_direction_deg_n")
+NAN = float("nan")
+VALUES = [3.0, NAN, 1.0, 4.0, 359.0, NAN, 5.0, 9.0, 2.0]
+
+
+def _resample(rows, fieldnames=FIELDNAMES, interval_s=10, chunk_rows=None):
+    resampler = ivaldi.resample.Resampler(fieldnames, interval_s=interval_s)
+    chunk_rows = chunk_rows or len(rows)
+    resampled_rows = []
+    for index in range(0, len(rows), chunk_rows):
+        resampled_rows += resampler.add_chunk(rows[index:index + chunk_rows])
+    return resampled_rows + resampler.flush()
+
+
+def _assert_rows_equal(rows, rows_expected):
+    assert len(rows) == len(rows_expected)
+    for row, row_expected in zip(rows, rows_expected):
+        assert row.keys() == row_expected.keys()
+        for key, value in row_expected.items():
+            assert row[key] == pytest.approx(value, nan_ok=True)
+
+
+@pytest.mark.parametrize("method", list(ivaldi.aggregation.AGGREGATIONS))
+@pytest.mark.parametrize("chunk_size", [1, 2, 4, len(VALUES)])
+def test_streaming_matches_batch(method, chunk_size):
+    aggregator = ivaldi.aggregation.StreamingAggregator(method)
+    for index in range(0, len(VALUES), chunk_size):
+        aggregator.add(VALUES[index:index + chunk_size])
+    assert aggregator.result() == pytest.approx(
+        ivaldi.aggregation.AGGREGATIONS[method](VALUES))
+
+
+@pytest.mark.parametrize("method", list(ivaldi.aggregation.AGGREGATIONS))
+def test_streaming_reset(method):
+    aggregator = ivaldi.aggregation.StreamingAggregator(method)
+    aggregator.add([1.0, 2.0])
+    aggregator.reset()
+    aggregator.add([NAN])
+    result_expected = ivaldi.aggregation.AGGREGATIONS[method]([NAN])
+    assert aggregator.result() == pytest.approx(result_expected, nan_ok=True)
+
+
+def test_streaming_invalid_method():
+    with pytest.raises(ValueError):
+        ivaldi.aggregation.StreamingAggregator("median")
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 2, 3, None])
+def test_resample_bins(chunk_rows):
+    rows = [
+        (0.0, 10.0, 5.0, 350.0),
+        (5.0, 20.0, 6.0, 30.0),
+        (10.0, NAN, 6.5, NAN),
+        (15.0, 30.0, 7.0, 90.0),
+        (25.0, 40.0, 7.0, 180.0),
+        ]
+    _assert_rows_equal(_resample(rows, chunk_rows=chunk_rows), [
+        {"segment": 0, "time_elapsed_s": 0, "record_count": 2,
+         "temperature_C": 15.0, "rain_mm": 1.0, "wind_direction_deg_n": 10},
+        {"segment": 0, "time_elapsed_s": 10, "record_count": 2,
+         "temperature_C": 30.0, "rain_mm": 1.0, "wind_direction_deg_n": 90},
+        {"segment": 0, "time_elapsed_s": 20, "record_count": 1,
+         "temperature_C": 40.0, "rain_mm": 0.0, "wind_direction_deg_n": 180},
+        ])
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 2, None])
+def test_resample_restart_starts_segment(chunk_rows):
+    rows = [
+        (0.0, 10.0, 0.0, 0.0),
+        (5.0, 20.0, 2.0, 0.0),
+        (1.0, 30.0, 1.0, 0.0),
+        (6.0, 40.0, 1.5, 0.0),
+        ]
+    rows = _resample(rows, chunk_rows=chunk_rows)
+    assert [(row["segment"], row["time_elapsed_s"], row["temperature_C"],
+             row["rain_mm"]) for row in rows] == [
+        (0, 0, 15.0, 2.0), (1, 0, 35.0, 1.5)]
+
+
+def test_resample_per_station():
+    fieldnames = ("station", *FIELDNAMES[:2])
+    rows = [("a", 0.0, 1.0), ("b", 0.0, 10.0), ("a", 5.0, 3.0),
+            ("b", 12.0, 20.0)]
+    resampler = ivaldi.resample.Resampler(fieldnames, interval_s=10)
+    assert resampler.output_fieldnames == (
+        "station", "segment", "time_elapsed_s", "record_count",
+        "temperature_C")
+    rows = resampler.add_chunk(rows) + resampler.flush()
+    assert sorted((row["station"], row["time_elapsed_s"],
+                   row["temperature_C"]) for row in rows) == [
+        ("a", 0, 2.0), ("b", 0, 10.0), ("b", 10, 20.0)]
+
+
+def test_resample_requires_time():
+    with pytest.raises(ValueError):
+        ivaldi.resample.Resampler(FIELDNAMES[1:])
+
+
+def test_aggregate_logs(tmp_path):
+    input_paths = [tmp_path / "log_1.csv", tmp_path / "log_2.csv"]
+    for input_path, rows in zip(input_paths, [
+            [(0.0, 10.0, 0.0, 0.0), (30.0, 20.0, 1.0, 0.0)],
+            [(70.0, 30.0, 1.0, 0.0), (5.0, 40.0, 0.5, 0.0)]]):
+        with ivaldi.output.CSVSink(
+                input_path, fieldnames=FIELDNAMES, fsync=False) as sink:
+            sink.write_rows([dict(zip(FIELDNAMES, row)) for row in rows])
+
+    output_path = tmp_path / "resampled.csv"
+    ivaldi.resample.aggregate_logs(
+        input_paths, interval_s=60, output_path=output_path, chunk_rows=1)
+    with ivaldi.output.LogReader(output_path) as log_reader:
+        assert log_reader.fieldnames[:3] == (
+            "segment", "time_elapsed_s", "record_count")
+        rows = list(log_reader)
+    assert [row[:4] for row in rows] == [
+        (0, 0, 2, 15.0), (0, 60, 1, 30.0), (1, 0, 1, 40.0)]
+    # Rain counts from zero again after the restart
+    assert rows[2][4] == 0.5
@@ -0,0 +1,122 @@
+"""
+Tests for the drift-free periodic scheduler.
+"""
+
+# Third party imports
+import pytest
+
+# Local imports
+import ivaldi.monitor
+import ivaldi.schema
+import ivaldi.utils
+
+
+class FakeClock:
+    """A clock that only advances when waited on or told to."""
+
+    def __init__(self, start_time=100.0):
+        self.current_time = start_time
+        self.exit = False
+
+    def monotonic(self):
+        return self.current_time
+
+    def time(self):
+        return self.current_time
+
+    def wait(self, timeout):
+        self.current_time += timeout
+        return self.exit
+
+    def is_set(self):
+        return self.exit
+
+
+@pytest.fixture
+def fake_clock(monkeypatch):
+    fake_clock = FakeClock()
+    monkeypatch.setattr(ivaldi.utils, "time", fake_clock)
+    monkeypatch.setattr(ivaldi.utils, "EXIT_EVENT", fake_clock)
+    return fake_clock
+
+
+def _run(scheduler, fake_clock, busy_s, deadline_indices=None):
+    """Run an iteration per busy time, returning the times each started."""
+    start_times = []
+    for iteration_busy_s in busy_s:
+        assert scheduler.wait()
+        start_times.append(fake_clock.current_time)
+        if deadline_indices is not None:
+            deadline_indices.append(scheduler.deadline_index)
+        fake_clock.current_time += iteration_busy_s
+    return start_times
+
+
+def test_aligned_no_drift(fake_clock):
+    fake_clock.current_time = 100.25
+    scheduler = ivaldi.utils.DeadlineScheduler(1)
+    start_times = _run(scheduler, fake_clock, [0.5] * 4)
+    assert start_times == [101, 102, 103, 104]
+    assert scheduler.iterations == 4
+    assert scheduler.deadlines_missed == 0
+
+
+def test_unaligned_starts_immediately(fake_clock):
+    fake_clock.current_time = 100.25
+    scheduler = ivaldi.utils.DeadlineScheduler(1, align=False)
+    assert _run(scheduler, fake_clock, [0.1] * 3) == [100.25, 101.25, 102.25]
+
+
+@pytest.mark.parametrize(
+    "overrun_policy, start_times_expected, indices_expected", [
+        ("skip", [100, 103, 104, 105], [0, 3, 4, 5]),
+        ("catch_up", [100, 102.5, 102.5, 103], [0, 1, 2, 3]),
+        ("coalesce", [100, 102.5, 103, 104], [0, 2, 3, 4]),
+        ])
+def test_overrun_policies(
+        fake_clock, overrun_policy, start_times_expected, indices_expected):
+    scheduler = ivaldi.utils.DeadlineScheduler(
+        1, overrun_policy=overrun_policy)
+    deadline_indices = []
+    start_times = _run(
+        scheduler, fake_clock, [2.5, 0, 0, 0], deadline_indices)
+    assert start_times == start_times_expected
+    assert deadline_indices == indices_expected
+    assert scheduler.deadlines_missed == 2
+
+
+def test_exit_stops_waiting(fake_clock):
+    scheduler = ivaldi.utils.DeadlineScheduler(1)
+    assert scheduler.wait()
+    fake_clock.exit = True
+    assert not scheduler.wait()
+    assert scheduler.iterations == 1
+
+
+def test_invalid_overrun_policy():
+    with pytest.raises(ValueError):
+        ivaldi.utils.DeadlineScheduler(1, overrun_policy="panic")
+
+
+def test_sampler_ticks_by_deadline(monkeypatch):
+    sensor_reads = []
+
+    def read_sensors(sensor_objs, sensor_names=None, **__):
+        sensor_reads.append(sensor_names)
+        return dict.fromkeys(ivaldi.schema.RECORD_SCHEMA.fieldnames, 1.0)
+
+    monkeypatch.setattr(ivaldi.monitor, "read_sensors", read_sensors)
+    sampler = ivaldi.monitor.MultiRateSampler({"winddir_obj": 1}, 3)
+    sampler.scheduler = ivaldi.utils.DeadlineScheduler(sampler.tick_s)
+    records_due = []
+    # Deadlines 2 and 3 were skipped after an overrun, so the record due
+    # at 3 is output late at 4 rather than lost
+    for deadline_index in [0, 1, 4, 5, 6, 7]:
+        sampler.scheduler.deadline_index = deadline_index
+        records_due.append(sampler.sample({}) is not None)
+
+    assert records_due == [True, False, True, False, True, False]
+    assert [len(sensor_names) for sensor_names in sensor_reads] == [
+        len(ivaldi.monitor.SENSOR_READERS), 1,
+        len(ivaldi.monitor.SENSOR_READERS), 1,
+        len(ivaldi.monitor.SENSOR_READERS), 1]